@@ -3,6 +3,7 @@ import sys
 from PyQt5.QtWidgets import QApplication
 # Używamy względnego importu
 from main_window import MainWindow
+from session_journal import load_session
 
 if __name__ == "__main__":
     # Poprawka dla niektórych środowisk Wayland/X11
@@ -14,7 +15,12 @@ if __name__ == "__main__":
     # os.environ['QT_QPA_PLATFORM'] = 'xcb' # lub 'wayland', w zależności od systemu
 
     app = QApplication(sys.argv)
-    window = MainWindow()
+    # Odtwórz poprzednią sesję (migawka + dziennik) - także po awarii
+    session = load_session()
+    window = MainWindow(populate=session is None)
+    if session is not None:
+        window.restore_session(session)
+    window.start_session_journal()
     window.show()
     try:
         sys.exit(app.exec_())
@@ -0,0 +1,921 @@
+# benchmarks.py
+"""
+Benchmarki wydajności edytora.
+Uruchomienie (z katalogu srcs): python benchmarks.py [nazwa ...] - bez argumentów uruchamia wszystkie.
+Benchmarki z widgetami działają bez ekranu (QT_QPA_PLATFORM=offscreen).
+"""
+import os
+import sys
+import time
+import random
+import statistics
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+_app = None # Jedna QApplication na cały przebieg - inaczej ginie po każdym benchmarku
+
+def _qt_app():
+    """ Zwraca (i w razie potrzeby tworzy) instancję QApplication. """
+    global _app
+    from PyQt5.QtWidgets import QApplication
+    if _app is None:
+        _app = QApplication.instance() or QApplication(sys.argv)
+    return _app
+
+def _report(name, samples_ms):
+    """ Wypisuje podsumowanie serii pomiarów w milisekundach. """
+    print(f"  {name}: median {statistics.median(samples_ms):.2f} ms, "
+          f"max {max(samples_ms):.2f} ms, n={len(samples_ms)}")
+
+def _wait_for_tasks(app, registry):
+    """ Obsługuje zdarzenia, dopóki pula zadań w tle (wczytywanie treści zakładek) nie skończy pracy. """
+    while registry.task_runner.pending_count():
+        app.processEvents()
+        time.sleep(0.001)
+
+def _random_words(rng, count):
+    syllables = ['ma', 'in', 'win', 'dow', 'tab', 'lay', 'out', 'edi', 'tor', 'spl', 'it', 'ter', 'pa', 'nel', 'set', 'con', 'fig']
+    return ''.join(rng.choice(syllables) for _ in range(count))
+
+
+def bench_quick_open(entries=50000):
+    """ Opóźnienie naciśnięcie klawisza -> wyniki palety "przejdź do zakładki" przy 50k wpisach. """
+    from search_index import TrigramIndex, QuickOpenSearchThread
+    app = _qt_app()
+    rng = random.Random(0)
+    print(f"quick_open ({entries} wpisów)")
+
+    index = TrigramIndex()
+    start = time.perf_counter()
+    for key in range(entries):
+        title = f"{_random_words(rng, 3)}_{key}.py"
+        index.add(key, title, f"/home/user/projekt/{_random_words(rng, 2)}/{title}")
+    print(f"  budowa indeksu: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    thread = QuickOpenSearchThread(index)
+    received = {}
+    thread.resultsReady.connect(lambda generation, results: received.__setitem__(generation, results))
+    thread.start()
+
+    for query in ('mainwindow', 'tablay', 'nel_1234'):
+        samples = []
+        for length in range(1, len(query) + 1):
+            start = time.perf_counter()
+            generation = thread.request(query[:length])
+            while generation not in received:
+                app.processEvents()
+            samples.append((time.perf_counter() - start) * 1000)
+        _report(f"'{query}' (na klawisz)", samples)
+
+    # Przyrostowa aktualizacja (zmiana tytułu jednej zakładki)
+    samples = []
+    for key in range(0, entries, entries // 200):
+        start = time.perf_counter()
+        index.add(key, f"renamed_{key}.py")
+        samples.append((time.perf_counter() - start) * 1000)
+    _report("aktualizacja wpisu", samples)
+    thread.stop()
+
+
+def bench_project_index(files=100000, files_per_dir=50):
+    """ Zimne i ciepłe (z zapisanego indeksu) indeksowanie drzewa plików oraz zasilenie nim palety. """
+    import shutil
+    import tempfile
+    import tracemalloc
+    from project_indexer import ProjectIndex
+    from search_index import PathIndex, TrigramIndex
+    print(f"project_index ({files} plików)")
+
+    root = tempfile.mkdtemp(prefix='bench_project_')
+    cache_path = os.path.join(root + '_cache', 'index.json')
+    try:
+        directories = []
+        for number in range(files // files_per_dir):
+            # Drzewo o głębokości 3: a/b/c
+            rel = os.path.join(f"d{number % 20}", f"e{number % 200}", f"f{number}")
+            os.makedirs(os.path.join(root, rel))
+            directories.append(rel)
+            for file_number in range(files_per_dir):
+                open(os.path.join(root, rel, f"plik_{file_number}.py"), 'w').close()
+
+        start = time.perf_counter()
+        index = ProjectIndex(root)
+        scanned, reused = index.scan()
+        cold = time.perf_counter() - start
+        index.save(cache_path)
+        print(f"  zimne: {cold * 1000:.0f} ms ({scanned} katalogów przeskanowanych, {index.file_count()} plików)")
+
+        # Zmieniamy kilka katalogów - tylko one powinny zostać przeskanowane ponownie
+        for rel in directories[:10]:
+            open(os.path.join(root, rel, "nowy.py"), 'w').close()
+
+        start = time.perf_counter()
+        index = ProjectIndex(root)
+        index.load(cache_path)
+        loaded = time.perf_counter() - start
+        scanned, reused = index.scan()
+        warm = time.perf_counter() - start
+        print(f"  ciepłe: {warm * 1000:.0f} ms (w tym wczytanie {loaded * 1000:.0f} ms; "
+              f"{scanned} przeskanowanych, {reused} z pamięci podręcznej)")
+
+        # Zasilenie palety "przejdź do" - zwarty indeks ścieżek budowany w wątku indeksującym
+        tracemalloc.start()
+        start = time.perf_counter()
+        paths = PathIndex(index.root, index.iter_files())
+        build = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"  indeks ścieżek palety: {build * 1000:.0f} ms, {size / 1e6:.1f} MB ({len(paths)} ścieżek)")
+
+        search_index = TrigramIndex()
+        for tab_id in range(1000):
+            search_index.add(tab_id, f"Zakładka {tab_id}", f"/tmp/plik_{tab_id}.py")
+        start = time.perf_counter()
+        search_index.set_paths(paths)
+        print(f"  podmiana w indeksie palety: {(time.perf_counter() - start) * 1e6:.0f} µs")
+        for query in ('pl', 'plik_7', 'f12plik', 'd3e14f9'):
+            samples = []
+            for _ in range(10):
+                start = time.perf_counter()
+                search_index.search(query)
+                samples.append((time.perf_counter() - start) * 1000)
+            _report(f"szukanie '{query}' (zakładki + pliki)", samples)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        shutil.rmtree(root + '_cache', ignore_errors=True)
+
+
+def bench_highlight(lines=100000):
+    """ Opóźnienie naciśnięcia klawisza w edytorze z podświetlaniem przy pliku o 100k liniach. """
+    from editor import EditorWidget
+    app = _qt_app()
+    print(f"highlight ({lines} linii)")
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'highlighter.py'), encoding='utf-8') as f:
+        source_lines = f.read().split('\n')
+    text = '\n'.join((source_lines * (lines // len(source_lines) + 1))[:lines])
+
+    editor = EditorWidget(text, 'bench.py')
+    editor.resize(800, 600)
+    editor.show()
+    start = time.perf_counter()
+    while not editor.highlighter._ready:
+        app.processEvents()
+    print(f"  początkowa tokenizacja (wątek roboczy): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    cursor = editor.textCursor()
+    cursor.setPosition(editor.document().findBlockByNumber(lines // 2).position())
+    editor.setTextCursor(cursor)
+    app.processEvents()
+    for label, typed in (("zwykłe znaki", "value = compute(1, 2)  # ok"), ("otwarcie \"\"\"", '"""')):
+        samples = []
+        for char in typed:
+            start = time.perf_counter()
+            editor.textCursor().insertText(char)
+            app.processEvents()
+            samples.append((time.perf_counter() - start) * 1000)
+        _report(label, samples)
+    while editor.highlighter.cache.pending_from is not None:
+        app.processEvents()
+    editor.highlighter.stop_worker()
+
+
+def bench_tab_lifecycle(tabs=300):
+    """ Ukrywanie/zamykanie wielu zakładek: budżet pamięci ukrytych zakładek i wykrywanie wycieków (weakref). """
+    import tempfile
+    from main_window import MainWindow
+    app = _qt_app()
+    print(f"tab_lifecycle ({tabs} zakładek edytora)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for number in range(tabs):
+            path = os.path.join(directory, f"plik_{number}.py")
+            with open(path, 'w') as f:
+                f.write("def f(x):\n    return x * 2\n" * 100)
+            paths.append(path)
+
+        window = MainWindow()
+        window.hidden_tabs.budget = 1024 * 1024
+        window.show()
+        start = time.perf_counter()
+        tab_ids = [window.open_path(path) for path in paths]
+        _wait_for_tasks(app, window.registry)
+        print(f"  otwarcie: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        start = time.perf_counter()
+        for tab_id in tab_ids:
+            window.toggle_or_split_tab(tab_id)
+        app.processEvents()
+        released = sum(1 for tab_id in tab_ids if window.all_tabs_data[tab_id][0] is None)
+        print(f"  ukrycie: {(time.perf_counter() - start) * 1000:.0f} ms; zwolnione widgety: {released}, "
+              f"ukryte w pamięci: {len(window.hidden_tabs)} ({window.hidden_tabs.total / 1024 / 1024:.1f} MB)")
+
+        start = time.perf_counter()
+        for tab_id in list(window.all_tabs_data):
+            window.close_tab(tab_id)
+        app.processEvents()
+        print(f"  zamknięcie: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        window.report_leaks() # Wycieki sprawdzają testy (tests/test_tab_lifecycle.py); tu tylko raport
+        window.close()
+
+
+def bench_session_journal(edits=50000):
+    """ Koszt autozapisu w wątku GUI (na edycję i na opróżnienie bufora) oraz czas odtworzenia sesji po awarii. """
+    import shutil
+    import tempfile
+    from PyQt5.QtGui import QTextCursor
+    from main_window import MainWindow
+    from session_journal import load_session
+    app = _qt_app()
+    rng = random.Random(0)
+    print(f"session_journal ({edits} edycji)")
+
+    directory = tempfile.mkdtemp(prefix='bench_session_')
+    try:
+        path = os.path.join(directory, 'plik.py')
+        with open(path, 'w') as f:
+            f.write("def f(x):\n    return x * 2\n" * 5000)
+        window = MainWindow(populate=False)
+        journal = window.start_session_journal(os.path.join(directory, 'session'))
+        editor = window.all_tabs_data[window.open_path(path)][0]
+        _wait_for_tasks(app, window.registry)
+        document = editor.document()
+
+        samples = []
+        flush_samples = []
+        for number in range(edits):
+            cursor = QTextCursor(document)
+            cursor.setPosition(rng.randint(0, document.characterCount() - 1))
+            start = time.perf_counter()
+            if number % 3:
+                cursor.insertText(rng.choice(['a', 'b', '\n', '    ']))
+            else:
+                cursor.deletePreviousChar()
+            samples.append((time.perf_counter() - start) * 1000)
+            if number % 500 == 0:
+                start = time.perf_counter()
+                journal.flush()
+                flush_samples.append((time.perf_counter() - start) * 1000)
+        _report("edycja (z zapisem do bufora)", samples)
+        _report("opróżnienie bufora (wątek GUI)", flush_samples)
+        expected = editor.toPlainText()
+        journal.flush()
+        journal._writer.stop() # Symulacja awarii: bez końcowej migawki
+
+        start = time.perf_counter()
+        state = load_session(os.path.join(directory, 'session'))
+        print(f"  odtworzenie po awarii: {(time.perf_counter() - start) * 1000:.0f} ms, "
+              f"zgodne: {state.tabs[editor.property('tab_id')]['text'] == expected}")
+        editor.highlighter.stop_worker()
+        window.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_async_open(files=200, large_lines=300000):
+    """
+    Otwieranie wielu plików przez pulę zadań w tle: czas do wczytania wszystkich, najdłuższy przestój
+    wątku GUI i kolejność (bieżąca zakładka aktywnego panelu przed pozostałymi), w porównaniu z wczytywaniem w wątku GUI.
+    """
+    import shutil
+    import tempfile
+    from editor import EditorWidget
+    from main_window import MainWindow
+    app = _qt_app()
+    print(f"async_open ({files} plików + 1 plik {large_lines} linii)")
+
+    directory = tempfile.mkdtemp(prefix='bench_open_')
+    try:
+        paths = []
+        for number in range(files):
+            path = os.path.join(directory, f"plik_{number}.py")
+            with open(path, 'w') as f:
+                f.write("def f(x):\n    return x * 2\n" * 2000)
+            paths.append(path)
+        large_path = os.path.join(directory, 'duzy.py')
+        with open(large_path, 'w') as f:
+            f.write("    value = compute(1, 'abc def')\n" * large_lines)
+
+        start = time.perf_counter()
+        editors = [EditorWidget.from_file(path) for path in paths + [large_path]]
+        print(f"  wczytanie w wątku GUI (from_file): {(time.perf_counter() - start) * 1000:.0f} ms")
+        for editor in editors:
+            if editor.highlighter is not None:
+                editor.highlighter.stop_worker()
+        del editors
+
+        window = MainWindow(populate=False)
+        window.resize(1200, 800)
+        window.show()
+        loaded = []
+        on_loaded = window._on_editor_loaded
+        window._on_editor_loaded = lambda tab_id, editor, document: (loaded.append(tab_id), on_loaded(tab_id, editor, document))
+        start = time.perf_counter()
+        tab_ids = [window.open_path(path) for path in [large_path] + paths]
+        window.activate_tab(tab_ids[len(tab_ids) // 2]) # Bieżąca zakładka ze środka kolejki
+        print(f"  otwarcie {len(tab_ids)} zakładek (wątek GUI): {(time.perf_counter() - start) * 1000:.0f} ms")
+        stalls = []
+        while window.registry.task_runner.pending_count():
+            tick = time.perf_counter()
+            app.processEvents()
+            stalls.append((time.perf_counter() - tick) * 1000)
+            time.sleep(0.001)
+        print(f"  wszystkie wczytane: {(time.perf_counter() - start) * 1000:.0f} ms "
+              f"({window.registry.task_runner._max_workers} wątków), najdłuższy przestój GUI: {max(stalls):.1f} ms")
+        print(f"  bieżąca zakładka wczytana jako {loaded.index(tab_ids[len(tab_ids) // 2]) + 1}. z {len(loaded)}")
+        for tab_id in tab_ids:
+            editor = window.all_tabs_data[tab_id][0]
+            if editor.highlighter is not None:
+                editor.highlighter.stop_worker()
+        window.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_diff(lines=500000, changes=2000):
+    """ Porównanie dwóch plików po 500k linii: czas w procesie roboczym, przestoje wątku GUI i koszt przewinięcia. """
+    import shutil
+    import tempfile
+    from diff_view import DiffModel, DiffPane
+    app = _qt_app()
+    rng = random.Random(0)
+    print(f"diff ({lines} linii, {changes} zmian)")
+
+    directory = tempfile.mkdtemp(prefix='bench_diff_')
+    try:
+        left = [f"    value_{number} = compute({rng.randrange(1000)}, '{_random_words(rng, 2)}')" for number in range(lines)]
+        right = list(left)
+        for _ in range(changes):
+            position = rng.randrange(len(right))
+            kind = rng.random()
+            if kind < 0.33:
+                right.insert(position, "    # nowa linia")
+            elif kind < 0.66:
+                del right[position]
+            else:
+                right[position] += "  # zmieniona"
+        left_path = os.path.join(directory, 'lewy.py')
+        right_path = os.path.join(directory, 'prawy.py')
+        for path, content in ((left_path, left), (right_path, right)):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(content))
+
+        start = time.perf_counter()
+        model = DiffModel(left_path, right_path)
+        stalls = []
+        while not model.is_ready:
+            tick = time.perf_counter()
+            app.processEvents()
+            stalls.append((time.perf_counter() - tick) * 1000)
+            time.sleep(0.001)
+        print(f"  porównanie: {(time.perf_counter() - start) * 1000:.0f} ms, zmian: {len(model.hunk_rows)}, "
+              f"najdłuższy przestój GUI: {max(stalls):.1f} ms")
+
+        left_pane = DiffPane(model, 0)
+        right_pane = DiffPane(model, 1)
+        left_pane.link(right_pane)
+        for pane in (left_pane, right_pane):
+            pane.resize(700, 900)
+            pane.show()
+        app.processEvents()
+        samples = []
+        scroll = left_pane.verticalScrollBar()
+        for _ in range(200):
+            start = time.perf_counter()
+            scroll.setValue(rng.randrange(scroll.maximum()))
+            left_pane.viewport().repaint()
+            right_pane.viewport().repaint()
+            samples.append((time.perf_counter() - start) * 1000)
+        _report("przewinięcie (oba panele)", samples)
+        samples = []
+        for _ in range(100):
+            start = time.perf_counter()
+            left_pane.goto_hunk(1)
+            left_pane.viewport().repaint()
+            right_pane.viewport().repaint()
+            samples.append((time.perf_counter() - start) * 1000)
+        _report("następna zmiana", samples)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_find_in_files(files=400, lines_per_file=8000):
+    """ Przepustowość (GB/s) "znajdź w plikach" w wątku i w puli procesów, czas do pierwszych wyników i przerwania. """
+    import shutil
+    import tempfile
+    import find_results
+    from find_results import FindInFilesThread
+    from text_search import compile_query
+    app = _qt_app()
+    rng = random.Random(0)
+    directory = tempfile.mkdtemp(prefix='bench_find_')
+    try:
+        paths = []
+        for number in range(files):
+            path = os.path.join(directory, f"modul_{number}.py")
+            content = [f"    value_{line} = compute({rng.randrange(1000)}, '{_random_words(rng, 4)}')" for line in range(lines_per_file)]
+            for _ in range(5 if number % 10 == 0 else 0): # Dopasowania w co dziesiątym pliku
+                content[rng.randrange(lines_per_file)] += "  # TODO: MainWindow.relayout"
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(content))
+            paths.append(path)
+        total_bytes = sum(os.path.getsize(path) for path in paths)
+        print(f"find_in_files ({files} plików, {total_bytes / 1e6:.0f} MB, pula: {find_results.SEARCH_PROCESSES} procesów)")
+
+        thread = FindInFilesThread()
+        state = {}
+        def on_results(generation, items):
+            state.setdefault(('first', generation), time.perf_counter())
+            state[('matches', generation)] = state.get(('matches', generation), 0) + sum(len(m) for _, m in items)
+        thread.resultsFound.connect(on_results)
+        thread.searchFinished.connect(lambda generation, *stats: state.__setitem__(('done', generation), stats))
+
+        def run(query, regex, case_sensitive, use_pool):
+            find_results.POOL_MIN_FILES = 32 if use_pool else files + 1
+            start = time.perf_counter()
+            generation = thread.request(*compile_query(query, regex, case_sensitive), [], paths)
+            stalls = []
+            while ('done', generation) not in state:
+                tick = time.perf_counter()
+                app.processEvents()
+                stalls.append((time.perf_counter() - tick) * 1000)
+                time.sleep(0.001)
+            _, scanned, seconds, _ = state[('done', generation)]
+            first = (state.get(('first', generation), time.perf_counter()) - start) * 1000
+            return scanned / seconds / 1e9, first, state.get(('matches', generation), 0), max(stalls)
+
+        start = time.perf_counter()
+        run("MainWindow", False, True, True) # Uruchomienie puli i rozgrzanie pamięci podręcznej plików
+        print(f"  pierwsze wyszukiwanie (z uruchomieniem puli): {(time.perf_counter() - start) * 1000:.0f} ms")
+        for label, query, regex, case_sensitive in (
+            ("dosłowne", "MainWindow.relayout", False, True),
+            ("dosłowne, bez wielkości liter", "mainwindow.relayout", False, False),
+            ("regex", r"TODO:\s+\w+\.relayout", True, True),
+        ):
+            for use_pool in (False, True):
+                rate, first, matches, stall = run(query, regex, case_sensitive, use_pool)
+                print(f"  {label}, {'pula' if use_pool else 'wątek'}: {rate:.2f} GB/s, pierwsze wyniki po {first:.0f} ms, "
+                      f"dopasowań {matches}, najdłuższy przestój GUI {stall:.1f} ms")
+
+        # Przerwanie: czas od cancel() do zakończenia następnego (małego) wyszukiwania
+        samples = []
+        find_results.POOL_MIN_FILES = 32
+        for _ in range(10):
+            generation = thread.request(*compile_query(r"\w+\d", True, False), [], paths)
+            time.sleep(0.1)
+            start = time.perf_counter()
+            thread.cancel(generation)
+            generation = thread.request(*compile_query("MainWindow", False, True), [], paths[:1])
+            while ('done', generation) not in state:
+                app.processEvents()
+                time.sleep(0.0005)
+            samples.append((time.perf_counter() - start) * 1000)
+        _report("przerwanie i nowe wyszukiwanie", samples)
+        thread.stop()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_minimap(lines=300000):
+    """ Minimapa dużego dokumentu: pełne wygenerowanie w tle, koszt naciśnięcia klawisza i przewinięcia w wątku GUI. """
+    from PyQt5.QtGui import QTextCursor
+    from editor import EditorWidget
+    from minimap import MinimapRenderThread, tile_lines
+    app = _qt_app()
+    rng = random.Random(0)
+    print(f"minimap ({lines} linii)")
+    text = '\n'.join(f"    value_{number} = compute({rng.randrange(1000)}, '{_random_words(rng, 2)}')" for number in range(lines))
+    requested = []
+    original_request = MinimapRenderThread.request
+    def counting_request(thread, client_id, tile, *args):
+        requested.append(tile)
+        original_request(thread, client_id, tile, *args)
+    MinimapRenderThread.request = counting_request
+    try:
+        start = time.perf_counter()
+        editor = EditorWidget(text, 'bench.txt')
+        editor.resize(1000, 900)
+        print(f"  utworzenie edytora: {(time.perf_counter() - start) * 1000:.0f} ms")
+        start = time.perf_counter()
+        editor.show()
+        minimap = editor.minimap
+        stalls = []
+        deadline = time.perf_counter() + 60
+        while len(minimap._tiles) < minimap._tile_count() and time.perf_counter() < deadline:
+            tick = time.perf_counter()
+            app.processEvents()
+            stalls.append((time.perf_counter() - tick) * 1000)
+            time.sleep(0.001)
+        if len(minimap._tiles) < minimap._tile_count():
+            raise SystemExit(f"Minimapa niekompletna po 60 s: {len(minimap._tiles)} z {minimap._tile_count()} kafli")
+        print(f"  pełna minimapa: {(time.perf_counter() - start) * 1000:.0f} ms ({minimap._tile_count()} kafli po "
+              f"{tile_lines(minimap._level)} linii), najdłuższy przestój GUI: {max(stalls):.1f} ms")
+
+        def settle():
+            # Zlecenia po edycji są opóźnione o RERENDER_DELAY_MS - czekamy, aż kafle dojdą
+            deadline = time.perf_counter() + 2
+            while time.perf_counter() < deadline and (minimap._request_timer.isActive() or any(
+                    minimap._tiles.get(tile, (None,))[0] != version for tile, version in minimap._versions.items()
+                    if tile < minimap._tile_count())):
+                app.processEvents()
+                time.sleep(0.001)
+
+        for label, insert in (("znak w linii", "x"), ("nowa linia", "\n")):
+            samples = []
+            requested.clear()
+            for _ in range(50):
+                cursor = QTextCursor(editor.document().findBlockByNumber(rng.randrange(lines)))
+                start = time.perf_counter()
+                cursor.insertText(insert)
+                samples.append((time.perf_counter() - start) * 1000)
+                settle()
+            _report(f"{label} (wątek GUI)", samples)
+            print(f"    kafli przerenderowanych na edycję: {len(requested) / 50:.1f} z {minimap._tile_count()}")
+
+        samples = []
+        painted = [] # (czas rysowania minimapy ms, odświeżone piksele / wszystkie)
+        original_paint = minimap.paintEvent
+        def measured_paint(event):
+            tick = time.perf_counter()
+            original_paint(event)
+            area = sum(rect.width() * rect.height() for rect in event.region().rects())
+            painted.append(((time.perf_counter() - tick) * 1000, area / (minimap.width() * minimap.height())))
+        minimap.paintEvent = measured_paint
+        scroll = editor.verticalScrollBar()
+        for _ in range(200):
+            start = time.perf_counter()
+            scroll.setValue(rng.randrange(scroll.maximum()))
+            app.processEvents()
+            samples.append((time.perf_counter() - start) * 1000)
+        _report("przewinięcie (edytor i minimapa)", samples)
+        _report("rysowanie minimapy przy przewinięciu", [ms for ms, _ in painted])
+        print(f"    odświeżana część minimapy: średnio {statistics.mean(share for _, share in painted) * 100:.1f}%")
+        editor.close()
+    finally:
+        MinimapRenderThread.request = original_request
+
+
+def bench_image_view(size=20000):
+    """
+    Podgląd obrazu JPEG size x size: czas do pierwszego podglądu i zbudowania piramidy, przestoje wątku GUI,
+    koszt przesuwania i powiększania oraz pamięć (kafle w pamięci podręcznej i RSS procesu).
+    """
+    import shutil
+    import tempfile
+    from PyQt5.QtCore import QPoint
+    from PyQt5.QtGui import QImage, QPainter, QColor, QLinearGradient, QBrush
+    import image_view
+    from image_view import ImageView, TILE_CACHE_BYTES
+    from task_runner import TaskRunner
+    app = _qt_app()
+    runner = TaskRunner()
+    rng = random.Random(0)
+    print(f"image_view (JPEG {size}x{size})")
+
+    def rss_mb():
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+    def wait(condition, timeout=120):
+        stalls = []
+        deadline = time.perf_counter() + timeout
+        while not condition() and time.perf_counter() < deadline:
+            tick = time.perf_counter()
+            app.processEvents()
+            stalls.append((time.perf_counter() - tick) * 1000)
+            time.sleep(0.001)
+        return stalls
+
+    directory = tempfile.mkdtemp(prefix='bench_image_')
+    try:
+        path = os.path.join(directory, 'duzy.jpg')
+        image = QImage(size, size, QImage.Format_RGB32)
+        painter = QPainter(image)
+        gradient = QLinearGradient(0, 0, size, size)
+        gradient.setColorAt(0, QColor(200, 40, 40))
+        gradient.setColorAt(1, QColor(40, 40, 200))
+        painter.fillRect(0, 0, size, size, QBrush(gradient))
+        painter.setPen(QColor(255, 255, 255))
+        for offset in range(0, size, 250):
+            painter.drawLine(offset, 0, offset, size)
+            painter.drawLine(0, offset, size, offset)
+        painter.end()
+        image.save(path, quality=85)
+        del image
+        rss_before = rss_mb()
+
+        start = time.perf_counter()
+        view = ImageView(path, runner)
+        view.resize(1200, 900)
+        view.show()
+        pyramid = view._pyramid
+        stalls = wait(lambda: view._cache)
+        print(f"  pierwszy podgląd: {(time.perf_counter() - start) * 1000:.0f} ms")
+        stalls += wait(lambda: pyramid.built)
+        print(f"  piramida zbudowana: {(time.perf_counter() - start) * 1000:.0f} ms ({view._levels} poziomów), "
+              f"najdłuższy przestój GUI: {max(stalls):.1f} ms")
+
+        def tiles_missing(view):
+            rect = view.viewport().rect()
+            return [key for key in view._tiles_in(rect, view._level()) if key not in view._cache]
+
+        view.set_scale(1.0)
+        wait(lambda: not tiles_missing(view))
+        samples = []
+        incomplete = 0
+        cache_peak = 0
+        for _ in range(300):
+            # Przeciąganie: krok 40 pikseli w losowym kierunku
+            start = time.perf_counter()
+            view.horizontalScrollBar().setValue(view.horizontalScrollBar().value() + rng.choice((-40, 40)))
+            view.verticalScrollBar().setValue(view.verticalScrollBar().value() + rng.choice((-40, 40)))
+            app.processEvents()
+            samples.append((time.perf_counter() - start) * 1000)
+            incomplete += bool(tiles_missing(view))
+            cache_peak = max(cache_peak, view._cache_bytes)
+        _report("przesunięcie o 40 px (100%)", samples)
+        print(f"    klatek z kaflem zastępczym: {incomplete} z {len(samples)}")
+
+        samples = []
+        ready = []
+        for step in range(60):
+            anchor = QPoint(rng.randrange(view.viewport().width()), rng.randrange(view.viewport().height()))
+            start = time.perf_counter()
+            view.zoom(1.25 if step % 20 < 10 else 0.8, anchor)
+            app.processEvents()
+            samples.append((time.perf_counter() - start) * 1000)
+            wait(lambda: not tiles_missing(view), timeout=5)
+            ready.append((time.perf_counter() - start) * 1000)
+            cache_peak = max(cache_peak, view._cache_bytes)
+        _report("powiększenie (wątek GUI)", samples)
+        _report("powiększenie do kompletu ostrych kafli", ready)
+        print(f"  pamięć kafli: maks. {cache_peak / 2 ** 20:.0f} MB (limit {TILE_CACHE_BYTES / 2 ** 20:.0f} MB), "
+              f"przyrost RSS procesu: {rss_mb() - rss_before:.0f} MB")
+
+        # Druga zakładka tego samego pliku i odtworzenie zwolnionej zakładki - bez ponownej budowy piramidy
+        for label, close_first in (("druga zakładka pliku", False), ("odtworzenie po zwolnieniu", True)):
+            if close_first:
+                view.stop_worker()
+                view.close()
+            start = time.perf_counter()
+            other = ImageView(path, runner)
+            other.resize(1200, 900)
+            other.show()
+            wait(lambda: other._image_size is not None and not tiles_missing(other))
+            print(f"  {label}: {(time.perf_counter() - start) * 1000:.0f} ms do kompletu kafli, "
+                  f"ta sama piramida: {'tak' if other._pyramid is pyramid else 'NIE'}")
+            if not close_first:
+                other.stop_worker()
+                other.close()
+            view = other
+        view.stop_worker()
+        view.close()
+        print(f"  pliki piramid bez widoków: {sum(p.size_bytes() for p in image_view._pyramids.values()) / 2 ** 20:.0f} MB "
+              f"(limit {image_view.PYRAMID_DISK_BUDGET / 2 ** 20:.0f} MB)")
+
+        # Zamknięcie zakładki w trakcie budowy nie czeka na pulę (krok dekodowania pasa kończy się w tle),
+        # a niedokończona piramida bez widoków jest usuwana. Zmiana mtime - nowa piramida
+        os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        view = ImageView(path, runner)
+        view.show()
+        wait(lambda: view._cache)
+        pyramid = view._pyramid
+        start = time.perf_counter()
+        view.stop_worker()
+        view.deleteLater()
+        print(f"  zamknięcie w trakcie budowy (wątek GUI): {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"piramida usunięta: {'tak' if pyramid not in image_view._pyramids.values() else 'NIE'}")
+        del view
+        wait(lambda: not runner.pending_count() and not pyramid._running)
+        runner.stop()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_layout_replay(operations=600, tabs=60):
+    """ Nagranie losowych operacji układu (podział, przeniesienie, ukrycie, przywrócenie) i odtworzenie bez przerw. """
+    import tempfile
+    from PyQt5.QtCore import Qt, QPoint
+    from main_window import MainWindow
+    from layout_recorder import LayoutReplayer
+    app = _qt_app()
+    rng = random.Random(0)
+    print(f"layout_replay ({operations} operacji, {tabs} zakładek)")
+
+    window = MainWindow(populate=False)
+    window.show()
+    registry = window.registry
+    for number in range(tabs):
+        window.add_new_tab(title=f"Zakładka {number}")
+    app.processEvents()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "uklad.jsonl")
+        window.start_layout_recording(path)
+        directions = ('left', 'right', 'up', 'down')
+        for _ in range(operations):
+            panels = registry.all_tab_widgets()
+            visible = [tab_id for tab_id, (content, _) in registry.all_tabs_data.items()
+                       if content is not None and content in registry.content_widget_to_tab_widget]
+            hidden = [tab_id for tab_id in registry.all_tabs_data if tab_id not in visible]
+            roll = rng.random()
+            if roll < 0.3 and len(panels) < 24:
+                # Podział jak upuszczenie na krawędź panelu: zakładka z panelu, który nie zostanie pusty
+                crowded = [tab_id for tab_id in visible
+                           if registry.content_widget_to_tab_widget[registry.all_tabs_data[tab_id][0]].total_count() > 1]
+                if crowded:
+                    content, title = registry.all_tabs_data[rng.choice(crowded)]
+                    registry.content_widget_to_tab_widget.pop(content).discard_tab(content)
+                    target = rng.choice(panels)
+                    if rng.random() < 0.05 and len(registry.windows) < 3:
+                        target.window().tear_off_tab(content, title, QPoint(100, 100))
+                    else:
+                        target.window().split_with_tab(target, content, title,
+                                                       rng.choice((Qt.Horizontal, Qt.Vertical)), rng.random() < 0.5)
+            elif roll < 0.6:
+                source = rng.choice(panels)
+                source.setFocus()
+                app.processEvents()
+                source.window().move_current_tab_to_neighbour(rng.choice(directions))
+            elif roll < 0.8 and visible:
+                window.toggle_or_split_tab(rng.choice(visible))
+            elif hidden:
+                target = rng.choice(panels) if panels else None
+                window.toggle_or_split_tab(rng.choice(hidden), target_tab_widget=target)
+            app.processEvents()
+        recorded = registry.layout_recorder.count
+        window.stop_layout_recording()
+        with open(path, encoding='utf-8') as f:
+            size = len(f.read().encode('utf-8'))
+        print(f"  nagranie: {recorded} operacji, {size / 1024:.1f} KB, "
+              f"{len(registry.windows)} okien, {len(registry.all_tab_widgets())} paneli")
+        for other in list(registry.windows):
+            other.close()
+        app.processEvents()
+
+        replayer = LayoutReplayer.from_file(path)
+        final_hash, expected = replayer.run()
+        replayer.report(final_hash, expected)
+        replayer.close()
+        app.processEvents()
+        if final_hash != expected:
+            raise SystemExit("Odtworzony układ różni się od nagranego")
+
+
+def bench_theme(panels=64):
+    """ Koszt paneli przy wielu podziałach (liczba widgetów) i przełączenia motywu w jednym przejściu. """
+    from PyQt5.QtCore import Qt
+    from main_window import MainWindow
+    from tab_widget import DropIndicator
+    from theme import ThemeManager
+    app = _qt_app()
+    print(f"theme ({panels} paneli)")
+
+    window = MainWindow(populate=False)
+    window.resize(1600, 1200)
+    window.show()
+    start = time.perf_counter()
+    for number in range(panels):
+        tab_id, content = window.add_new_tab(title=f"Zakładka {number}")
+        if number:
+            title = window.all_tabs_data[tab_id][1]
+            source = window.content_widget_to_tab_widget.pop(content)
+            source.discard_tab(content)
+            window.split_with_tab(window.find_first_tab_widget(), content, title,
+                                  Qt.Horizontal if number % 2 else Qt.Vertical, False)
+        app.processEvents()
+    print(f"  {panels} podziałów: {(time.perf_counter() - start) * 1000:.0f} ms")
+    indicators = sum(isinstance(widget, DropIndicator) for widget in app.allWidgets())
+    print(f"  widgetów: {len(app.allWidgets())}, wskaźników upuszczania: {indicators}")
+
+    manager = ThemeManager.instance()
+    samples = []
+    for step in range(10):
+        start = time.perf_counter()
+        manager.apply('dark' if step % 2 == 0 else 'light')
+        app.processEvents()
+        samples.append((time.perf_counter() - start) * 1000)
+    _report("przełączenie motywu (z przerysowaniem)", samples)
+    window.close()
+
+
+def bench_layout_grid(rows=6, columns=6, tabs=200):
+    """ Siatka paneli rows x columns z tabs zakładkami: kolejne podziały vs arrange_grid (jedno złożenie drzewa). """
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QSplitter
+    from main_window import MainWindow
+    app = _qt_app()
+    rng = random.Random(0)
+    print(f"layout_grid ({rows}x{columns} paneli, {tabs} zakładek)")
+
+    def new_window():
+        window = MainWindow(populate=False)
+        window.resize(1600, 1200)
+        window.show()
+        for number in range(tabs):
+            window.add_new_tab(title=f"Zakładka {number}")
+        app.processEvents()
+        return window
+
+    def split_off(window, target, orientation):
+        # Jak upuszczenie zakładki na krawędź panelu: zakładka z pierwszego panelu trafia do nowego panelu obok target
+        donor = window.find_first_tab_widget()
+        content = donor.widget(donor.count() - 1)
+        title = donor.tab_title(content)
+        window.content_widget_to_tab_widget.pop(content)
+        donor.discard_tab(content)
+        new_panel = window.split_with_tab(target, content, title, orientation, False)
+        app.processEvents()
+        return new_panel
+
+    # Dotychczas: podziały jeden po drugim (kolumny, potem wiersze w każdej kolumnie)
+    window = new_window()
+    start = time.perf_counter()
+    column_panels = [window.find_first_tab_widget()]
+    for _ in range(columns - 1):
+        column_panels.append(split_off(window, column_panels[-1], Qt.Horizontal))
+    for panel in column_panels:
+        for _ in range(rows - 1):
+            panel = split_off(window, panel, Qt.Vertical)
+    print(f"  {rows * columns - 1} kolejnych podziałów: {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"paneli: {len(window.find_all_tab_widgets())}")
+    window.close()
+    app.processEvents()
+
+    window = new_window()
+    start = time.perf_counter()
+    window.arrange_grid(rows, columns)
+    app.processEvents()
+    print(f"  arrange_grid z jednego panelu: {(time.perf_counter() - start) * 1000:.0f} ms")
+    panels = window.find_all_tab_widgets()
+    counts = [panel.total_count() for panel in panels]
+    widths = {panel.width() for panel in panels}
+    heights = {panel.height() for panel in panels}
+    print(f"    paneli: {len(panels)}, zakładek na panel: {min(counts)}-{max(counts)}, "
+          f"szerokości: {min(widths)}-{max(widths)} px, wysokości: {min(heights)}-{max(heights)} px")
+    if len(panels) != rows * columns or sum(counts) != tabs:
+        raise SystemExit("Niepoprawna siatka")
+
+    samples = []
+    for _ in range(10):
+        start = time.perf_counter()
+        window.arrange_grid(rows, columns)
+        app.processEvents()
+        samples.append((time.perf_counter() - start) * 1000)
+    _report("ponowne arrange_grid (istniejące panele)", samples)
+
+    samples = []
+    splitters = window.centralWidget().findChildren(QSplitter) + [window.centralWidget()]
+    for _ in range(10):
+        for splitter in splitters:
+            splitter.setSizes([rng.randint(50, 400) for _ in range(splitter.count())])
+        app.processEvents()
+        start = time.perf_counter()
+        window.rebalance_layout()
+        app.processEvents()
+        samples.append((time.perf_counter() - start) * 1000)
+    _report("wyrównanie rozmiarów", samples)
+
+    samples = []
+    for _ in range(10):
+        # Wszystkie zakładki w pierwszym panelu - rozłożenie przenosi prawie każdą
+        first = panels[0]
+        for panel in panels[1:]:
+            for content in panel.all_tab_widgets():
+                title = panel.tab_title(content)
+                panel.discard_tab(content)
+                first.addTab(content, title)
+                window.content_widget_to_tab_widget[content] = first
+        app.processEvents()
+        start = time.perf_counter()
+        window.distribute_tabs_round_robin()
+        app.processEvents()
+        samples.append((time.perf_counter() - start) * 1000)
+    _report("rozłożenie zakładek round-robin", samples)
+    window.close()
+
+
+BENCHMARKS = {
+    'quick_open': bench_quick_open,
+    'project_index': bench_project_index,
+    'highlight': bench_highlight,
+    'tab_lifecycle': bench_tab_lifecycle,
+    'session_journal': bench_session_journal,
+    'async_open': bench_async_open,
+    'diff': bench_diff,
+    'find_in_files': bench_find_in_files,
+    'minimap': bench_minimap,
+    'image_view': bench_image_view,
+    'layout_replay': bench_layout_replay,
+    'theme': bench_theme,
+    'layout_grid': bench_layout_grid,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for bench_name in names:
+        if bench_name not in BENCHMARKS:
+            print(f"Nieznany benchmark: {bench_name}. Dostępne: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        BENCHMARKS[bench_name]()
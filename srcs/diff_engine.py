@@ -0,0 +1,213 @@
+# diff_engine.py
+"""
+Porównywanie sekwencji linii.
+Myers w pamięci liniowej (bisekcja "środkowego węża") dla fragmentów między kotwicami,
+a kotwice to linie występujące dokładnie raz w obu sekwencjach (najdłuższy rosnący podciąg, jak w patience diff) -
+dzięki nim duże pliki z rozproszonymi zmianami dzielą się na małe, niezależne fragmenty.
+Moduł nie zależy od Qt - jest uruchamiany także w osobnym procesie.
+"""
+from bisect import bisect_left
+from collections import Counter
+
+# Fragmenty mniejsze niż tyle linii (łącznie) porównujemy od razu algorytmem Myersa
+ANCHOR_MIN_LINES = 64
+# Limit kosztu (D) bisekcji dla fragmentu bez kotwic; powyżej fragment jest raportowany jako zamiana
+MAX_EDIT_COST = 1000
+
+def read_lines(file_path):
+    """ Czyta plik jako listę linii (tak samo jak EditorWidget.from_file). """
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read().split('\n')
+
+def _unique_anchors(a, b, alo, ahi, blo, bhi):
+    """ Pary (i, j) linii unikalnych w obu zakresach, tworzące najdłuższy rosnący podciąg po j. """
+    unique = {line for line, count in Counter(a[alo:ahi]).items() if count == 1}
+    unique.intersection_update([line for line, count in Counter(b[blo:bhi]).items() if count == 1])
+    if not unique:
+        return []
+    positions_b = {b[j]: j for j in range(blo, bhi) if b[j] in unique}
+    pairs = [(i, positions_b[a[i]]) for i in range(alo, ahi) if a[i] in unique]
+
+    # Najdłuższy rosnący podciąg (patience sorting) - O(k log k)
+    tails = [] # j ostatniego elementu najlepszego ciągu danej długości
+    tail_indexes = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        if tails and j > tails[-1]:
+            # Najczęstszy przypadek (kotwice w tej samej kolejności) - bez wyszukiwania binarnego
+            previous[index] = tail_indexes[-1]
+            tails.append(j)
+            tail_indexes.append(index)
+            continue
+        length = bisect_left(tails, j)
+        if length == len(tails):
+            tails.append(j)
+            tail_indexes.append(index)
+        else:
+            tails[length] = j
+            tail_indexes[length] = index
+        previous[index] = tail_indexes[length - 1] if length else -1
+    anchors = []
+    index = tail_indexes[-1]
+    while index != -1:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+def _bisect(a, b, alo, ahi, blo, bhi, max_cost=MAX_EDIT_COST):
+    """
+    Znajduje punkt podziału (x, y) leżący na najkrótszej ścieżce edycji (Myers, pamięć O(N+M)).
+    Zwraca None, jeśli koszt przekracza max_cost (fragment traktujemy wtedy jako zamianę w całości).
+    """
+    n = ahi - alo
+    m = bhi - blo
+    max_d = (n + m + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d + 2
+    v1 = [-1] * v_length
+    v1[v_offset + 1] = 0
+    v2 = v1[:]
+    delta = n - m
+    front = delta % 2 != 0 # Przy nieparzystej delcie ścieżki spotykają się w przebiegu do przodu
+    k1start = k1end = k2start = k2end = 0
+    for d in range(min(max_d, max_cost)):
+        # Przebieg do przodu
+        for k1 in range(-d + k1start, d + 1 - k1end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[alo + x1] == b[blo + y1]:
+                x1 += 1
+                y1 += 1
+            v1[k1_offset] = x1
+            if x1 > n:
+                k1end += 2 # Poza prawą krawędzią
+            elif y1 > m:
+                k1start += 2 # Poza dolną krawędzią
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and v2[k2_offset] != -1:
+                    if x1 >= n - v2[k2_offset]:
+                        return alo + x1, blo + y1
+        # Przebieg od końca
+        for k2 in range(-d + k2start, d + 1 - k2end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[ahi - 1 - x2] == b[bhi - 1 - y2]:
+                x2 += 1
+                y2 += 1
+            v2[k2_offset] = x2
+            if x2 > n:
+                k2end += 2
+            elif y2 > m:
+                k2start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    y1 = v_offset + x1 - k1_offset
+                    if x1 >= n - x2:
+                        return alo + x1, blo + y1
+    return None
+
+def matching_blocks(a, b):
+    """ Zwraca posortowaną listę (i, j, długość) wspólnych bloków linii a i b. """
+    blocks = []
+    stack = [(0, len(a), 0, len(b))] # Jawny stos zamiast rekurencji - głębokość zależy od liczby zmian
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        # Wspólny początek i koniec
+        start_a, start_b = alo, blo
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            alo += 1
+            blo += 1
+        if alo > start_a:
+            blocks.append((start_a, start_b, alo - start_a))
+        end_a = ahi
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+        if ahi < end_a:
+            blocks.append((ahi, bhi, end_a - ahi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        if (ahi - alo) + (bhi - blo) >= ANCHOR_MIN_LINES:
+            anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+            if anchors:
+                run_i, run_j, run_size = anchors[0][0], anchors[0][1], 0
+                for i, j in anchors:
+                    if i == run_i + run_size and j == run_j + run_size:
+                        run_size += 1 # Kolejne kotwice tworzą jeden blok
+                        continue
+                    blocks.append((run_i, run_j, run_size))
+                    previous_a, previous_b = run_i + run_size, run_j + run_size
+                    if previous_a < i or previous_b < j:
+                        stack.append((previous_a, i, previous_b, j))
+                    run_i, run_j, run_size = i, j, 1
+                blocks.append((run_i, run_j, run_size))
+                if anchors[0][0] > alo or anchors[0][1] > blo:
+                    stack.append((alo, anchors[0][0], blo, anchors[0][1]))
+                stack.append((run_i + run_size, ahi, run_j + run_size, bhi))
+                continue
+
+        split = _bisect(a, b, alo, ahi, blo, bhi)
+        if split is None or split in ((alo, blo), (ahi, bhi)):
+            continue # Brak wspólnych linii (lub zbyt kosztowne porównanie) - zamiana
+        x, y = split
+        stack.append((x, ahi, y, bhi))
+        stack.append((alo, x, blo, y))
+
+    # Posortuj i połącz przylegające bloki
+    blocks.sort()
+    merged = []
+    for i, j, size in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+        else:
+            merged.append((i, j, size))
+    return merged
+
+def diff_lines(a, b):
+    """
+    Porównuje dwie listy linii. Zwraca opkody jak difflib.SequenceMatcher.get_opcodes():
+    (tag, i1, i2, j1, j2), tag in 'equal', 'replace', 'delete', 'insert'.
+    """
+    opcodes = []
+    i = j = 0
+    for block_i, block_j, size in matching_blocks(a, b) + [(len(a), len(b), 0)]:
+        if i < block_i and j < block_j:
+            opcodes.append(('replace', i, block_i, j, block_j))
+        elif i < block_i:
+            opcodes.append(('delete', i, block_i, j, j))
+        elif j < block_j:
+            opcodes.append(('insert', i, i, j, block_j))
+        if size:
+            opcodes.append(('equal', block_i, block_i + size, block_j, block_j + size))
+        i, j = block_i + size, block_j + size
+    return opcodes
+
+def diff_files(left_path, right_path):
+    return diff_lines(read_lines(left_path), read_lines(right_path))
+
+def diff_process_main(left, right, connection):
+    """
+    Punkt wejścia procesu roboczego: left/right to ścieżki plików lub listy linii.
+    Wynik ('ok', opkody) lub ('error', komunikat) wysyłany jest przez connection (multiprocessing.Pipe).
+    """
+    try:
+        a = read_lines(left) if isinstance(left, str) else left
+        b = read_lines(right) if isinstance(right, str) else right
+        connection.send(('ok', diff_lines(a, b)))
+    except Exception as e:
+        connection.send(('error', str(e)))
+    finally:
+        connection.close()
@@ -0,0 +1,274 @@
+# diff_view.py
+import multiprocessing
+from bisect import bisect_right
+from PyQt5.QtWidgets import QAbstractScrollArea, QApplication
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal
+from PyQt5.QtGui import QPainter, QFontDatabase
+from diff_engine import diff_lines, diff_process_main, read_lines
+from theme import ThemeManager
+
+# Od tylu linii (łącznie) porównanie liczone jest w osobnym procesie - czysty Python trzymałby GIL
+# i zacinał wątek GUI; proces można też przerwać natychmiast (terminate)
+PROCESS_MIN_LINES = 20000
+# Tło wierszy: (lewa strona, prawa strona) według rodzaju zmiany - klucze kolorów motywu (theme.py)
+DIFF_COLOR_KEYS = {
+    'delete': ('diff_delete', None),
+    'insert': (None, 'diff_insert'),
+    'replace': ('diff_replace_left', 'diff_replace_right'),
+}
+
+class DiffWorker(QThread):
+    """
+    Wczytuje obie strony i liczy opkody porównania. Małe dane porównuje w wątku,
+    duże w procesie roboczym (multiprocessing, 'spawn'), do którego przekazuje same ścieżki plików.
+    """
+    # object, nie list - list w sygnale to QVariantList i kopia każdego elementu przy przejściu między wątkami
+    diffReady = pyqtSignal(object, object, object, int) # lewe linie, prawe linie, opkody, najdłuższa linia
+    diffFailed = pyqtSignal(str)
+
+    def __init__(self, left, right, parent=None):
+        super().__init__(parent)
+        self._left = left # ścieżka pliku lub lista linii
+        self._right = right
+
+    def run(self):
+        try:
+            a = read_lines(self._left) if isinstance(self._left, str) else self._left
+            b = read_lines(self._right) if isinstance(self._right, str) else self._right
+        except OSError as e:
+            self.diffFailed.emit(str(e))
+            return
+        if len(a) + len(b) < PROCESS_MIN_LINES:
+            opcodes = diff_lines(a, b)
+        else:
+            opcodes = self._diff_in_process()
+            if opcodes is None:
+                return
+        longest = max(max(map(len, a), default=0), max(map(len, b), default=0))
+        if not self.isInterruptionRequested():
+            self.diffReady.emit(a, b, opcodes, longest)
+
+    def _diff_in_process(self):
+        context = multiprocessing.get_context('spawn')
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=diff_process_main, args=(self._left, self._right, sender), daemon=True)
+        try:
+            process.start()
+        except (OSError, RuntimeError) as e:
+            receiver.close()
+            sender.close()
+            self.diffFailed.emit(f"Nie można uruchomić procesu porównania: {e}")
+            return None
+        sender.close()
+        try:
+            while not receiver.poll(0.05):
+                if self.isInterruptionRequested():
+                    process.terminate()
+                    return None
+            status, result = receiver.recv()
+        except (EOFError, OSError):
+            status, result = 'error', "Proces porównania zakończył się nieoczekiwanie"
+        finally:
+            receiver.close()
+            process.join()
+        if status != 'ok':
+            self.diffFailed.emit(result)
+            return None
+        return result
+
+
+class DiffModel(QObject):
+    """
+    Wynik porównania wspólny dla obu paneli. Wiersze widoku są wyrównane: opkod 'equal' daje
+    tyle wierszy, ile linii, a zmiana - max(linie lewe, linie prawe). Zamiast listy wszystkich wierszy
+    trzymamy tylko początek każdego opkodu, więc odczyt widocznych wierszy to jedno bisect.
+    """
+    ready = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, left, right, parent=None):
+        super().__init__(parent)
+        self.left_lines = []
+        self.right_lines = []
+        self.opcodes = []
+        self.row_count = 0
+        self.longest_line = 0
+        self.hunk_rows = [] # pierwszy wiersz każdej zmiany
+        self.is_ready = False
+        self._row_starts = []
+        self._panes = set()
+        self._worker = DiffWorker(left, right, self)
+        self._worker.diffReady.connect(self._on_diff_ready)
+        self._worker.diffFailed.connect(self.failed)
+        self._worker.start()
+        QApplication.instance().aboutToQuit.connect(self.stop_worker)
+
+    def _on_diff_ready(self, left_lines, right_lines, opcodes, longest_line):
+        self.left_lines = left_lines
+        self.right_lines = right_lines
+        self.opcodes = opcodes
+        self.longest_line = longest_line
+        row = 0
+        for tag, i1, i2, j1, j2 in opcodes:
+            self._row_starts.append(row)
+            if tag != 'equal':
+                self.hunk_rows.append(row)
+            row += max(i2 - i1, j2 - j1)
+        self.row_count = row
+        self.is_ready = True
+        self.ready.emit()
+
+    def rows(self, first, count):
+        """ Zwraca listę (tag, lewa linia lub None, prawa linia lub None) dla wierszy [first, first + count). """
+        result = []
+        if not self.opcodes or count <= 0:
+            return result
+        index = bisect_right(self._row_starts, first) - 1
+        row = first
+        end = min(first + count, self.row_count)
+        while row < end and index < len(self.opcodes):
+            tag, i1, i2, j1, j2 = self.opcodes[index]
+            offset = row - self._row_starts[index]
+            rows_in_opcode = max(i2 - i1, j2 - j1)
+            while offset < rows_in_opcode and row < end:
+                left = i1 + offset if offset < i2 - i1 else None
+                right = j1 + offset if offset < j2 - j1 else None
+                result.append((tag, left, right))
+                offset += 1
+                row += 1
+            index += 1
+        return result
+
+    def attach(self, pane):
+        self._panes.add(pane)
+
+    def release(self, pane):
+        """ Panel zamknięty - gdy nie został żaden, przerywamy liczenie. """
+        self._panes.discard(pane)
+        if not self._panes:
+            self.stop_worker()
+
+    def stop_worker(self):
+        if self._worker.isRunning():
+            self._worker.requestInterruption()
+            self._worker.wait()
+
+
+class DiffPane(QAbstractScrollArea):
+    """
+    Jedna strona porównania (side 0 = lewa, 1 = prawa). Rysuje tylko wiersze mieszczące się w widoku,
+    więc koszt przewijania nie zależy od długości plików. Panele połączone przez link() przewijają się razem.
+    """
+    def __init__(self, model, side, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.side = side
+        self._message = "Porównywanie..."
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.setFocusPolicy(Qt.StrongFocus)
+        model.attach(self)
+        model.ready.connect(self._on_model_ready)
+        model.failed.connect(self._on_model_failed)
+        if model.is_ready:
+            self._on_model_ready()
+
+    def link(self, other):
+        """ Synchronizuje przewijanie z drugim panelem (wiersze obu stron są wyrównane). """
+        for own, theirs in ((self.verticalScrollBar(), other.verticalScrollBar()),
+                            (self.horizontalScrollBar(), other.horizontalScrollBar())):
+            own.valueChanged.connect(theirs.setValue)
+            theirs.valueChanged.connect(own.setValue)
+
+    def stop_worker(self):
+        self.model.release(self)
+
+    def _on_model_ready(self):
+        self._message = None
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def _on_model_failed(self, message):
+        self._message = f"Nie można porównać: {message}"
+        self.viewport().update()
+
+    def _line_height(self):
+        return self.fontMetrics().lineSpacing()
+
+    def _gutter_width(self):
+        count = len(self.model.right_lines if self.side else self.model.left_lines)
+        return self.fontMetrics().horizontalAdvance('9') * (len(str(count)) + 1) + 6
+
+    def _visible_rows(self):
+        return max(1, self.viewport().height() // self._line_height())
+
+    def _update_scrollbars(self):
+        visible = self._visible_rows()
+        scroll = self.verticalScrollBar()
+        scroll.setRange(0, max(0, self.model.row_count - visible))
+        scroll.setPageStep(visible)
+        char_width = self.fontMetrics().horizontalAdvance('x')
+        content_width = self.model.longest_line * char_width + self._gutter_width()
+        self.horizontalScrollBar().setRange(0, max(0, content_width - self.viewport().width()))
+        self.horizontalScrollBar().setPageStep(self.viewport().width())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        if self._message is not None:
+            painter.drawText(self.viewport().rect(), Qt.AlignCenter, self._message)
+            return
+        model = self.model
+        lines = model.right_lines if self.side else model.left_lines
+        line_height = self._line_height()
+        ascent = self.fontMetrics().ascent()
+        width = self.viewport().width()
+        gutter = self._gutter_width()
+        text_x = gutter - self.horizontalScrollBar().value()
+        first = self.verticalScrollBar().value()
+        theme = ThemeManager.instance()
+        filler = theme.color('diff_filler') # Wiersz bez odpowiednika po danej stronie
+        gutter_color = theme.color('diff_gutter')
+
+        for offset, (tag, left, right) in enumerate(model.rows(first, self._visible_rows() + 1)):
+            y = offset * line_height
+            line_number = right if self.side else left
+            if line_number is None:
+                painter.fillRect(0, y, width, line_height, filler)
+                continue
+            color_key = DIFF_COLOR_KEYS.get(tag, (None, None))[self.side]
+            if color_key is not None:
+                painter.fillRect(0, y, width, line_height, theme.color(color_key))
+            painter.setClipRect(gutter, y, width - gutter, line_height)
+            painter.drawText(text_x, y + ascent, lines[line_number].replace('\t', '    '))
+            painter.setClipping(False)
+            painter.setPen(gutter_color)
+            painter.drawText(2, y + ascent, str(line_number + 1))
+            painter.setPen(self.palette().text().color())
+
+    def keyPressEvent(self, event):
+        # F7 / Shift+F7 - następna / poprzednia zmiana
+        if event.key() == Qt.Key_F7:
+            self.goto_hunk(-1 if event.modifiers() & Qt.ShiftModifier else 1)
+        else:
+            super().keyPressEvent(event)
+
+    def goto_hunk(self, direction):
+        """ Przewija do następnej (1) lub poprzedniej (-1) zmiany. """
+        hunks = self.model.hunk_rows
+        if not hunks:
+            return
+        scroll = self.verticalScrollBar()
+        current = scroll.value() + 2 # Zmiana jest pokazywana z dwoma wierszami kontekstu powyżej
+        if direction > 0:
+            index = bisect_right(hunks, current)
+            target = hunks[index] if index < len(hunks) else hunks[-1]
+        else:
+            index = bisect_right(hunks, current - 1) - 1
+            target = hunks[index] if index >= 0 else hunks[0]
+        scroll.setValue(target - 2)
@@ -0,0 +1,138 @@
+# editor.py
+from PyQt5.QtWidgets import QPlainTextEdit, QPlainTextDocumentLayout
+from PyQt5.QtGui import QFontDatabase, QTextDocument, QTextCursor
+from PyQt5.QtCore import QCoreApplication
+from highlighter import IncrementalHighlighter, lexer_for_path, tokenize_lines
+from minimap import Minimap, MINIMAP_WIDTH
+
+# Plik czytany kawałkami tej wielkości (w znakach), by wczytywanie w tle dało się przerwać
+READ_CHUNK_CHARS = 4 * 1024 * 1024
+
+def read_text_file(file_path, should_stop=None):
+    """ Czyta plik tekstowy (UTF-8, błędne bajty zastępowane). Zwraca None, jeśli przerwano. Rzuca OSError. """
+    chunks = []
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        while True:
+            chunk = f.read(READ_CHUNK_CHARS)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if should_stop is not None and should_stop():
+                return None
+    return ''.join(chunks)
+
+def load_document(file_path, font=None, should_stop=None):
+    """
+    Zadanie dla TaskRunner: wczytuje plik do QTextDocument gotowego dla EditorWidget.finish_loading
+    i tokenizuje go dla podświetlania. Budowa dokumentu i tokenizacja (największe koszty otwarcia pliku)
+    odbywają się w wątku roboczym, a gotowy dokument jest przenoszony do wątku GUI.
+    Zwraca (dokument, tokeny lub None, linie dla minimapy) albo None, jeśli przerwano.
+    """
+    text = read_text_file(file_path, should_stop)
+    if text is None:
+        return None
+    tokens = None
+    lines = text.split('\n')
+    lexer = lexer_for_path(file_path)
+    if lexer is not None:
+        result = tokenize_lines(lexer, lines, should_stop)
+        if result is None:
+            return None
+        tokens = (lines, result[0], result[1])
+    if should_stop is not None and should_stop():
+        return None
+    document = QTextDocument()
+    document.setDocumentLayout(QPlainTextDocumentLayout(document))
+    if font is not None:
+        document.setDefaultFont(font)
+    document.setPlainText(text)
+    document.moveToThread(QCoreApplication.instance().thread())
+    # Podświetlanie zmienia swoją listę linii przy edycji - minimapa dostaje osobną kopię
+    return document, tokens, list(lines)
+
+
+class EditorWidget(QPlainTextEdit):
+    """ Widget treści zakładki z tekstem pliku i (dla obsługiwanych typów) podświetlaniem składni. """
+    def __init__(self, text="", file_path=None, parent=None, loading=False):
+        super().__init__(parent)
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.file_path = file_path
+        self.highlighter = None
+        # Minimapa tworzona przy pierwszym pokazaniu wczytanego edytora - zakładki w tle jej nie potrzebują
+        self.minimap = None
+        self._pending_go_to = None # Skok zlecony przed wczytaniem treści (linia, kolumna, długość)
+        # Treść wczytywana w tle - do finish_loading() edytor jest pusty i tylko do odczytu
+        self.is_loading = loading
+        self.setViewportMargins(0, 0, MINIMAP_WIDTH, 0) # Miejsce na minimapę po prawej stronie tekstu
+        if loading:
+            self.setReadOnly(True)
+            self.setPlaceholderText("Wczytywanie...")
+            return
+        self.setPlainText(text)
+        self._start_highlighter()
+
+    def _start_highlighter(self, tokens=None):
+        lexer = lexer_for_path(self.file_path)
+        self.highlighter = IncrementalHighlighter(self, lexer, tokens) if lexer else None
+
+    def finish_loading(self, document, tokens=None, lines=None):
+        """ Podstawia dokument (tokeny, linie) wczytany w tle przez load_document i włącza podświetlanie. """
+        document.setParent(self)
+        self.setDocument(document)
+        document.setModified(False)
+        self.setPlaceholderText("")
+        self.setReadOnly(False)
+        self.is_loading = False
+        self._start_highlighter(tokens)
+        if self.isVisible():
+            self._create_minimap(lines)
+        if self._pending_go_to is not None:
+            self.go_to(*self._pending_go_to)
+            self._pending_go_to = None
+
+    def go_to(self, line, column=0, length=0):
+        """ Przesuwa kursor do linii (od 0) i kolumny, zaznaczając length znaków; podczas wczytywania - po wczytaniu. """
+        if self.is_loading:
+            self._pending_go_to = (line, column, length)
+            return
+        block = self.document().findBlockByNumber(min(line, self.document().blockCount() - 1))
+        position = block.position() + min(column, block.length() - 1)
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(position)
+        cursor.setPosition(min(position + length, block.position() + block.length() - 1), QTextCursor.KeepAnchor)
+        self.setTextCursor(cursor)
+        self.centerCursor()
+
+    def _create_minimap(self, lines=None):
+        self.minimap = Minimap(self, lines)
+        self._place_minimap()
+        self.minimap.show()
+
+    def _place_minimap(self):
+        viewport = self.viewport().geometry()
+        self.minimap.setGeometry(viewport.right() + 1, viewport.top(), MINIMAP_WIDTH, viewport.height())
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.minimap is None and not self.is_loading:
+            self._create_minimap()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.minimap is not None:
+            self._place_minimap()
+
+    def stop_worker(self):
+        """ Widget zwalniany - porzuca niewykonane zlecenia renderowania minimapy. """
+        if self.minimap is not None:
+            self.minimap.stop_rendering()
+
+    def memory_estimate(self):
+        """ Szacunkowa pamięć dokumentu (tekst + layout bloków). """
+        return self.document().characterCount() * 8 + self.document().blockCount() * 256
+
+    @classmethod
+    def from_file(cls, file_path):
+        """ Tworzy edytor z zawartością pliku. Rzuca OSError, jeśli pliku nie da się odczytać. """
+        return cls(read_text_file(file_path), file_path)
@@ -0,0 +1,369 @@
+# find_results.py
+import os
+import re
+import time
+import threading
+import multiprocessing
+from PyQt5.QtWidgets import (
+    QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QCheckBox, QComboBox,
+    QPushButton, QLabel, QTreeWidget, QTreeWidgetItem
+)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from text_search import (
+    MAX_MATCHES_PER_SOURCE, scan_matches, collect_matches, literal_spans, search_file, file_query, init_search_process,
+    search_files_job
+)
+
+# Od tylu plików wyszukiwanie idzie przez pulę procesów - re trzyma GIL, więc wątki nie skalują się,
+# a kilka plików taniej przeszukać w wątku niż płacić za przekazanie zadań
+POOL_MIN_FILES = 32
+SEARCH_PROCESSES = max(2, min(8, os.cpu_count() or 2))
+# Maksymalna liczba plików w jednym zadaniu puli
+FILES_PER_JOB = 16
+# Wyniki są wysyłane do GUI porcjami: co tyle ms lub po tylu dopasowaniach
+BATCH_INTERVAL_MS = 50
+BATCH_MATCHES = 200
+# Po tylu dopasowaniach łącznie wyszukiwanie kończy się (wynik oznaczony jako niepełny)
+MAX_TOTAL_MATCHES = 20000
+# Zakresy wyszukiwania
+SCOPE_OPEN_TABS = 0
+SCOPE_PROJECT = 1
+# Rola danych elementu drzewa: klucz źródła (('tab', ID) lub ('file', ścieżka)) i pozycja dopasowania
+SOURCE_ROLE = Qt.UserRole
+MATCH_ROLE = Qt.UserRole + 1
+
+
+class FindInFilesThread(QThread):
+    """
+    Wątek wyszukiwania tekstu w buforach zakładek i plikach. Bufory (migawki tekstu z wątku GUI)
+    przeszukuje sam; duże zestawy plików rozdziela na pulę procesów (multiprocessing, 'spawn'),
+    tworzoną przy pierwszej potrzebie i używaną ponownie. Jak w QuickOpenSearchThread liczy się
+    tylko najnowsze zlecenie; cancel() i nowe request() zmieniają numer generacji także w procesach
+    puli, więc ich zadania starszego wyszukiwania kończą się bez czytania plików.
+    Wątek jest wspólny dla okien, a numer generacji wskazuje panel, który zlecił wyszukiwanie:
+    cancel(generation) przerywa tylko to wyszukiwanie, a niedokończone wyszukiwanie zastąpione
+    nowym zleceniem (np. z innego okna) kończy się sygnałem searchSuperseded zamiast searchFinished.
+    """
+    resultsFound = pyqtSignal(int, object) # generation, [(klucz źródła, [(linia, kolumna, długość, podgląd)])]
+    searchFinished = pyqtSignal(int, int, int, float, bool) # generation, źródła, bajty, sekundy, czy obcięto
+    searchSuperseded = pyqtSignal(int) # generation wyszukiwania przerwanego przez nowsze zlecenie
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._condition = threading.Condition()
+        self._pending = None # (generation, wzorzec, flagi, tekst dosłowny, bufory, pliki)
+        self._generation = 0
+        self._active = None # Generacja zleconego i jeszcze niezakończonego wyszukiwania
+        self._stopping = False
+        self._pool = None
+        self._shared_generation = None # multiprocessing.Value widoczny w procesach puli
+
+    def request(self, pattern, flags, literal, buffers, paths):
+        """
+        Zleca wyszukiwanie (wzorzec i flagi z text_search.compile_query). buffers - lista
+        (klucz, tekst), paths - lista ścieżek plików. Zwraca numer generacji wyników.
+        """
+        with self._condition:
+            superseded = self._active
+            self._generation += 1
+            self._pending = (self._generation, pattern, flags, literal, buffers, paths)
+            self._active = self._generation
+            self._publish_generation()
+            self._condition.notify()
+            generation = self._generation
+        if superseded is not None:
+            self.searchSuperseded.emit(superseded)
+        if not self.isRunning():
+            self.start()
+        return generation
+
+    def cancel(self, generation):
+        """ Przerywa wyszukiwanie danej generacji (jeśli wciąż trwa) - jego wyniki nie będą już wysyłane. """
+        with self._condition:
+            if generation != self._active:
+                return # Już zakończone lub zastąpione innym zleceniem
+            self._generation += 1
+            self._pending = None
+            self._active = None
+            self._publish_generation()
+
+    def _publish_generation(self):
+        if self._shared_generation is not None:
+            self._shared_generation.value = self._generation
+
+    def _is_stale(self, generation):
+        return generation != self._generation or self._stopping
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._generation += 1
+            self._publish_generation()
+            self._condition.notify()
+        self.wait()
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                job = self._pending
+                self._pending = None
+            self._search(*job)
+
+    def _search(self, generation, pattern, flags, literal, buffers, paths):
+        started = time.perf_counter()
+        batch = Batch(self, generation)
+        sources = 0
+        scanned_bytes = 0
+        compiled = re.compile(pattern, flags)
+        for key, text in buffers:
+            if self._is_stale(generation):
+                return
+            if literal is not None and not flags & re.IGNORECASE:
+                batch.add(key, collect_matches(text, literal_spans(text, literal, False)))
+            else:
+                # str.lower() może zmienić długość tekstu - bez rozróżniania wielkości liter szukamy przez re
+                batch.add(key, scan_matches(text, compiled))
+            sources += 1
+            scanned_bytes += len(text)
+            if batch.full():
+                break
+
+        if paths and not batch.full():
+            if len(paths) < POOL_MIN_FILES or not self._ensure_pool():
+                results = self._search_in_thread(generation, paths, pattern, flags, literal)
+            else:
+                results = self._search_in_pool(generation, paths, pattern, flags, literal)
+            for path, matches, size in results:
+                batch.add(('file', path), matches)
+                sources += 1
+                scanned_bytes += size
+                if batch.full():
+                    break
+            else:
+                if self._is_stale(generation):
+                    return
+
+        batch.flush()
+        with self._condition:
+            finished = not self._is_stale(generation)
+            if finished:
+                self._active = None
+                if batch.full():
+                    # Wyniki obcięte - zadania puli czekające w kolejce kończą się bez czytania plików
+                    self._generation += 1
+                    self._publish_generation()
+        if finished:
+            self.searchFinished.emit(generation, sources, scanned_bytes, time.perf_counter() - started, batch.full())
+
+    def _search_in_thread(self, generation, paths, pattern, flags, literal):
+        compiled, literal = file_query(pattern, flags, literal)
+        for path in paths:
+            if self._is_stale(generation):
+                return
+            yield (path, *search_file(path, compiled, literal))
+
+    def _ensure_pool(self):
+        """ Tworzy pulę procesów przy pierwszym użyciu. Zwraca False, jeśli procesów nie da się uruchomić. """
+        if self._pool is not None:
+            return True
+        context = multiprocessing.get_context('spawn')
+        shared_generation = context.Value('i', 0)
+        try:
+            pool = context.Pool(SEARCH_PROCESSES, initializer=init_search_process, initargs=(shared_generation,))
+        except (OSError, RuntimeError) as e:
+            print(f"Warning: Could not start search processes, searching in one thread: {e}")
+            return False
+        with self._condition:
+            self._pool = pool
+            self._shared_generation = shared_generation
+            self._publish_generation()
+        return True
+
+    def _search_in_pool(self, generation, paths, pattern, flags, literal):
+        # Pliki idą do procesów paczkami - mniej komunikacji, a generację i tak sprawdzamy przed każdym plikiem
+        # (imap_unordered z chunksize > 1 nie pozwala czekać na wynik z limitem czasu)
+        step = max(1, min(FILES_PER_JOB, len(paths) // (SEARCH_PROCESSES * 8)))
+        jobs = ((generation, paths[i:i + step], pattern, flags, literal) for i in range(0, len(paths), step))
+        results = self._pool.imap_unordered(search_files_job, jobs)
+        while not self._is_stale(generation):
+            try:
+                yield from results.next(timeout=BATCH_INTERVAL_MS / 1000)
+            except multiprocessing.TimeoutError:
+                continue # Sprawdzamy przerwanie i wysyłamy zaległe wyniki
+            except StopIteration:
+                return
+
+
+class Batch:
+    """ Zbiera dopasowania kolejnych źródeł i wysyła je sygnałem resultsFound porcjami. """
+    def __init__(self, thread, generation):
+        self._thread = thread
+        self._generation = generation
+        self._items = []
+        self._pending_matches = 0
+        self._last_flush = time.perf_counter()
+        self.total_matches = 0
+
+    def add(self, key, matches):
+        if matches:
+            matches = matches[:MAX_TOTAL_MATCHES - self.total_matches]
+            self._items.append((key, matches))
+            self._pending_matches += len(matches)
+            self.total_matches += len(matches)
+        if self._pending_matches >= BATCH_MATCHES or time.perf_counter() - self._last_flush >= BATCH_INTERVAL_MS / 1000:
+            self.flush()
+
+    def full(self):
+        return self.total_matches >= MAX_TOTAL_MATCHES
+
+    def flush(self):
+        if self._items and not self._thread._is_stale(self._generation):
+            self._thread.resultsFound.emit(self._generation, self._items)
+        self._items = []
+        self._pending_matches = 0
+        self._last_flush = time.perf_counter()
+
+
+class FindResultsDock(QDockWidget):
+    """
+    Panel "Znajdź w plikach": zapytanie, opcje i drzewo wyników (źródło -> linie z dopasowaniami).
+    Wyniki dochodzą w trakcie wyszukiwania; Escape lub "Przerwij" kończy je od razu.
+    Źródła (migawki buforów i ścieżki plików) dostarcza okno sygnałem searchRequested.
+    """
+    searchRequested = pyqtSignal(str, bool, bool, int) # zapytanie, regex, wielkość liter, zakres
+    searchCancelled = pyqtSignal(int) # generation przerywanego wyszukiwania
+    resultActivated = pyqtSignal(object, int, int, int) # klucz źródła, linia, kolumna, długość
+
+    def __init__(self, parent=None):
+        super().__init__('Znajdź w plikach', parent)
+        self.generation = None # Generacja wyników, które pokazujemy (None - brak wyszukiwania)
+        self._source_items = {} # key: klucz źródła, value: QTreeWidgetItem
+        self._match_count = 0
+
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Szukaj...")
+        self.query_edit.returnPressed.connect(self._on_search_clicked)
+        self.regex_check = QCheckBox("Regex")
+        self.case_check = QCheckBox("Wielkość liter")
+        self.scope_combo = QComboBox()
+        self.scope_combo.addItem("Otwarte zakładki", SCOPE_OPEN_TABS)
+        self.scope_combo.addItem("Pliki projektu", SCOPE_PROJECT)
+        self.search_button = QPushButton("Szukaj")
+        self.search_button.clicked.connect(self._on_search_clicked)
+        self.status_label = QLabel()
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
+        self.tree.itemActivated.connect(self._on_item_activated)
+
+        options = QHBoxLayout()
+        options.addWidget(self.regex_check)
+        options.addWidget(self.case_check)
+        options.addWidget(self.scope_combo, 1)
+        options.addWidget(self.search_button)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(2, 2, 2, 2)
+        layout.addWidget(self.query_edit)
+        layout.addLayout(options)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.tree, 1)
+        content = QWidget()
+        content.setLayout(layout)
+        self.setWidget(content)
+
+    def focus_query(self, text=None):
+        if text:
+            self.query_edit.setText(text)
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
+
+    def is_searching(self):
+        return self.search_button.text() == "Przerwij"
+
+    def _on_search_clicked(self):
+        if self.is_searching() and self.sender() is self.search_button:
+            self.cancel()
+            return
+        query = self.query_edit.text()
+        if query:
+            self.searchRequested.emit(query, self.regex_check.isChecked(), self.case_check.isChecked(),
+                                      self.scope_combo.currentData())
+
+    def start(self, generation):
+        """ Okno zleciło wyszukiwanie - czyścimy wyniki i czekamy na porcje z tej generacji. """
+        self.generation = generation
+        self._source_items = {}
+        self._match_count = 0
+        self.tree.clear()
+        self.status_label.setText("Wyszukiwanie...")
+        self.search_button.setText("Przerwij")
+
+    def show_error(self, message):
+        self.status_label.setText(message)
+
+    def cancel(self):
+        if self.is_searching():
+            self.searchCancelled.emit(self.generation)
+            self._stop(f"Przerwano - {self._match_count} wyników")
+
+    def supersede(self, generation):
+        """ Wyszukiwanie tej generacji przerwało nowsze zlecenie (wątek wyszukiwania jest wspólny dla okien). """
+        if generation == self.generation and self.is_searching():
+            self._stop(f"Przerwano przez wyszukiwanie w innym oknie - {self._match_count} wyników")
+
+    def _stop(self, message):
+        self.generation = None
+        self.search_button.setText("Szukaj")
+        self.status_label.setText(message)
+
+    def add_results(self, generation, items, labels):
+        """ Dopisuje porcję wyników; labels(klucz) zwraca etykietę źródła. Porcje innych generacji są pomijane. """
+        if generation != self.generation:
+            return
+        self.tree.setUpdatesEnabled(False)
+        for key, matches in items:
+            source_item = self._source_items.get(key)
+            if source_item is None:
+                source_item = QTreeWidgetItem(self.tree, [labels(key)])
+                source_item.setData(0, SOURCE_ROLE, key)
+                source_item.setExpanded(True)
+                self._source_items[key] = source_item
+            for line, column, length, preview in matches:
+                item = QTreeWidgetItem(source_item, [f"{line + 1}: {preview.strip()}"])
+                item.setData(0, SOURCE_ROLE, key)
+                item.setData(0, MATCH_ROLE, (line, column, length))
+            count = source_item.childCount()
+            suffix = "+" if count >= MAX_MATCHES_PER_SOURCE else ""
+            source_item.setText(0, f"{labels(key)} ({count}{suffix})")
+            self._match_count += len(matches)
+        self.tree.setUpdatesEnabled(True)
+        self.status_label.setText(f"Wyszukiwanie... {self._match_count} wyników")
+
+    def finish(self, generation, sources, scanned_bytes, seconds, truncated):
+        if generation != self.generation:
+            return
+        self.search_button.setText("Szukaj")
+        rate = scanned_bytes / seconds / 1e9 if seconds > 0 else 0.0
+        text = f"{self._match_count} wyników w {len(self._source_items)} z {sources} źródeł ({scanned_bytes / 1e6:.1f} MB, {seconds:.2f} s, {rate:.2f} GB/s)"
+        if truncated:
+            text += " - wyniki obcięte"
+        self.status_label.setText(text)
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape and self.is_searching():
+            self.cancel()
+        else:
+            super().keyPressEvent(event)
+
+    def _on_item_activated(self, item, column):
+        position = item.data(0, MATCH_ROLE)
+        if position is not None:
+            self.resultActivated.emit(item.data(0, SOURCE_ROLE), *position)
@@ -0,0 +1,392 @@
+# highlighter.py
+import re
+import keyword
+import builtins
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QTextCharFormat, QTextLayout, QColor, QFont
+from theme import ThemeManager
+
+# Ile linii tokenizujemy synchronicznie po jednej edycji (reszta kaskady stanu - w kawałkach na timerze)
+SYNC_LINE_BUDGET = 400
+# Ile linii przetwarzamy w jednym kroku timera
+PENDING_CHUNK_LINES = 2000
+# Dokumenty większe niż tyle linii są tokenizowane początkowo w wątku roboczym
+SYNC_INITIAL_LINES = 5000
+
+# Stany leksera na końcu linii
+STATE_NORMAL = 0
+STATE_TRIPLE_DOUBLE = 1 # wewnątrz """ ... """
+STATE_TRIPLE_SINGLE = 2 # wewnątrz ''' ... '''
+
+# userState bloku: formaty zastosowane do layoutu / jeszcze nie
+BLOCK_APPLIED = 1
+BLOCK_NOT_APPLIED = -1
+
+# Formaty tokenów według nazwy motywu - wspólne dla wszystkich edytorów (shared_token_formats)
+_shared_formats = {}
+
+
+class PythonLexer:
+    """ Lekser linia-po-linii dla Pythona: tokenize_line(tekst, stan_wejściowy) -> (spany, stan_wyjściowy). """
+    KEYWORDS = frozenset(keyword.kwlist)
+    BUILTINS = frozenset(name for name in dir(builtins) if not name.startswith('_'))
+    TOKEN_RE = re.compile(r'''
+         (?P<comment>\#.*)
+        |(?P<triple>[rbfuRBFU]{0,2}(?:"""|\'\'\'))
+        |(?P<string>[rbfuRBFU]{0,2}(?:"(?:[^"\\]|\\.)*"?|'(?:[^'\\]|\\.)*'?))
+        |(?P<decorator>@[A-Za-z_][\w.]*)
+        |(?P<number>\b(?:0[xXoObB][\da-fA-F_]+|\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?j?)\b)
+        |(?P<word>[A-Za-z_]\w*)
+    ''', re.VERBOSE)
+
+    def tokenize_line(self, text, state):
+        """ Zwraca (lista (start, długość, typ_tokenu), stan na końcu linii). """
+        spans = []
+        pos = 0
+        if state != STATE_NORMAL:
+            delimiter = '"""' if state == STATE_TRIPLE_DOUBLE else "'''"
+            end = text.find(delimiter)
+            if end == -1:
+                return ([(0, len(text), 'string')] if text else []), state
+            spans.append((0, end + 3, 'string'))
+            pos = end + 3
+
+        keywords, builtin_names = self.KEYWORDS, self.BUILTINS
+        search = self.TOKEN_RE.search
+        while True:
+            match = search(text, pos)
+            if match is None:
+                break
+            kind = match.lastgroup
+            start = match.start()
+            if kind == 'triple':
+                delimiter = match.group()[-3:]
+                end = text.find(delimiter, match.end())
+                if end == -1:
+                    spans.append((start, len(text) - start, 'string'))
+                    return spans, STATE_TRIPLE_DOUBLE if delimiter == '"""' else STATE_TRIPLE_SINGLE
+                spans.append((start, end + 3 - start, 'string'))
+                pos = end + 3
+                continue
+            pos = match.end()
+            if kind == 'word':
+                word = match.group()
+                if word in keywords:
+                    kind = 'keyword'
+                elif word in builtin_names:
+                    kind = 'builtin'
+                else:
+                    continue
+            spans.append((start, pos - start, kind))
+        return spans, STATE_NORMAL
+
+# Leksery według rozszerzenia pliku
+LEXERS_BY_EXTENSION = {
+    '.py': PythonLexer,
+    '.pyw': PythonLexer,
+}
+
+def lexer_for_path(file_path):
+    """ Zwraca instancję leksera dla pliku lub None, jeśli typ pliku nie jest obsługiwany. """
+    if not file_path:
+        return None
+    for extension, lexer_class in LEXERS_BY_EXTENSION.items():
+        if file_path.lower().endswith(extension):
+            return lexer_class()
+    return None
+
+def tokenize_lines(lexer, lines, should_stop=None):
+    """ Tokenizuje całość od stanu początkowego. Zwraca (stany_końcowe, spany) lub None po przerwaniu. """
+    end_states = []
+    spans = []
+    state = STATE_NORMAL
+    tokenize_line = lexer.tokenize_line
+    for number, text in enumerate(lines):
+        if should_stop is not None and number % 5000 == 0 and should_stop():
+            return None
+        line_spans, state = tokenize_line(text, state)
+        spans.append(line_spans)
+        end_states.append(state)
+    return end_states, spans
+
+
+class LineTokenCache:
+    """
+    Pamięć podręczna tokenów per linia wraz ze stanem leksera na końcu każdej linii.
+    Po edycji tokenizuje ponownie od zmienionej linii do momentu, w którym stan końcowy
+    zgadza się z poprzednim (kaskada "zbiega się"). Praca synchroniczna jest ograniczona budżetem,
+    a niedokończona kaskada jest zapamiętana w pending_from i dokańczana przez continue_pending().
+    """
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self.lines = []
+        self.end_states = [] # None = nieznany
+        self.spans = [] # None = jeszcze nie stokenizowana
+        self.pending_from = None # Pierwsza linia, od której kaskada nie została dokończona
+
+    def reset(self, lines, end_states, spans, pending_from=None):
+        self.lines = lines
+        self.end_states = end_states
+        self.spans = spans
+        self.pending_from = pending_from
+
+    def start_state(self, line):
+        if line == 0:
+            return STATE_NORMAL
+        state = self.end_states[line - 1]
+        return STATE_NORMAL if state is None else state
+
+    def replace_lines(self, first, removed, new_lines, budget=SYNC_LINE_BUDGET):
+        """
+        Zastępuje removed linii od first liniami new_lines i tokenizuje ponownie.
+        Zwraca zakres (start, stop) linii, których spany się zmieniły.
+        """
+        added = len(new_lines)
+        self.lines[first:first + removed] = new_lines
+        self.end_states[first:first + removed] = [None] * added
+        self.spans[first:first + removed] = [None] * added
+        if self.pending_from is not None and self.pending_from > first:
+            self.pending_from = max(first, self.pending_from + added - removed)
+        return self._retokenize(first, first + added, budget)
+
+    def continue_pending(self, budget=PENDING_CHUNK_LINES):
+        """ Dokańcza kaskadę (kawałek o rozmiarze budget). Zwraca zmieniony zakres lub None. """
+        if self.pending_from is None:
+            return None
+        start = self.pending_from
+        return self._retokenize(start, start + 1, budget)
+
+    def _retokenize(self, line, until, budget):
+        start = line
+        total = len(self.lines)
+        processed = 0
+        converged = False
+        while line < total:
+            previous_end = self.end_states[line]
+            line_spans, end_state = self.lexer.tokenize_line(self.lines[line], self.start_state(line))
+            self.spans[line] = line_spans
+            self.end_states[line] = end_state
+            line += 1
+            processed += 1
+            if line >= until and end_state == previous_end:
+                converged = True
+                break
+            if processed >= budget and line < total:
+                break
+
+        if converged or line >= total:
+            # Kaskada dokończona - wcześniej zaległa praca w tym zakresie nie jest już potrzebna
+            if self.pending_from is not None and start <= self.pending_from <= line:
+                self.pending_from = None
+        else:
+            self.pending_from = line if self.pending_from is None else min(self.pending_from, line)
+        return start, line
+
+
+class HighlightWorker(QThread):
+    """ Początkowa tokenizacja dużego dokumentu poza wątkiem GUI. """
+    tokenized = pyqtSignal(int, list, list, list) # pass_id, linie, stany_końcowe, spany
+
+    def __init__(self, lexer, lines, pass_id, parent=None):
+        super().__init__(parent)
+        self._lexer = lexer
+        self._lines = lines
+        self._pass_id = pass_id
+
+    def run(self):
+        result = tokenize_lines(self._lexer, self._lines, self.isInterruptionRequested)
+        if result is not None:
+            self.tokenized.emit(self._pass_id, self._lines, result[0], result[1])
+
+
+def build_token_formats(styles):
+    """ Tworzy QTextCharFormat dla typów tokenów (styles: nazwa tokenu -> (kolor, pogrubienie, kursywa)). """
+    formats = {}
+    for kind, (color, bold, italic) in styles.items():
+        char_format = QTextCharFormat()
+        char_format.setForeground(QColor(color))
+        if bold:
+            char_format.setFontWeight(QFont.Bold)
+        char_format.setFontItalic(italic)
+        formats[kind] = char_format
+    return formats
+
+def shared_token_formats():
+    """ Formaty tokenów bieżącego motywu, budowane raz na motyw. """
+    manager = ThemeManager.instance()
+    formats = _shared_formats.get(manager.name)
+    if formats is None:
+        formats = _shared_formats[manager.name] = build_token_formats(manager.theme()['tokens'])
+    return formats
+
+
+class IncrementalHighlighter(QObject):
+    """
+    Podświetlanie składni dla QPlainTextEdit oparte na LineTokenCache.
+    Formaty są nakładane bezpośrednio na QTextLayout bloków i tylko dla bloków widocznych
+    (pozostałe - leniwie, przy przewinięciu), więc koszt naciśnięcia klawisza nie zależy od długości pliku.
+    """
+    def __init__(self, editor, lexer, tokens=None):
+        """ tokens - (linie, stany_końcowe, spany) policzone wcześniej, np. w wątku wczytującym plik (editor.load_document). """
+        super().__init__(editor)
+        self._editor = editor
+        self._document = editor.document()
+        self.cache = LineTokenCache(lexer)
+        self._formats = shared_token_formats()
+        self._applying = False
+        self._ready = False
+        self._worker = None
+        self._pass_id = 0
+        self._first_edit_during_pass = None
+        self._block_count = self._document.blockCount()
+
+        self._pending_timer = QTimer(self)
+        self._pending_timer.setInterval(0)
+        self._pending_timer.timeout.connect(self._continue_pending)
+
+        self._document.contentsChange.connect(self._on_contents_change)
+        editor.updateRequest.connect(self._on_update_request)
+        ThemeManager.instance().themeChanged.connect(self._on_theme_changed)
+        if tokens is not None and len(tokens[0]) == self._block_count:
+            # Nowy dokument - bloki nie mają jeszcze formatów, wystarczy nałożyć je na widoczne
+            self.cache.reset(*tokens)
+            self._ready = True
+            self._apply_visible()
+        else:
+            self.rehighlight()
+
+    def _document_lines(self):
+        return self._document.toPlainText().split('\n')
+
+    def rehighlight(self):
+        """ Tokenizuje cały dokument - synchronicznie dla małych, w wątku roboczym dla dużych. """
+        lines = self._document_lines()
+        self._block_count = self._document.blockCount()
+        if len(lines) <= SYNC_INITIAL_LINES:
+            end_states, spans = tokenize_lines(self.cache.lexer, lines)
+            self.cache.reset(lines, end_states, spans)
+            self._ready = True
+            self._invalidate_blocks(0, len(lines))
+            self._apply_visible()
+            return
+
+        self._ready = False
+        self._pass_id += 1
+        self._first_edit_during_pass = None
+        self.stop_worker()
+        self._worker = HighlightWorker(self.cache.lexer, lines, self._pass_id, self)
+        self._worker.tokenized.connect(self._on_worker_tokenized)
+        self._worker.start()
+
+    def stop_worker(self):
+        if self._worker is not None and self._worker.isRunning():
+            self._worker.requestInterruption()
+            self._worker.wait()
+
+    def _on_worker_tokenized(self, pass_id, lines, end_states, spans):
+        if pass_id != self._pass_id:
+            return
+        if self._first_edit_during_pass is None:
+            self.cache.reset(lines, end_states, spans)
+        else:
+            # Edytowano w trakcie - wyniki przed pierwszą edycją są aktualne, resztę dokańczamy kawałkami
+            keep = self._first_edit_during_pass
+            current_lines = self._document_lines()
+            missing = len(current_lines) - keep
+            self.cache.reset(current_lines, end_states[:keep] + [None] * missing,
+                             spans[:keep] + [None] * missing, pending_from=keep)
+            self._pending_timer.start()
+        self._ready = True
+        self._invalidate_blocks(0, self._document.blockCount())
+        self._apply_visible()
+
+    def _on_contents_change(self, position, chars_removed, chars_added):
+        if self._applying:
+            return # markContentsDirty z _apply_block
+        document = self._document
+        block_count = document.blockCount()
+        delta = block_count - self._block_count
+        self._block_count = block_count
+
+        first = document.findBlock(position).blockNumber()
+        last_block = document.findBlock(position + chars_added)
+        last = last_block.blockNumber() if last_block.isValid() else block_count - 1
+        first = max(first, 0)
+        if not self._ready:
+            self._first_edit_during_pass = first if self._first_edit_during_pass is None else min(self._first_edit_during_pass, first)
+            return
+
+        new_lines = []
+        block = document.findBlockByNumber(first)
+        for _ in range(last - first + 1):
+            new_lines.append(block.text())
+            block = block.next()
+        removed = (last - first + 1) - delta
+
+        start, stop = self.cache.replace_lines(first, removed, new_lines)
+        self._invalidate_blocks(start, stop)
+        if self.cache.pending_from is not None:
+            self._pending_timer.start()
+        self._apply_visible()
+
+    def _continue_pending(self):
+        changed = self.cache.continue_pending()
+        if changed is not None:
+            self._invalidate_blocks(*changed)
+            self._apply_visible()
+        if self.cache.pending_from is None:
+            self._pending_timer.stop()
+
+    def _invalidate_blocks(self, start, stop):
+        block = self._document.findBlockByNumber(start)
+        for _ in range(stop - start):
+            if not block.isValid():
+                break
+            block.setUserState(BLOCK_NOT_APPLIED)
+            block = block.next()
+
+    def _on_theme_changed(self, name):
+        """ Nowe formaty tokenów - tokeny z pamięci podręcznej są aktualne, nakładamy je ponownie na widoczne bloki. """
+        self._formats = shared_token_formats()
+        self._invalidate_blocks(0, self._document.blockCount())
+        if self._ready:
+            self._apply_visible()
+
+    def _on_update_request(self, rect, dy):
+        if self._applying:
+            return # markContentsDirty z _apply_block wywołuje updateRequest synchronicznie
+        self._apply_visible()
+
+    def _apply_visible(self):
+        """ Nakłada formaty na widoczne bloki, które ich jeszcze nie mają. """
+        if not self._ready:
+            return
+        editor = self._editor
+        block = editor.firstVisibleBlock()
+        offset = editor.contentOffset()
+        bottom = editor.viewport().height()
+        spans = self.cache.spans
+        while block.isValid():
+            if editor.blockBoundingGeometry(block).translated(offset).top() > bottom:
+                break
+            number = block.blockNumber()
+            if block.userState() != BLOCK_APPLIED and number < len(spans) and spans[number] is not None:
+                self._apply_block(block, spans[number])
+            block = block.next()
+
+    def _apply_block(self, block, spans):
+        formats = self._formats
+        ranges = []
+        for start, length, kind in spans:
+            format_range = QTextLayout.FormatRange()
+            format_range.start = start
+            format_range.length = length
+            format_range.format = formats[kind]
+            ranges.append(format_range)
+        self._applying = True
+        try:
+            block.layout().setFormats(ranges)
+            block.setUserState(BLOCK_APPLIED)
+            self._document.markContentsDirty(block.position(), block.length())
+        finally:
+            self._applying = False
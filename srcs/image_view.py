@@ -0,0 +1,692 @@
+# image_view.py
+"""
+Podgląd obrazów w zakładce.
+Piramida rozdzielczości (poziom k = obraz pomniejszony 2^k razy) pocięta na kafle TILE_SIZE x TILE_SIZE leży
+w pliku tymczasowym i jest wspólna dla wszystkich widoków pliku - także widoku odtworzonego po zwolnieniu
+zakładki (pyramid_for). Buduje ją pula TaskRunner krokami z priorytetem zakładki, więc obraz w aktywnym panelu
+powstaje przed pozostałymi. Widok czyta z piramidy tylko kafle widoczne na poziomie odpowiadającym powiększeniu,
+w porcjach ograniczonych czasem, a odczytane trzyma w pamięci podręcznej LRU z limitem bajtów - zużycie pamięci
+przy przeglądaniu nie zależy od rozmiaru obrazu. Brakujący kafel jest zastępowany powiększonym fragmentem
+kafla z poziomu o mniejszej rozdzielczości, więc przesuwanie i powiększanie nie czeka na budowę.
+Formaty bez dekodowania fragmentu (PNG, BMP...) są dekodowane w całości - obrazy ponad MAX_FULL_DECODE_BYTES
+nie są otwierane. Zamknięcie widoku nie czeka na pulę: trwający krok budowy kończy się w tle.
+"""
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from PyQt5 import sip
+from PyQt5.QtWidgets import QAbstractScrollArea
+from PyQt5.QtCore import Qt, QObject, QTimer, QRect, QRectF, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QImageIOHandler, QPainter
+from theme import ThemeManager
+
+# Bok kafla piramidy w pikselach
+TILE_SIZE = 256
+# Limit pamięci podręcznej odczytanych kafli jednego widoku
+TILE_CACHE_BYTES = 64 * 1024 * 1024
+# Ile ms w jednym obiegu pętli zdarzeń widok może czytać kafle z piramidy
+TILE_READ_BUDGET_MS = 5
+# Obrazy większe od tego (po zdekodowaniu) są dekodowane pasami, o ile format pozwala dekodować fragment
+BAND_BYTES = 256 * 1024 * 1024
+# Limit pamięci obrazu dekodowanego w całości (format nie dekoduje fragmentu) - większe nie są otwierane
+MAX_FULL_DECODE_BYTES = 512 * 1024 * 1024
+# Limit plików tymczasowych zbudowanych piramid, których nie pokazuje żaden widok (najdawniej używane są usuwane)
+PYRAMID_DISK_BUDGET = 4 * 1024 * 1024 * 1024
+# Poziom podglądu dekodowanego najpierw (JPEG skaluje przy dekodowaniu nawet 8 razy, prawie bez kosztu)
+PREVIEW_LEVEL = 3
+MAX_ZOOM = 16.0
+ZOOM_STEP = 1.25
+# Formaty wektorowe otwieramy jako tekst
+VECTOR_FORMATS = {'svg', 'svgz'}
+
+_raster_formats = None
+# Piramidy plików; key: (ścieżka bezwzględna, mtime_ns, rozmiar), value: ImagePyramid; od najdawniej użytej
+_pyramids = OrderedDict()
+
+def is_image_file(path):
+    """ Czy plik ma rozszerzenie obrazu rastrowego obsługiwanego przez QImageReader. """
+    global _raster_formats
+    if _raster_formats is None:
+        _raster_formats = {bytes(name).decode('ascii').lower() for name in QImageReader.supportedImageFormats()}
+        _raster_formats -= VECTOR_FORMATS
+    return os.path.splitext(path)[1][1:].lower() in _raster_formats
+
+def level_count(width, height):
+    """ Liczba poziomów piramidy - ostatni mieści się w jednym kaflu. """
+    levels = 1
+    while max(width, height) > TILE_SIZE << (levels - 1):
+        levels += 1
+    return levels
+
+def level_size(width, height, level):
+    """ Rozmiar obrazu na danym poziomie (zaokrąglony w górę). """
+    scale = 1 << level
+    return -(-width // scale), -(-height // scale)
+
+def _rows(image, top, count):
+    """ Wiersze [top, top + count) obrazu bez kopiowania pikseli - widok ważny, dopóki żyje image. """
+    if top == 0 and count == image.height():
+        return image
+    address = int(image.constBits()) + top * image.bytesPerLine()
+    return QImage(sip.voidptr(address), image.width(), count, image.bytesPerLine(), image.format())
+
+def _stack(upper, lower):
+    """ Skleja dwa pasy o tej samej szerokości w jeden (None oznacza brak pasa). """
+    if upper is None or lower is None:
+        return lower if upper is None else upper
+    image = QImage(upper.width(), upper.height() + lower.height(), upper.format())
+    painter = QPainter(image)
+    painter.setCompositionMode(QPainter.CompositionMode_Source)
+    painter.drawImage(0, 0, upper)
+    painter.drawImage(0, upper.height(), lower)
+    painter.end()
+    return image
+
+
+class TileStore:
+    """ Kafle piramidy w pliku tymczasowym (surowe piksele). Zapis w wątku puli, odczyt w wątku GUI - pod blokadą. """
+    def __init__(self, image_format):
+        self._file = tempfile.TemporaryFile(prefix='image_tiles_')
+        self._format = image_format
+        self._lock = threading.Lock() # wspólna pozycja pliku przy zapisie i odczycie
+        self._index = {} # key: (poziom, kolumna, wiersz), value: (offset, szerokość, wysokość)
+        self._end = 0
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def size_bytes(self):
+        return self._end
+
+    def write(self, key, tile):
+        """ tile - obraz w formacie magazynu z wierszami bez wyrównania (wynik QImage.copy()). """
+        size = tile.width() * tile.height() * 4
+        bits = tile.constBits()
+        bits.setsize(size)
+        with self._lock:
+            self._file.seek(self._end)
+            self._file.write(bits)
+            self._index[key] = (self._end, tile.width(), tile.height())
+            self._end += size
+
+    def read(self, key):
+        """ Kafel albo None, jeśli jeszcze nie zapisany. """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            offset, width, height = entry
+            self._file.seek(offset)
+            data = self._file.read(width * height * 4)
+        # copy() - obraz z własnym buforem, niezależny od data
+        return QImage(data, width, height, width * 4, self._format).copy()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class PyramidBuilder:
+    """
+    Tnie na kafle kolejne pasy wierszy poziomu first i przekazuje je, pomniejszone o połowę, na kolejne poziomy
+    aż do last. Pas jest cięty w wielokrotnościach TILE_SIZE wierszy (reszta czeka na następny pas), więc połowa
+    ma zawsze całkowitą wysokość, a kafle wszystkich poziomów pokrywają te same fragmenty obrazu.
+    """
+    def __init__(self, store, first, last, on_tile_row=None):
+        self._store = store
+        self._first = first
+        self._last = last
+        self._on_tile_row = on_tile_row # wołane po każdym zapisanym wierszu kafli
+        self._pending = {} # key: poziom, value: (niepocięte wiersze lub None, numer następnego wiersza kafli)
+
+    def add_rows(self, strip):
+        self._add(self._first, strip, False)
+
+    def finish(self):
+        """ Tnie resztki wszystkich poziomów (ostatni wiersz kafli bywa niższy od TILE_SIZE). """
+        for level in range(self._first, self._last + 1):
+            self._add(level, None, True)
+
+    def _add(self, level, strip, final):
+        rest, tile_row = self._pending.pop(level, (None, 0))
+        strip = _stack(rest, strip)
+        if strip is None:
+            self._pending[level] = (None, tile_row)
+            return
+        width, height = strip.width(), strip.height()
+        usable = height if final else height // TILE_SIZE * TILE_SIZE
+        for top in range(0, usable, TILE_SIZE):
+            tile_height = min(TILE_SIZE, usable - top)
+            for column, left in enumerate(range(0, width, TILE_SIZE)):
+                tile = strip.copy(left, top, min(TILE_SIZE, width - left), tile_height)
+                self._store.write((level, column, tile_row), tile)
+            tile_row += 1
+            if self._on_tile_row is not None:
+                self._on_tile_row()
+        if usable and level < self._last:
+            # Pomniejszenie dokładnie o połowę uśrednia bloki 2x2 pikseli
+            half = _rows(strip, 0, usable).scaled(-(-width // 2), -(-usable // 2),
+                                                  Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            self._add(level + 1, half, False)
+        rest = strip.copy(0, usable, width, height - usable) if usable < height else None
+        self._pending[level] = (rest, tile_row)
+
+
+def pyramid_for(path):
+    """
+    Piramida pliku - wspólna dla jego widoków i zachowana po zamknięciu ostatniego (gotowa do odtworzenia
+    zakładki). Zmieniony plik (inny mtime lub rozmiar) i nieudana budowa dają nową piramidę.
+    """
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        key = (path, None, None)
+    for other_key in [other for other in _pyramids if other[0] == path and other != key]:
+        if not _pyramids[other_key].views:
+            _pyramids.pop(other_key).close()
+    pyramid = _pyramids.pop(key, None)
+    if pyramid is None or pyramid.error is not None:
+        pyramid = ImagePyramid(path)
+    _pyramids[key] = pyramid
+    return pyramid
+
+def _trim_pyramids():
+    """ Zamyka piramidy bez widoków: niedokończone od razu, zbudowane - od najdawniej używanych ponad budżet. """
+    unused = sum(pyramid.size_bytes() for pyramid in _pyramids.values() if not pyramid.views)
+    for key, pyramid in list(_pyramids.items()):
+        if pyramid.views or (pyramid.built and unused <= PYRAMID_DISK_BUDGET):
+            continue
+        unused -= pyramid.size_bytes()
+        del _pyramids[key]
+        pyramid.close()
+
+
+class ImagePyramid(QObject):
+    """
+    Piramida kafli jednego pliku. Budowa to ciąg zadań TaskRunner (run_step): nagłówek i poziomy podglądu,
+    potem kolejne pasy - albo cały obraz jednym krokiem, gdy format nie dekoduje fragmentu. Następny krok
+    zleca resume() z właścicielem widoku, który go potrzebuje, więc między krokami liczy się priorytet
+    zakładki, a ukrycie zakładki (cancel_owner) wstrzymuje budowę do ponownego pokazania. Kroku nie da się
+    przerwać (dekodowanie to jedno wywołanie Qt) - zapisane kafle są dostępne (read) już w trakcie budowy.
+    Sygnały są wysyłane z wątku puli.
+    """
+    infoReady = pyqtSignal(int, int, int) # szerokość, wysokość, liczba poziomów
+    tilesAdded = pyqtSignal() # zapisano kolejny wiersz kafli
+    failed = pyqtSignal(str)
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.info = None # (szerokość, wysokość, liczba poziomów) po odczycie nagłówka
+        self.error = None
+        self.built = False
+        self.views = set() # widoki pokazujące piramidę (tylko wątek GUI)
+        self._condition = threading.Condition()
+        self._running = False # trwa krok budowy (także anulowany - kolejny czeka na jego koniec)
+        self._closed = False
+        self._store = None
+        self._steps = self._build_steps()
+        self._handle = None # zlecony krok
+        self._task_runner = None # pula, której zlecono krok
+        self._build_seconds = 0.0
+
+    def attach(self, view):
+        self.views.add(view)
+
+    def detach(self, view):
+        """ Odłącza widok; krok zlecony dla niego jest anulowany i przejmuje go inny widok (wątek GUI). """
+        self.views.discard(view)
+        if self._handle is not None and self._handle.owner == view.owner:
+            self._task_runner.cancel(self._handle)
+            self._handle = None
+            for other in list(self.views):
+                if sip.isdeleted(other): # Widok usunięty bez stop_worker (np. razem z aplikacją)
+                    self.views.discard(other)
+                else:
+                    other.schedule_requests()
+        _trim_pyramids()
+
+    def size_bytes(self):
+        store = self._store
+        return store.size_bytes() if store is not None else 0
+
+    def read(self, key):
+        """ Kafel z piramidy albo None, jeśli jeszcze nie zbudowany (wątek GUI). """
+        store = self._store
+        return store.read(key) if store is not None and not self._closed else None
+
+    def resume(self, task_runner, owner):
+        """ Zleca następny krok budowy, jeśli żaden nie jest zlecony (wątek GUI). """
+        if self.built or self.error is not None or self._closed:
+            return
+        if self._handle is not None and not self._handle.is_cancelled():
+            return
+        self._task_runner = task_runner
+        self._handle = task_runner.submit(self.run_step, on_done=partial(self._on_step_done, task_runner, owner),
+                                          owner=owner)
+
+    def close(self):
+        """ Usuwa plik kafli - od razu albo po trwającym kroku (wątek GUI nie czeka). """
+        if self._handle is not None:
+            self._task_runner.cancel(self._handle)
+            self._handle = None
+        with self._condition:
+            self._closed = True
+            if not self._running:
+                self._close_store()
+
+    def run_step(self, should_stop):
+        """ Jeden krok budowy (wątek puli). Zwraca True po zbudowaniu całej piramidy. """
+        with self._condition:
+            while self._running:
+                self._condition.wait()
+            if self._closed or self.built or self.error is not None:
+                return self.built
+            self._running = True
+        start = time.perf_counter()
+        try:
+            next(self._steps)
+        except StopIteration:
+            self.built = True
+            width, height, levels = self.info
+            print(f"Image pyramid for {self.path} ({width}x{height}, {levels} levels) built in "
+                  f"{self._build_seconds + time.perf_counter() - start:.2f} s")
+        except OSError as e:
+            self.error = str(e)
+            self.failed.emit(self.error)
+        finally:
+            self._build_seconds += time.perf_counter() - start
+            with self._condition:
+                self._running = False
+                if self._closed:
+                    self._close_store()
+                self._condition.notify_all()
+        return self.built
+
+    def _on_step_done(self, task_runner, owner, built):
+        self._handle = None
+        if not built:
+            self.resume(task_runner, owner)
+
+    def _close_store(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def _read(self, reader):
+        image = reader.read()
+        if image.isNull():
+            raise OSError(reader.errorString())
+        return image
+
+    def _build_steps(self):
+        """ Kroki budowy - generator, jeden next() na zadanie puli. """
+        reader = QImageReader(self.path)
+        size = reader.size()
+        if not size.isValid():
+            raise OSError(reader.errorString())
+        width, height = size.width(), size.height()
+        # Pasami tylko formaty, które dekodują fragment same - inaczej Qt dekoduje cały obraz przy każdym pasie
+        banded = reader.supportsOption(QImageIOHandler.ClipRect) and width * height * 4 > BAND_BYTES
+        if not banded and width * height * 4 > MAX_FULL_DECODE_BYTES:
+            raise OSError(f"obraz {width}x{height} w formacie {bytes(reader.format()).decode('ascii').upper()} "
+                          f"trzeba zdekodować w całości ({width * height * 4 / 2 ** 20:.0f} MB, "
+                          f"limit {MAX_FULL_DECODE_BYTES / 2 ** 20:.0f} MB)")
+        levels = level_count(width, height)
+        self.info = (width, height, levels)
+        self.infoReady.emit(width, height, levels)
+        preview_level = min(PREVIEW_LEVEL, levels - 1)
+        full = None
+        if banded:
+            reader.setScaledSize(QSize(*level_size(width, height, preview_level)))
+            preview = self._read(reader)
+        else:
+            full = self._read(reader)
+            preview = full.scaled(*level_size(width, height, preview_level), Qt.IgnoreAspectRatio,
+                                  Qt.SmoothTransformation) if preview_level else full
+        image_format = QImage.Format_ARGB32_Premultiplied if preview.hasAlphaChannel() else QImage.Format_RGB32
+        self._store = TileStore(image_format)
+
+        # Najpierw poziomy podglądu - widok ma od razu cały obraz w niższej rozdzielczości
+        builder = PyramidBuilder(self._store, preview_level, levels - 1, self.tilesAdded.emit)
+        builder.add_rows(preview.convertToFormat(image_format))
+        builder.finish()
+        preview = None
+        if preview_level == 0:
+            return
+        builder = PyramidBuilder(self._store, 0, preview_level - 1, self.tilesAdded.emit)
+        if full is not None:
+            # W tym samym kroku - zdekodowany obraz nie czeka w pamięci na wznowienie budowy
+            full.convertTo(image_format) # W miejscu - bez drugiej kopii całego obrazu
+            builder.add_rows(full)
+            full = None
+        else:
+            yield
+            band_rows = max(TILE_SIZE, BAND_BYTES // (width * 4) // TILE_SIZE * TILE_SIZE)
+            for top in range(0, height, band_rows):
+                band_reader = QImageReader(self.path)
+                band_reader.setClipRect(QRect(0, top, width, min(band_rows, height - top)))
+                builder.add_rows(self._read(band_reader).convertToFormat(image_format))
+                yield
+        builder.finish()
+
+
+class ImageView(QAbstractScrollArea):
+    """
+    Zakładka z obrazem. Kółko myszy powiększa wokół kursora, przeciąganie przesuwa;
+    klawisze: +/- powiększenie, 0 - dopasuj do okna, 1 - 100%.
+    """
+    def __init__(self, file_path, task_runner, owner=None, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.owner = owner # właściciel zadań budowy piramidy w task_runner (ID zakładki)
+        self._task_runner = task_runner
+        self._image_size = None # (szerokość, wysokość) po odczycie nagłówka
+        self._levels = 1
+        self._scale = 1.0
+        self._fit = True # Dopasowanie do okna, dopóki użytkownik nie zmieni powiększenia
+        self._message = "Wczytywanie obrazu..."
+        self._cache = OrderedDict() # key: (poziom, kolumna, wiersz), value: QImage; od najdawniej użytego
+        self._cache_bytes = 0
+        self._wanted = [] # brakujące kafle widoku w kolejności odczytu
+        self._drag_start = None # (pozycja kursora, wartości pasków) przy przeciąganiu
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.viewport().setCursor(Qt.OpenHandCursor)
+
+        self._request_timer = QTimer(self)
+        self._request_timer.setSingleShot(True)
+        self._request_timer.setInterval(0)
+        self._request_timer.timeout.connect(self._request_visible_tiles)
+
+        self._read_timer = QTimer(self)
+        self._read_timer.setSingleShot(True)
+        self._read_timer.setInterval(0)
+        self._read_timer.timeout.connect(self._read_tiles)
+
+        self._pyramid = pyramid_for(file_path)
+        self._pyramid.attach(self)
+        self._pyramid.infoReady.connect(self._on_image_info)
+        self._pyramid.tilesAdded.connect(self._on_tiles_added)
+        self._pyramid.failed.connect(self._on_failed)
+        if self._pyramid.info is not None: # Piramida innego widoku albo zamkniętej zakładki
+            self._on_image_info(*self._pyramid.info)
+
+    def stop_worker(self):
+        """ Odłącza widok od piramidy; trwający krok budowy kończy się w puli (wątek GUI nie czeka). """
+        pyramid = self._pyramid
+        if pyramid is None:
+            return
+        self._pyramid = None
+        self._request_timer.stop()
+        self._read_timer.stop()
+        pyramid.infoReady.disconnect(self._on_image_info)
+        pyramid.tilesAdded.disconnect(self._on_tiles_added)
+        pyramid.failed.disconnect(self._on_failed)
+        pyramid.detach(self)
+
+    def memory_estimate(self):
+        """ Szacunkowa pamięć: odczytane kafle (piramida leży w pliku tymczasowym). """
+        return self._cache_bytes + 64 * 1024
+
+    # --- Sygnały piramidy ---
+    def _on_image_info(self, width, height, levels):
+        self._image_size = (width, height)
+        self._levels = levels
+        self._message = None
+        if self._fit:
+            self._scale = self._fit_scale()
+        self._update_scrollbars()
+        self.viewport().update()
+        self.schedule_requests()
+
+    def _on_tiles_added(self):
+        if self._wanted:
+            self._read_timer.start()
+
+    def _on_failed(self, message):
+        self._message = f"Nie można otworzyć obrazu: {message}"
+        self.viewport().update()
+
+    def _add_tile(self, key, tile):
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._cache_bytes -= previous.sizeInBytes()
+        self._cache[key] = tile
+        self._cache_bytes += tile.sizeInBytes()
+        while self._cache_bytes > TILE_CACHE_BYTES and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted.sizeInBytes()
+        if key[0] == self._level():
+            self.viewport().update(self._tile_rect(key).toAlignedRect())
+
+    # --- Geometria ---
+    def _fit_scale(self):
+        width, height = self._image_size
+        viewport = self.viewport()
+        return min(1.0, viewport.width() / width, viewport.height() / height)
+
+    def _scaled_size(self):
+        width, height = self._image_size
+        return math.ceil(width * self._scale), math.ceil(height * self._scale)
+
+    def _origin(self):
+        """ Położenie lewego górnego rogu obrazu w viewporcie (mniejszy od viewportu obraz jest wyśrodkowany). """
+        width, height = self._scaled_size()
+        viewport = self.viewport()
+        x = (viewport.width() - width) // 2 if width < viewport.width() else -self.horizontalScrollBar().value()
+        y = (viewport.height() - height) // 2 if height < viewport.height() else -self.verticalScrollBar().value()
+        return x, y
+
+    def _level(self):
+        """ Poziom piramidy dla bieżącego powiększenia - najmniejszy obraz nie mniejszy od wyświetlanego. """
+        if self._scale >= 1:
+            return 0
+        return min(self._levels - 1, int(math.floor(math.log2(1 / self._scale))))
+
+    def _tile_rect(self, key):
+        """ Prostokąt kafla w viewporcie. """
+        level, column, row = key
+        width, height = level_size(*self._image_size, level)
+        span = (TILE_SIZE << level) * self._scale # bok kafla w pikselach viewportu
+        factor = (1 << level) * self._scale
+        x, y = self._origin()
+        return QRectF(x + column * span, y + row * span,
+                      min(TILE_SIZE, width - column * TILE_SIZE) * factor, min(TILE_SIZE, height - row * TILE_SIZE) * factor)
+
+    def _tiles_in(self, rect, level, margin=0):
+        """ Kafle poziomu level przecinające prostokąt viewportu (z marginesem w kaflach). """
+        width, height = level_size(*self._image_size, level)
+        span = (TILE_SIZE << level) * self._scale
+        x, y = self._origin()
+        columns = -(-width // TILE_SIZE)
+        rows = -(-height // TILE_SIZE)
+        first_column = max(0, int((rect.left() - x) // span) - margin)
+        last_column = min(columns - 1, int((rect.right() - x) // span) + margin)
+        first_row = max(0, int((rect.top() - y) // span) - margin)
+        last_row = min(rows - 1, int((rect.bottom() - y) // span) + margin)
+        return [(level, column, row) for row in range(first_row, last_row + 1)
+                for column in range(first_column, last_column + 1)]
+
+    def _update_scrollbars(self):
+        if self._image_size is None:
+            return
+        width, height = self._scaled_size()
+        viewport = self.viewport()
+        for scroll, content, page in ((self.horizontalScrollBar(), width, viewport.width()),
+                                      (self.verticalScrollBar(), height, viewport.height())):
+            scroll.setRange(0, max(0, content - page))
+            scroll.setPageStep(page)
+            scroll.setSingleStep(max(1, page // 10))
+
+    # --- Powiększenie ---
+    def set_scale(self, scale, anchor=None):
+        """ Ustawia powiększenie; punkt obrazu pod anchor (punkt viewportu, domyślnie środek) zostaje na miejscu. """
+        self._fit = False
+        self._apply_scale(scale, anchor)
+
+    def _apply_scale(self, scale, anchor=None):
+        if self._image_size is None:
+            return
+        scale = max(min(self._fit_scale(), 1 / (1 << (self._levels - 1))), min(MAX_ZOOM, scale))
+        if anchor is None:
+            anchor = self.viewport().rect().center()
+        x, y = self._origin()
+        image_x = (anchor.x() - x) / self._scale
+        image_y = (anchor.y() - y) / self._scale
+        self._scale = scale
+        self._update_scrollbars()
+        self.horizontalScrollBar().setValue(round(image_x * scale - anchor.x()))
+        self.verticalScrollBar().setValue(round(image_y * scale - anchor.y()))
+        self.viewport().update()
+        self.schedule_requests()
+
+    def zoom(self, factor, anchor=None):
+        self.set_scale(self._scale * factor, anchor)
+
+    def zoom_to_fit(self):
+        self._fit = True
+        if self._image_size is not None:
+            self._apply_scale(self._fit_scale())
+
+    # --- Kafle ---
+    def schedule_requests(self):
+        self._request_timer.start()
+
+    def _request_visible_tiles(self):
+        """ Ustala brakujące kafle widoku (z marginesem), od środka; najmniejszy poziom zawsze - jako zastępstwo. """
+        if self._pyramid is None or not self.isVisible():
+            return
+        # Widoczny widok wznawia budowę wstrzymaną przy ukryciu zakładki (albo zleconą dla zamkniętego widoku)
+        self._pyramid.resume(self._task_runner, self.owner)
+        if self._image_size is None:
+            return
+        level = self._level()
+        center = self.viewport().rect().center()
+        tiles = self._tiles_in(self.viewport().rect(), level, margin=1)
+        tiles.sort(key=lambda key: (self._tile_rect(key).center() - center).manhattanLength())
+        self._wanted = [key for key in [(self._levels - 1, 0, 0)] + tiles if key not in self._cache]
+        if self._wanted:
+            self._read_timer.start()
+
+    def _read_tiles(self):
+        """ Czyta z piramidy zbudowane już kafle z self._wanted, dopóki nie minie TILE_READ_BUDGET_MS. """
+        if self._pyramid is None:
+            return
+        deadline = time.perf_counter() + TILE_READ_BUDGET_MS / 1000
+        waiting = [] # Jeszcze niezbudowane - wrócą po tilesAdded
+        for index, key in enumerate(self._wanted):
+            if time.perf_counter() >= deadline:
+                waiting.extend(self._wanted[index:])
+                self._read_timer.start()
+                break
+            tile = self._pyramid.read(key)
+            if tile is not None:
+                self._add_tile(key, tile)
+            elif not self._pyramid.built:
+                waiting.append(key) # Kafle spoza zakresu zbudowanej piramidy nigdy nie powstaną
+        self._wanted = waiting
+
+    def _cached_or_fallback(self, key):
+        """ (kafel, prostokąt źródłowy) dla kafla: z pamięci podręcznej albo fragment kafla niższej rozdzielczości. """
+        tile = self._cache.get(key)
+        if tile is not None:
+            self._cache.move_to_end(key)
+            return tile, QRectF(tile.rect())
+        level, column, row = key
+        for parent_level in range(level + 1, self._levels):
+            shift = parent_level - level
+            parent_key = (parent_level, column >> shift, row >> shift)
+            parent = self._cache.get(parent_key)
+            if parent is None:
+                continue
+            self._cache.move_to_end(parent_key)
+            # Położenie kafla wewnątrz rodzica w pikselach rodzica
+            left = (column - (parent_key[1] << shift)) * TILE_SIZE / (1 << shift)
+            top = (row - (parent_key[2] << shift)) * TILE_SIZE / (1 << shift)
+            width, height = level_size(*self._image_size, level)
+            return parent, QRectF(left, top, min(TILE_SIZE, width - column * TILE_SIZE) / (1 << shift),
+                                  min(TILE_SIZE, height - row * TILE_SIZE) / (1 << shift))
+        return None, None
+
+    # --- Zdarzenia ---
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.schedule_requests()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._image_size is None:
+            return
+        if self._fit:
+            self._scale = self._fit_scale()
+        self._update_scrollbars()
+        self.schedule_requests()
+
+    def scrollContentsBy(self, dx, dy):
+        # Przesunięcie istniejących pikseli - przerysowywany jest tylko odsłonięty pas
+        self.viewport().scroll(dx, dy)
+        self.schedule_requests()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        background = ThemeManager.instance().color('image_background')
+        if self._image_size is None or self._message is not None:
+            painter.fillRect(event.rect(), background)
+            painter.setPen(Qt.white)
+            painter.drawText(self.viewport().rect(), Qt.AlignCenter, self._message or "")
+            return
+        # Pomniejszanie między poziomami piramidy - z wygładzaniem; powiększanie ponad 100% - ostre piksele
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, self._scale < 1)
+        level = self._level()
+        for rect in event.region().rects():
+            painter.fillRect(rect, background)
+            for key in self._tiles_in(rect, level):
+                tile, source = self._cached_or_fallback(key)
+                if tile is not None:
+                    painter.drawImage(self._tile_rect(key), tile, source)
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.zoom(ZOOM_STEP ** steps, event.pos())
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_start = (event.pos(), self.horizontalScrollBar().value(), self.verticalScrollBar().value())
+            self.viewport().setCursor(Qt.ClosedHandCursor)
+        else:
+            super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._drag_start is None:
+            return super().mouseMoveEvent(event)
+        position, x, y = self._drag_start
+        delta = event.pos() - position
+        self.horizontalScrollBar().setValue(x - delta.x())
+        self.verticalScrollBar().setValue(y - delta.y())
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and self._drag_start is not None:
+            self._drag_start = None
+            self.viewport().setCursor(Qt.OpenHandCursor)
+        else:
+            super().mouseReleaseEvent(event)
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        if key in (Qt.Key_Plus, Qt.Key_Equal):
+            self.zoom(ZOOM_STEP)
+        elif key == Qt.Key_Minus:
+            self.zoom(1 / ZOOM_STEP)
+        elif key == Qt.Key_0:
+            self.zoom_to_fit()
+        elif key == Qt.Key_1:
+            self.set_scale(1.0)
+        else:
+            super().keyPressEvent(event)
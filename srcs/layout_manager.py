@@ -53,6 +53,8 @@ def replace_widget_in_parent(old_widget, new_widget):
 
             return True
     elif isinstance(parent, QMainWindow):
+        # takeCentralWidget - setCentralWidget usunąłby (deleteLater) stary widget
+        parent.takeCentralWidget()
         parent.setCentralWidget(new_widget)
         old_widget.setParent(None)
         return True
@@ -82,23 +84,21 @@ def split_widget(target_widget, new_content_widget, title, orientation, first_ha
 
     splitter = QSplitter(orientation)
 
-    # Ważne: zachowaj oryginalny target_widget!
-    # Usuń go tymczasowo z rodzica, aby dodać do splittera
-    # (replace_widget_in_parent zrobi to za nas)
-
-    if first_half:
-        splitter.addWidget(new_tab_panel)
-        splitter.addWidget(target_widget)
-        initial_sizes = [100, 100] # Domyślne równe rozmiary
-    else:
-        splitter.addWidget(target_widget)
-        splitter.addWidget(new_tab_panel)
-        initial_sizes = [100, 100]
-
     # Pobierz oryginalny rozmiar przed zastąpieniem
     original_size = target_widget.size()
 
+    # Ważne: zachowaj oryginalny target_widget!
+    # Najpierw wstaw splitter w miejsce target_widget (replace_widget_in_parent odłączy go od rodzica),
+    # dopiero potem dodaj target_widget do splittera - inaczej rodzicem byłby już nowy splitter.
     if replace_widget_in_parent(target_widget, splitter):
+        if first_half:
+            splitter.addWidget(new_tab_panel)
+            splitter.addWidget(target_widget)
+        else:
+            splitter.addWidget(target_widget)
+            splitter.addWidget(new_tab_panel)
+        initial_sizes = [100, 100] # Domyślne równe rozmiary
+
         # Ustaw rozmiary po dodaniu do layoutu
         total_size = original_size.height() if orientation == Qt.Vertical else original_size.width()
         if total_size > 0:
@@ -245,4 +245,92 @@ def cleanup_empty_splitters(widget):
 
              widget.setParent(None)
              widget.deleteLater()
-             
\ No newline at end of file
+             
+
+# --- Układy zbiorcze (siatka, wyrównanie rozmiarów, rozkład zakładek) ---
+# Drzewo docelowe jest liczone raz i składane bez pośrednich podziałów (split_widget/replace_widget_in_parent),
+# a rozmiary każdego splittera są ustawiane jednym setSizes.
+
+def equal_sizes(total, count):
+    """ Dzieli total na count możliwie równych części (suma = total). """
+    base, extra = divmod(max(total, count), count)
+    return [base + (1 if i < extra else 0) for i in range(count)]
+
+def proportional_sizes(total, weights):
+    """ Dzieli total proporcjonalnie do wag (suma = total). """
+    total = max(total, len(weights))
+    weight_sum = sum(weights)
+    sizes = [total * weight // weight_sum for weight in weights]
+    sizes[-1] += total - sum(sizes)
+    return sizes
+
+def round_robin(items, count):
+    """ Rozkłada elementy na count list: element i trafia do listy i % count. """
+    buckets = [[] for _ in range(count)]
+    for i, item in enumerate(items):
+        buckets[i % count].append(item)
+    return buckets
+
+def build_grid(panels, rows, columns, width, height):
+    """
+    Składa siatkę z rows * columns paneli (kolejno wierszami): pionowy splitter wierszy z poziomymi splitterami
+    kolumn, z równymi rozmiarami. Panele są przenoszone ze starych splitterów. Zwraca korzeń (splitter lub panel).
+    """
+    row_widgets = []
+    for row in range(rows):
+        cells = panels[row * columns:(row + 1) * columns]
+        if columns == 1:
+            row_widgets.append(cells[0])
+            continue
+        splitter = QSplitter(Qt.Horizontal)
+        for panel in cells:
+            splitter.addWidget(panel)
+        splitter.setSizes(equal_sizes(width, columns))
+        row_widgets.append(splitter)
+    if rows == 1:
+        return row_widgets[0]
+    root = QSplitter(Qt.Vertical)
+    for widget in row_widgets:
+        root.addWidget(widget)
+    root.setSizes(equal_sizes(height, rows))
+    return root
+
+def leaf_span(widget, orientation, spans=None):
+    """
+    Ile paneli leży obok siebie w danym kierunku w poddrzewie widget: splitter tej orientacji - suma dzieci,
+    innej - maksimum z dzieci, panel - 1. spans - słownik wyników (każde poddrzewo liczone raz).
+    """
+    if spans is None:
+        spans = {}
+    key = (widget, orientation)
+    if key not in spans:
+        if isinstance(widget, QSplitter) and widget.count():
+            children = [leaf_span(widget.widget(i), orientation, spans) for i in range(widget.count())]
+            spans[key] = sum(children) if widget.orientation() == orientation else max(children)
+        else:
+            spans[key] = 1
+    return spans[key]
+
+def rebalance_splitters(root):
+    """
+    Ustawia rozmiary wszystkich splitterów pod root proporcjonalnie do liczby paneli obok siebie w poddrzewach
+    dzieci - w regularnej siatce wszystkie panele mają ten sam rozmiar. Zwraca liczbę splitterów.
+    """
+    if not isinstance(root, QSplitter):
+        return 0
+    # Tylko splittery drzewa paneli (findChildren znalazłby też splittery wewnątrz treści zakładek)
+    splitters = [root]
+    for splitter in splitters:
+        splitters.extend(child for child in (splitter.widget(i) for i in range(splitter.count()))
+                         if isinstance(child, QSplitter))
+    spans = {}
+    for splitter in splitters:
+        orientation = splitter.orientation()
+        weights = [leaf_span(splitter.widget(i), orientation, spans) for i in range(splitter.count())]
+        if not weights:
+            continue
+        total = sum(splitter.sizes())
+        if total <= 0:
+            total = splitter.width() if orientation == Qt.Horizontal else splitter.height()
+        splitter.setSizes(proportional_sizes(total, weights))
+    return len(splitters)
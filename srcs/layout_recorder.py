@@ -0,0 +1,266 @@
+# layout_recorder.py
+"""
+Nagrywanie i odtwarzanie operacji układu paneli (podział, przeniesienie, ukrycie, przywrócenie...).
+Nagranie to plik JSON Lines z krótkimi kluczami (jak dziennik sesji):
+  {'t': 'start', 'v': 1, 'tabs': [[ID, tytuł], ...], 'windows': [układ okna], 'h': skrót układu}
+  {'t': 's', 'id': ID, 'p': ścieżka, 'o': orientacja, 'b': 1 - nowy panel przed docelowym}  podział panelu
+  {'t': 'm', 'id': ID, 'p': ścieżka}  przeniesienie zakładki do panelu
+  {'t': 'h', 'id': ID}  ukrycie zakładki
+  {'t': 'r', 'id': ID, 'p': ścieżka lub null}  pokazanie ukrytej zakładki (null - brak paneli, nowy panel)
+  {'t': 'w', 'id': ID}  wyrwanie zakładki do nowego okna
+  {'t': 'o', 'id': ID, 'title': tytuł, 'p': ścieżka lub null}  nowa zakładka
+  {'t': 'c', 'id': ID}  zamknięcie zakładki
+  {'t': 'x', 'w': numer okna}  zamknięcie okna
+  {'t': 'g', 'w': numer okna, 'r': wiersze, 'k': kolumny}  siatka paneli z rozłożeniem zakładek
+  {'t': 'd', 'w': numer okna}  rozłożenie zakładek po panelach okna
+  {'t': 'end', 'h': skrót układu}
+Ścieżka panelu to [numer okna, indeksy kolejnych dzieci splitterów od widgetu centralnego], liczona przed
+operacją - w tym samym stanie, w którym będzie ją liczył odtwarzacz. Odtwarzacz (bez ekranu) buduje stan
+początkowy z nagłówka (zakładki zastępcze o tych samych ID), wykonuje operacje bez przerw, mierzy czas każdej
+i porównuje skrót końcowego układu z nagranym.
+Uruchomienie: python layout_recorder.py nagranie.jsonl
+"""
+import hashlib
+import json
+import os
+import sys
+import statistics
+import time
+from functools import partial
+from PyQt5.QtWidgets import QApplication, QSplitter
+from PyQt5.QtCore import Qt, QPoint, QTimer
+
+RECORDING_VERSION = 1
+
+def panel_path(registry, panel):
+    """ Ścieżka panelu w drzewie okna (patrz opis modułu) lub None, jeśli panel nie należy do żadnego okna. """
+    if panel is None:
+        return None
+    path = []
+    widget = panel
+    parent = widget.parentWidget()
+    while isinstance(parent, QSplitter):
+        path.append(parent.indexOf(widget))
+        widget = parent
+        parent = widget.parentWidget()
+    window = widget.window()
+    if window not in registry.windows or window.centralWidget() is not widget:
+        return None
+    path.append(registry.windows.index(window))
+    path.reverse()
+    return path
+
+def panel_at_path(registry, path):
+    """ Panel (DraggableTabWidget) o danej ścieżce lub None. """
+    if not path or path[0] >= len(registry.windows):
+        return None
+    widget = registry.windows[path[0]].centralWidget()
+    for index in path[1:]:
+        if not isinstance(widget, QSplitter) or index >= widget.count():
+            return None
+        widget = widget.widget(index)
+    return None if isinstance(widget, QSplitter) else widget
+
+def layout_signature(registry):
+    """
+    Układ wszystkich okien bez rozmiarów (zależą od ekranu), kolejności zakładek w panelu (przestawiane myszą
+    na pasku, poza nagraniem) i bieżącej zakładki: splitter -> [orientacja, dzieci], panel -> posortowane ID.
+    """
+    def node(widget):
+        if isinstance(widget, QSplitter):
+            return [int(widget.orientation()), [node(widget.widget(i)) for i in range(widget.count())]]
+        return sorted(content.property("tab_id") for content in widget.all_tab_widgets())
+    return [node(window.centralWidget()) if window.centralWidget() is not None else None
+            for window in registry.windows]
+
+def layout_hash(registry):
+    data = json.dumps(layout_signature(registry), separators=(',', ':'))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+
+class LayoutRecorder:
+    """ Zapisuje operacje układu (MainWindow._record_layout) do pliku nagrania; stop() dopisuje skrót końcowy. """
+    def __init__(self, registry, path):
+        self.registry = registry
+        self.path = path
+        self.count = 0
+        self._file = open(path, 'w', encoding='utf-8')
+        tabs = [[tab_id, title] for tab_id, (_, title) in sorted(registry.all_tabs_data.items())]
+        windows = [window.session_layout() for window in registry.windows]
+        self._write({'t': 'start', 'v': RECORDING_VERSION, 'tabs': tabs, 'windows': windows, 'h': layout_hash(registry)})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def record(self, kind, tab_id=None, panel=None, **fields):
+        """ panel - panel docelowy (zamieniany na ścieżkę); wołać przed zmianą układu. """
+        record = {'t': kind}
+        if tab_id is not None:
+            record['id'] = tab_id
+        if panel is not None or kind in ('r', 'o'):
+            record['p'] = panel_path(self.registry, panel)
+        record.update(fields)
+        self._write(record)
+        self.count += 1
+
+    def stop(self):
+        self._write({'t': 'end', 'h': layout_hash(self.registry)})
+        self._file.close()
+        print(f"Layout recording saved to {self.path} ({self.count} operations)")
+
+
+class ReplayError(Exception):
+    pass
+
+
+class LayoutReplayer:
+    """
+    Odtwarza nagranie w nowym rejestrze i oknach (bez ekranu - platforma offscreen). Każda operacja jest
+    wykonywana tymi samymi metodami MainWindow co w aplikacji, a po niej obsługiwane są zdarzenia
+    (odroczone sprzątanie pustych paneli) - zmierzony czas obejmuje oba kroki.
+    """
+    def __init__(self, records):
+        from main_window import MainWindow
+        from tab_registry import TabRegistry
+        self._records = records
+        self._app = QApplication.instance()
+        header = records[0] if records else {}
+        if header.get('t') != 'start' or header.get('v') != RECORDING_VERSION:
+            raise ReplayError("Nieznany format nagrania")
+        self.registry = TabRegistry()
+        self.window = MainWindow(registry=self.registry, populate=False)
+        self._apply_header(header)
+        self.initial_hash_matches = layout_hash(self.registry) == header['h']
+        self.timings = [] # (rodzaj operacji, ms)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+    def _placeholder(self, tab_id, title):
+        content_widget = self.window._create_placeholder_widget(tab_id, title, None)
+        content_widget.setProperty("tab_id", tab_id)
+        self.registry.all_tabs_data[tab_id] = (content_widget, title)
+        self.registry._next_tab_id = max(self.registry._next_tab_id, tab_id + 1)
+        return content_widget
+
+    def _apply_header(self, header):
+        for tab_id, title in header['tabs']:
+            self._placeholder(tab_id, title)
+        for number, window_layout in enumerate(header['windows']):
+            window = self.window if number == 0 else self.window.__class__(registry=self.registry, populate=False)
+            if number > 0:
+                window.setAttribute(Qt.WA_DeleteOnClose)
+            window.setGeometry(*window_layout['g'])
+            root = window._build_session_node(window_layout['root']) if window_layout.get('root') else None
+            if root is not None:
+                window.setCentralWidget(root)
+                window._on_layout_changed()
+            window.show()
+        self._app.processEvents()
+
+    def _panel(self, record):
+        panel = panel_at_path(self.registry, record.get('p'))
+        if panel is None and record.get('p') is not None:
+            raise ReplayError(f"Brak panelu {record['p']}")
+        return panel
+
+    def _take_tab(self, tab_id):
+        """ Wyjmuje zakładkę z panelu jak początek przeciągania; zwraca (widget, tytuł, okno źródłowe). """
+        content_widget, title = self.registry.all_tabs_data[tab_id]
+        source = self.registry.content_widget_to_tab_widget.pop(content_widget, None)
+        if source is None:
+            return content_widget, title, self.window
+        source.discard_tab(content_widget)
+        window = source.window()
+        # Sprzątanie odroczone jak po przeciąganiu - wykona je obsługa zdarzeń po operacji
+        QTimer.singleShot(0, partial(window.cleanup_layout_if_needed, source))
+        return content_widget, title, window
+
+    def apply(self, record):
+        kind = record['t']
+        tab_id = record.get('id')
+        if kind == 's':
+            target = self._panel(record)
+            content_widget, title, window = self._take_tab(tab_id)
+            target.window().split_with_tab(target, content_widget, title, Qt.Orientation(record['o']), bool(record['b']))
+        elif kind == 'm':
+            target = self._panel(record)
+            content_widget, title, _ = self._take_tab(tab_id)
+            target.addTab(content_widget, title)
+            target.setCurrentWidget(content_widget)
+            self.registry.content_widget_to_tab_widget[content_widget] = target
+        elif kind in ('h', 'r'):
+            target = self._panel(record) if kind == 'r' else None
+            window = target.window() if target is not None else self.window
+            window.toggle_or_split_tab(tab_id, target_tab_widget=target)
+        elif kind == 'w':
+            content_widget, title, window = self._take_tab(tab_id)
+            window.tear_off_tab(content_widget, title, QPoint(100, 100))
+        elif kind == 'o':
+            target = self._panel(record)
+            content_widget = self._placeholder(tab_id, record['title'])
+            if target is None:
+                self.window.toggle_or_split_tab(tab_id)
+            else:
+                target.addTab(content_widget, record['title'])
+                self.registry.content_widget_to_tab_widget[content_widget] = target
+        elif kind == 'c':
+            self.window.close_tab(tab_id)
+        elif kind == 'x':
+            self.registry.windows[record['w']].close()
+        elif kind == 'g':
+            self.registry.windows[record['w']].arrange_grid(record['r'], record['k'])
+        elif kind == 'd':
+            self.registry.windows[record['w']].distribute_tabs_round_robin()
+        else:
+            raise ReplayError(f"Nieznana operacja: {kind}")
+
+    def run(self):
+        """ Odtwarza wszystkie operacje; zwraca (skrót końcowego układu, nagrany skrót lub None). """
+        expected = None
+        for record in self._records[1:]:
+            if record['t'] == 'end':
+                expected = record['h']
+                break
+            start = time.perf_counter()
+            self.apply(record)
+            self._app.processEvents()
+            self.timings.append((record['t'], (time.perf_counter() - start) * 1000))
+        return layout_hash(self.registry), expected
+
+    def close(self):
+        for window in list(self.registry.windows):
+            window.close()
+
+    def report(self, final_hash, expected):
+        """ Wypisuje czasy operacji według rodzaju i wynik porównania układu. """
+        names = {'s': 'podział', 'm': 'przeniesienie', 'h': 'ukrycie', 'r': 'przywrócenie', 'w': 'nowe okno',
+                 'o': 'nowa zakładka', 'c': 'zamknięcie', 'x': 'zamknięcie okna', 'g': 'siatka', 'd': 'rozłożenie'}
+        by_kind = {}
+        for kind, ms in self.timings:
+            by_kind.setdefault(kind, []).append(ms)
+        for kind, samples in by_kind.items():
+            print(f"  {names.get(kind, kind)}: n={len(samples)}, median {statistics.median(samples):.2f} ms, "
+                  f"max {max(samples):.2f} ms, razem {sum(samples):.0f} ms")
+        total = sum(ms for _, ms in self.timings)
+        print(f"  wszystkie operacje: {len(self.timings)} w {total:.0f} ms")
+        status = "zgodny" if final_hash == expected else ("brak skrótu w nagraniu" if expected is None else f"RÓŻNY (nagrany {expected})")
+        print(f"  skrót układu: {final_hash} - {status}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Użycie: python layout_recorder.py nagranie.jsonl")
+        sys.exit(2)
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QApplication(sys.argv)
+    replayer = LayoutReplayer.from_file(sys.argv[1])
+    if not replayer.initial_hash_matches:
+        print("Warning: Initial layout differs from the recorded one.")
+    final_hash, expected = replayer.run()
+    print(f"Odtworzenie {sys.argv[1]}:")
+    replayer.report(final_hash, expected)
+    replayer.close()
+    sys.exit(0 if expected is None or final_hash == expected else 1)
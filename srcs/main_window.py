@@ -1,41 +1,100 @@
 # main_window.py
+import os
+import re
 import sys
 from PyQt5.QtWidgets import (
     QMainWindow, QAction, QWidget, QVBoxLayout, QLabel,
-    QFileDialog, QMessageBox, QSplitter, QApplication
+    QFileDialog, QMessageBox, QSplitter, QApplication, QInputDialog, QActionGroup
 )
-from PyQt5.QtCore import Qt, QPoint, pyqtSignal
+from PyQt5.QtCore import Qt, QPoint, QTimer, pyqtSignal
+from PyQt5.QtGui import QCursor
 from functools import partial # Lepsze niż lambda dla slotów
 
 # Używamy względnych importów
-from tab_widget import DraggableTabWidget, TAB_MIME_TYPE, DropIndicator
-from layout_manager import split_widget, cleanup_empty_splitters, find_widget_parent_splitter
+from tab_widget import DraggableTabWidget, TAB_MIME_TYPE, DropIndicator, VIRTUAL_TAB_LIMIT, TARGET_IS_CENTRAL_WIDGET
+from layout_manager import (split_widget, cleanup_empty_splitters, find_widget_parent_splitter,
+                            build_grid, rebalance_splitters, round_robin)
+from panel_index import PanelHitIndex
+from search_index import QuickOpenSearchThread
+from tab_search import TabSearchPopup
+from project_indexer import ProjectIndexThread
+from project_tree import ProjectTreeDock
+from editor import EditorWidget, load_document
+from tab_lifecycle import estimate_widget_memory
+from tab_registry import TabRegistry
+from session_journal import SessionJournal, SESSION_DIR
+from diff_view import DiffModel, DiffPane
+from image_view import ImageView, is_image_file
+from find_results import FindResultsDock, SCOPE_PROJECT
+from text_search import compile_query
+from layout_recorder import LayoutRecorder
+from theme import ThemeManager
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, registry=None, populate=True):
+        """
+        registry - wspólny rejestr zakładek (TabRegistry); okna wyrwanych zakładek dostają rejestr okna głównego.
+        populate - czy dodać początkowe zakładki.
+        """
         super().__init__()
         self.setWindowTitle('Edytor z Podziałem Paneli (Styl VS Code)')
         self.setGeometry(100, 100, 1200, 800)
         self.setAcceptDrops(True)
 
+        # Stan zakładek jest wspólny dla wszystkich okien - poniższe atrybuty to te same obiekty co w rejestrze
+        self.registry = registry if registry is not None else TabRegistry()
+        self.registry.register_window(self)
         # Przechowuje dane o wszystkich zakładkach (widget treści, tytuł, unikalne ID)
-        self.all_tabs_data = {} # key: unique_id, value: (content_widget, title)
+        self.all_tabs_data = self.registry.all_tabs_data # key: unique_id, value: (content_widget, title)
         # Mapuje ID na akcję w menu
         self.tab_toggle_actions = {} # key: unique_id, value: QAction
-        # Mapuje widget treści na QTabWidget, w którym się aktualnie znajduje
-        self.content_widget_to_tab_widget = {}
-        self._next_tab_id = 0
-
-        # Przechowuje informacje o przeciąganej zakładce (globalnie w oknie)
-        self._dragged_content_widget_ref = None # Użyj słabego odwołania lub ID
-        self._dragged_tab_title_ref = ""
-        self._source_tab_widget_ref = None # Skąd przeciągnięto
+        self._tools_menu_dirty = True # Menu 'Narzędzia' przebudowywane leniwie (aboutToShow)
+        # Mapuje widget treści na QTabWidget (w dowolnym oknie), w którym się aktualnie znajduje
+        self.content_widget_to_tab_widget = self.registry.content_widget_to_tab_widget
+        # Opis zakładki pozwalający odtworzyć jej widget po zwolnieniu (kind + parametry fabryki)
+        self.tab_descriptors = self.registry.tab_descriptors # key: unique_id, value: dict, np. {'kind': 'editor', 'file_path': ...}
+        # Fabryki widgetów treści według rodzaju zakładki: f(tab_id, title, descriptor) -> QWidget
+        self.content_factories = {
+            'placeholder': self._create_placeholder_widget,
+            'editor': self._create_editor_widget,
+            'image': self._create_image_widget,
+        }
+        # Ukryte zakładki, których widgety można zwolnić (LRU z budżetem pamięci)
+        self.hidden_tabs = self.registry.hidden_tabs
+        # Weakrefy zamkniętych zakładek i usuniętych paneli - do wykrywania wycieków
+        self.leak_tracker = self.registry.leak_tracker
+        # Limit zakładek w QTabBar dla trybu wirtualnego (None = wyłączony), stosowany do każdego panelu
+        self.virtual_tab_limit = None
+
+        # Informacje o przeciąganej zakładce trzyma rejestr (drop może nastąpić w innym oknie)
+
+        # Indeks tytułów/ścieżek wszystkich zakładek dla palety "przejdź do zakładki"
+        self.search_index = self.registry.search_index
+        self.quick_open_thread = QuickOpenSearchThread(self.search_index, self)
+        self.quick_open_thread.resultsReady.connect(self._on_quick_open_results)
+        self.quick_open_thread.start()
+        self._quick_open_popup = None
+        self._quick_open_generation = 0
+
+        # Mapuje ścieżkę otwartego pliku na ID zakładki
+        self.file_path_to_tab_id = self.registry.file_path_to_tab_id
+        # Projekt (folder) indeksowany w tle
+        self.project_index = None
+        self._project_thread = None
+        self.project_tree_dock = None
+        self.find_results_dock = None # Panel "Znajdź w plikach" tworzony przy pierwszym użyciu
+
+        # Paleta motywu jest ustawiana raz na QApplication (pierwsze okno), nie na widgetach
+        ThemeManager.instance().ensure_applied()
 
         # --- PRZENIESIONA INICJALIZACJA ---
-        # Wskaźnik upuszczania (jeden dla całego okna)
+        # Wskaźnik upuszczania (jeden dla całego okna, współdzielony przez jego panele)
         self.drop_indicator = DropIndicator(self)
         # ---------------------------------
 
+        # Indeks prostokątów paneli do trafiania kursorem (przebudowywany po zmianie layoutu)
+        self.panel_index = PanelHitIndex(self)
+
         # Inicjalizacja - zaczynamy od jednego panelu
         initial_tab_widget = DraggableTabWidget()
         self.setCentralWidget(initial_tab_widget)
@@ -45,53 +104,393 @@ class MainWindow(QMainWindow):
         self.create_menu()
 
         # Dodanie początkowych zakładek
-        self.add_new_tab(title="Zakładka 1", make_current=True)
-        self.add_new_tab(title="Zakładka 2")
-        self.add_new_tab(title="Zakładka 3")
-        self.add_new_tab(title="Zakładka 4")
-        self.add_new_tab(title="Zakładka 5")
+        if populate:
+            self.add_new_tab(title="Zakładka 1", make_current=True)
+            self.add_new_tab(title="Zakładka 2")
+            self.add_new_tab(title="Zakładka 3")
+            self.add_new_tab(title="Zakładka 4")
+            self.add_new_tab(title="Zakładka 5")
 
     
 
     def get_unique_tab_id(self):
-        """ Generuje unikalne ID dla zakładki. """
-        id_val = self._next_tab_id
-        self._next_tab_id += 1
-        return id_val
-
-    def add_new_tab(self, content_widget=None, title="Nowa Zakładka", target_tab_widget=None, make_current=False):
-        """ Dodaje nową zakładkę do wskazanego panelu lub pierwszego znalezionego. """
+        """ Generuje unikalne ID dla zakładki (wspólny licznik wszystkich okien). """
+        return self.registry.next_tab_id()
+
+    def add_new_tab(self, content_widget=None, title="Nowa Zakładka", target_tab_widget=None, make_current=False,
+                    file_path=None, descriptor=None):
+        """
+        Dodaje nową zakładkę do wskazanego panelu lub pierwszego znalezionego.
+        descriptor (np. {'kind': 'editor', 'file_path': ...}) pozwala zwolnić widget ukrytej zakładki
+        i odtworzyć go później; zakładki bez niego nigdy nie są zwalniane.
+        Bez content_widget widget tworzy fabryka z content_factories według descriptor (domyślnie 'placeholder').
+        """
         tab_id = self.get_unique_tab_id()
 
         if content_widget is None:
-            content_widget = QWidget()
-            layout = QVBoxLayout()
-            label = QLabel(f'Zawartość zakładki ID: {tab_id}\nTytuł: {title}')
-            layout.addWidget(label)
-            content_widget.setLayout(layout)
-            # Zapisz ID w widgecie, aby łatwiej go odnaleźć
-            content_widget.setProperty("tab_id", tab_id)
+            if descriptor is None:
+                descriptor = {'kind': 'placeholder'}
+            content_widget = self.content_factories[descriptor['kind']](tab_id, title, descriptor)
+        if descriptor is not None:
+            self.tab_descriptors[tab_id] = descriptor
+
+        # Zapisz ID (i ścieżkę pliku) w widgecie, aby łatwiej go odnaleźć
+        content_widget.setProperty("tab_id", tab_id)
+        if file_path:
+            content_widget.setProperty("file_path", file_path)
+            self.file_path_to_tab_id[file_path] = tab_id
 
         self.all_tabs_data[tab_id] = (content_widget, title)
+        self.search_index.add(tab_id, title, file_path)
 
         if target_tab_widget is None:
             target_tab_widget = self.find_first_tab_widget()
-            if target_tab_widget is None: # Jeśli nie ma żadnego, stwórz pierwszy
-                target_tab_widget = DraggableTabWidget()
-                self.setCentralWidget(target_tab_widget)
-                self.connect_tab_widget_signals(target_tab_widget)
+        self._record_layout('o', tab_id, target_tab_widget, title=title)
+        if target_tab_widget is None: # Jeśli nie ma żadnego, stwórz pierwszy
+            target_tab_widget = DraggableTabWidget()
+            self.setCentralWidget(target_tab_widget)
+            self.connect_tab_widget_signals(target_tab_widget)
+            self._on_layout_changed()
 
         target_tab_widget.addTab(content_widget, title)
         self.content_widget_to_tab_widget[content_widget] = target_tab_widget
 
         if make_current:
             target_tab_widget.setCurrentWidget(content_widget)
+        # Zadania fabryki (wczytywanie w tle) zlecone przed dodaniem do panelu - przelicz ich priorytet
+        self.registry.task_runner.reprioritize()
+
+        if self.registry.journal is not None:
+            self.registry.journal.tab_opened(tab_id, title, descriptor, content_widget)
 
         # Zaktualizuj menu (dodaj nową akcję, jeśli trzeba)
         self.update_tools_menu()
 
         return tab_id, content_widget
 
+    def rename_tab(self, tab_id, title):
+        """ Zmienia tytuł zakładki (panel, menu i indeks wyszukiwania). """
+        if tab_id not in self.all_tabs_data:
+            print(f"Error: Tab with ID {tab_id} not found.")
+            return
+        content_widget, _ = self.all_tabs_data[tab_id]
+        self.all_tabs_data[tab_id] = (content_widget, title)
+        tab_widget = self.find_tab_widget_for_content(content_widget) if content_widget else None
+        if tab_widget:
+            tab_widget.set_tab_title(content_widget, title)
+        self.search_index.add(tab_id, title, self.tab_descriptors.get(tab_id, {}).get('file_path'))
+        if self.registry.journal is not None:
+            self.registry.journal.tab_renamed(tab_id, title)
+        self.update_tools_menu()
+
+    # --- Cykl życia zakładek ---
+    def _create_placeholder_widget(self, tab_id, title, descriptor):
+        content_widget = QWidget()
+        layout = QVBoxLayout()
+        label = QLabel(f'Zawartość zakładki ID: {tab_id}\nTytuł: {title}')
+        layout.addWidget(label)
+        content_widget.setLayout(layout)
+        return content_widget
+
+    def _create_editor_widget(self, tab_id, title, descriptor):
+        # Plik wczytywany w tle - zakładka pojawia się od razu, a treść po zakończeniu zadania
+        editor = EditorWidget(file_path=descriptor['file_path'], loading=True)
+        self.registry.task_runner.submit(partial(load_document, descriptor['file_path'], editor.font()),
+                                         on_done=partial(self._on_editor_loaded, tab_id, editor),
+                                         on_error=partial(self._on_content_load_failed, tab_id),
+                                         owner=tab_id)
+        return editor
+
+    def _create_image_widget(self, tab_id, title, descriptor):
+        # Piramida kafli wspólna dla widoków pliku, budowana w puli z priorytetem zakładki
+        return ImageView(descriptor['file_path'], self.registry.task_runner, tab_id)
+
+    def _on_editor_loaded(self, tab_id, editor, loaded):
+        if loaded is None:
+            return # Przerwane
+        editor.finish_loading(*loaded)
+        if self.registry.journal is not None:
+            self.registry.journal.watch(tab_id, editor) # Edycje śledzone od wczytanej treści
+
+    def _on_content_load_failed(self, tab_id, message):
+        """ Treści zakładki nie udało się wczytać w tle - ostrzeżenie i zamknięcie zakładki. """
+        if tab_id not in self.all_tabs_data:
+            return
+        content_widget, title = self.all_tabs_data[tab_id]
+        parent = content_widget.window() if content_widget is not None else None
+        QMessageBox.warning(parent, "Otwórz plik", f"Nie można wczytać zakładki '{title}':\n{message}")
+        self.close_tab(tab_id)
+
+    def _recreate_content_widget(self, tab_id):
+        """ Odtwarza zwolniony widget zakładki z jej opisu. Zwraca widget lub None. """
+        _, title = self.all_tabs_data[tab_id]
+        descriptor = self.tab_descriptors.get(tab_id)
+        factory = self.content_factories.get(descriptor['kind']) if descriptor else None
+        if factory is None:
+            print(f"Error: Cannot recreate tab ID {tab_id} - no descriptor/factory.")
+            return None
+        try:
+            content_widget = factory(tab_id, title, descriptor)
+        except OSError as e:
+            QMessageBox.warning(self, "Przywróć zakładkę", f"Nie można odtworzyć zakładki '{title}':\n{e}")
+            return None
+        content_widget.setProperty("tab_id", tab_id)
+        if descriptor.get('file_path'):
+            content_widget.setProperty("file_path", descriptor['file_path'])
+        self.all_tabs_data[tab_id] = (content_widget, title)
+        if self.registry.journal is not None:
+            self.registry.journal.tab_opened(tab_id, title, descriptor, content_widget)
+        print(f"Recreated content widget for tab ID {tab_id} ('{title}')")
+        return content_widget
+
+    def _is_evictable(self, tab_id, content_widget):
+        """ Widget można zwolnić, jeśli da się go odtworzyć i nie ma niezapisanych zmian. """
+        if tab_id not in self.tab_descriptors:
+            return False
+        document = getattr(content_widget, 'document', None)
+        return not (document is not None and document().isModified())
+
+    def _release_content_widget(self, content_widget, description):
+        """ Usuwa widget treści (deleteLater) i rejestruje go w wykrywaczu wycieków. """
+        highlighter = getattr(content_widget, 'highlighter', None)
+        if highlighter is not None:
+            highlighter.stop_worker()
+        stop_worker = getattr(content_widget, 'stop_worker', None)
+        if stop_worker is not None:
+            stop_worker()
+        self.content_widget_to_tab_widget.pop(content_widget, None)
+        content_widget.setParent(None)
+        content_widget.deleteLater()
+        self.leak_tracker.track(content_widget, description)
+
+    def _detach_hidden_tab(self, tab_id, content_widget):
+        """ Rejestruje zakładkę (już usuniętą z panelu) jako ukrytą i odłącza jej widget od okna. """
+        self.content_widget_to_tab_widget.pop(content_widget, None)
+        if self.registry.task_runner.cancel_owner(tab_id) and getattr(content_widget, 'is_loading', False):
+            # Treść nie zdążyła się wczytać - widget zostanie odtworzony (i wczytany) przy pokazaniu
+            _, title = self.all_tabs_data[tab_id]
+            self.all_tabs_data[tab_id] = (None, title)
+            self._release_content_widget(content_widget, f"unloaded tab {tab_id} ('{title}')")
+            return
+        # Odłącz od panelu - inaczej widget zginąłby razem z usuniętym (pustym) panelem lub zamkniętym oknem
+        content_widget.setParent(None)
+        if self._is_evictable(tab_id, content_widget):
+            self.hidden_tabs.add(tab_id, estimate_widget_memory(content_widget))
+            self._enforce_hidden_tabs_budget()
+
+    def _enforce_hidden_tabs_budget(self):
+        """ Zwalnia widgety najdawniej ukrytych zakładek ponad budżet; zostaje tylko ich opis. """
+        for tab_id in self.hidden_tabs.evict_over_budget():
+            content_widget, title = self.all_tabs_data[tab_id]
+            if content_widget is None:
+                continue
+            print(f"Evicting widget of hidden tab ID {tab_id} ('{title}')")
+            self.all_tabs_data[tab_id] = (None, title)
+            self._release_content_widget(content_widget, f"evicted tab {tab_id} ('{title}')")
+
+    def close_tab(self, tab_id):
+        """ Zamyka zakładkę na stałe: usuwa ją z panelu, rejestrów, menu i indeksu wyszukiwania. """
+        if tab_id not in self.all_tabs_data:
+            print(f"Error: Tab with ID {tab_id} not found.")
+            return False
+        content_widget, title = self.all_tabs_data[tab_id]
+        self.registry.task_runner.cancel_owner(tab_id)
+        if content_widget is not None:
+            document = getattr(content_widget, 'document', None)
+            if document is not None and document().isModified():
+                answer = QMessageBox.question(self, "Zamknij zakładkę",
+                                              f"Zakładka '{title}' ma niezapisane zmiany. Zamknąć mimo to?")
+                if answer != QMessageBox.Yes:
+                    return False
+        self._record_layout('c', tab_id)
+        if content_widget is not None:
+            tab_widget = self.find_tab_widget_for_content(content_widget)
+            if tab_widget:
+                tab_widget.discard_tab(content_widget)
+                QTimer.singleShot(0, partial(tab_widget.window().cleanup_layout_if_needed, tab_widget))
+            self._release_content_widget(content_widget, f"closed tab {tab_id} ('{title}')")
+
+        print(f"Closing tab ID {tab_id} ('{title}')")
+        del self.all_tabs_data[tab_id]
+        descriptor = self.tab_descriptors.pop(tab_id, None)
+        if descriptor and descriptor.get('file_path'):
+            self.file_path_to_tab_id.pop(descriptor['file_path'], None)
+        self.hidden_tabs.remove(tab_id)
+        self.search_index.remove(tab_id)
+        if self.registry.journal is not None:
+            self.registry.journal.tab_closed(tab_id)
+        self.update_tools_menu()
+        return True
+
+    def close_tab_for_content(self, content_widget):
+        tab_id = content_widget.property("tab_id")
+        if tab_id is not None:
+            self.close_tab(tab_id)
+
+    def close_current_tab(self):
+        tab_widget = self.find_focused_tab_widget()
+        if tab_widget and tab_widget.currentWidget() is not None:
+            self.close_tab_for_content(tab_widget.currentWidget())
+
+    def report_leaks(self):
+        """ Wypisuje zamknięte zakładki i usunięte panele, które nie zostały zwolnione. """
+        leaks = self.leak_tracker.leaks()
+        if leaks:
+            print(f"Leak check: {len(leaks)} object(s) still alive:")
+            for description in leaks:
+                print(f"  - {description}")
+        else:
+            print("Leak check: all closed tabs and removed panels were freed.")
+        return leaks
+
+    def rename_current_tab(self):
+        tab_widget = self.find_focused_tab_widget()
+        if not tab_widget or tab_widget.currentWidget() is None:
+            return
+        tab_id = tab_widget.currentWidget().property("tab_id")
+        if tab_id is None or tab_id not in self.all_tabs_data:
+            return
+        title, ok = QInputDialog.getText(self, 'Zmień nazwę zakładki', 'Nowy tytuł:', text=self.all_tabs_data[tab_id][1])
+        if ok and title:
+            self.rename_tab(tab_id, title)
+
+    def activate_tab(self, tab_id):
+        """ Przełącza na zakładkę o danym ID; ukrytą najpierw pokazuje. """
+        if tab_id not in self.all_tabs_data:
+            return
+        content_widget, tab_widget = self.find_tab_widget_by_id(tab_id)
+        if content_widget is None or tab_widget is None:
+            self.toggle_or_split_tab(tab_id) # Pokaż ukrytą zakładkę w aktywnym panelu
+            return
+        tab_widget.setCurrentWidget(content_widget)
+        content_widget.setFocus()
+
+    def show_quick_open(self):
+        """ Paleta "przejdź do zakładki" - ranking wyników liczony w wątku quick_open_thread. """
+        if self._quick_open_popup is None:
+            self._quick_open_popup = TabSearchPopup(None, self, placeholder="Przejdź do zakładki...")
+            self._quick_open_popup.queryChanged.connect(self._request_quick_open)
+            self._quick_open_popup.itemChosen.connect(self._on_quick_open_chosen)
+        popup = self._quick_open_popup
+        popup.popup_at(self.mapToGlobal(self.rect().center() - popup.rect().center()))
+
+    def _on_quick_open_chosen(self, key):
+        # Klucze ('file', ścieżka) pochodzą z indeksu projektu, pozostałe to ID zakładek
+        if isinstance(key, tuple) and key[0] == 'file':
+            self.open_path(key[1])
+        else:
+            self.activate_tab(key)
+
+    def _request_quick_open(self, query):
+        self._quick_open_generation = self.quick_open_thread.request(query)
+
+    def _on_quick_open_results(self, generation, results):
+        # Wyniki dla starszych zapytań są pomijane
+        if self._quick_open_popup is not None and generation == self._quick_open_generation:
+            self._quick_open_popup.set_results(results)
+
+    # --- Znajdź w plikach ---
+    def show_find_in_files(self):
+        """ Pokazuje panel wyszukiwania; zapytanie wstępnie wypełnia zaznaczenie aktywnego edytora. """
+        if self.find_results_dock is None:
+            self.find_results_dock = FindResultsDock(self)
+            self.find_results_dock.searchRequested.connect(self.find_in_files)
+            self.find_results_dock.searchCancelled.connect(self.registry.find_thread.cancel)
+            self.find_results_dock.resultActivated.connect(self._on_find_result_activated)
+            self.registry.find_thread.resultsFound.connect(self._on_find_results)
+            self.registry.find_thread.searchFinished.connect(self.find_results_dock.finish)
+            self.registry.find_thread.searchSuperseded.connect(self.find_results_dock.supersede)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.find_results_dock)
+        selection = ''
+        tab_widget = self.find_focused_tab_widget()
+        current = tab_widget.currentWidget() if tab_widget else None
+        if isinstance(current, EditorWidget):
+            selection = current.textCursor().selectedText()
+        self.find_results_dock.show()
+        self.find_results_dock.focus_query(selection if '\u2029' not in selection else None)
+
+    def find_in_files(self, query, regex, case_sensitive, scope):
+        """
+        Zleca wyszukiwanie w otwartych zakładkach (scope SCOPE_OPEN_TABS) lub także w plikach projektu.
+        Wczytane edytory są przeszukiwane w migawce tekstu (z niezapisanymi zmianami),
+        zakładki zwolnione lub jeszcze wczytywane - w pliku na dysku.
+        """
+        try:
+            pattern, flags, literal = compile_query(query, regex, case_sensitive)
+        except re.error as e:
+            self.find_results_dock.show_error(f"Błędne wyrażenie: {e}")
+            return
+        buffers = []
+        paths = []
+        buffered_paths = set()
+        for tab_id, (content_widget, _) in self.all_tabs_data.items():
+            file_path = self.tab_descriptors.get(tab_id, {}).get('file_path')
+            if isinstance(content_widget, EditorWidget) and not content_widget.is_loading:
+                buffers.append((('tab', tab_id), content_widget.toPlainText()))
+                if file_path:
+                    buffered_paths.add(file_path)
+            elif file_path:
+                paths.append(file_path)
+        if scope == SCOPE_PROJECT and self.project_index is not None:
+            opened = buffered_paths.union(paths)
+            paths.extend(path for path in map(self.project_index.absolute_path, self.project_index.iter_files())
+                         if path not in opened)
+        generation = self.registry.find_thread.request(pattern, flags, literal, buffers, paths)
+        self.find_results_dock.start(generation)
+
+    def _find_source_label(self, key):
+        kind, value = key
+        if kind == 'tab':
+            return self.all_tabs_data.get(value, (None, f"Zakładka {value}"))[1]
+        if self.project_index is not None and value.startswith(self.project_index.root + os.sep):
+            return os.path.relpath(value, self.project_index.root)
+        return value
+
+    def _on_find_results(self, generation, items):
+        self.find_results_dock.add_results(generation, items, self._find_source_label)
+
+    def _on_find_result_activated(self, key, line, column, length):
+        kind, value = key
+        if kind == 'tab':
+            if value not in self.all_tabs_data:
+                return # Zakładka zamknięta po wyszukiwaniu
+            self.activate_tab(value)
+            tab_id = value
+        else:
+            tab_id = self.open_path(value)
+        content_widget = self.all_tabs_data.get(tab_id, (None, None))[0]
+        if isinstance(content_widget, EditorWidget):
+            content_widget.go_to(line, column, length)
+            content_widget.setFocus()
+
+    def closeEvent(self, event):
+        if self.find_results_dock is not None:
+            self.find_results_dock.cancel()
+            self.registry.find_thread.resultsFound.disconnect(self._on_find_results)
+            self.registry.find_thread.searchFinished.disconnect(self.find_results_dock.finish)
+            self.registry.find_thread.searchSuperseded.disconnect(self.find_results_dock.supersede)
+        if self._project_thread is not None:
+            self._project_thread.requestInterruption()
+            self._project_thread.wait()
+        self.quick_open_thread.stop()
+        # Zamknięcie ostatniego okna kończy aplikację - zapisz sesję, zanim zakładki zostaną odłączone
+        if self.registry.windows == [self]:
+            self.stop_layout_recording()
+            if self.registry.journal is not None:
+                self.registry.journal.shutdown()
+            self.registry.task_runner.stop()
+        elif self in self.registry.windows and any(panel.total_count() for panel in self.find_all_tab_widgets()):
+            # Puste okno zamyka samo sprzątanie układu - także przy odtwarzaniu, więc nie jest nagrywane
+            self._record_layout('x', w=self.registry.windows.index(self))
+        # Zakładki zamykanego okna stają się ukryte - można je pokazać z menu 'Narzędzia' innego okna
+        for tab_widget in self.find_all_tab_widgets():
+            for content_widget in tab_widget.all_tab_widgets():
+                tab_widget.discard_tab(content_widget)
+                self._detach_hidden_tab(content_widget.property("tab_id"), content_widget)
+        self.registry.unregister_window(self)
+        self.update_tools_menu()
+        super().closeEvent(event)
+
     def find_tab_widget_for_content(self, content_widget_to_find):
         """ Znajduje QTabWidget zawierający dany widget treści. """
         return self.content_widget_to_tab_widget.get(content_widget_to_find)
@@ -135,8 +534,15 @@ class MainWindow(QMainWindow):
         file_menu = menu_bar.addMenu('Plik')
         # ... (Akcje Plik bez zmian - Otwórz, Zapisz, Zamknij) ...
         open_action = QAction('Otwórz', self)
-        # open_action.triggered.connect(self.open_file) # Dodaj metody później
+        open_action.setShortcut('Ctrl+O')
+        open_action.triggered.connect(self.open_file)
         file_menu.addAction(open_action)
+        compare_action = QAction('Porównaj pliki...', self)
+        compare_action.triggered.connect(self.compare_files_dialog)
+        file_menu.addAction(compare_action)
+        open_project_action = QAction('Otwórz folder projektu...', self)
+        open_project_action.triggered.connect(self.open_project_dialog)
+        file_menu.addAction(open_project_action)
         save_action = QAction('Zapisz', self)
         # save_action.triggered.connect(self.save_file) # Dodaj metody później
         file_menu.addAction(save_action)
@@ -145,12 +551,110 @@ class MainWindow(QMainWindow):
         exit_action.triggered.connect(self.close)
         file_menu.addAction(exit_action)
 
+        # Menu "Widok" - nawigacja klawiaturą między panelami
+        view_menu = menu_bar.addMenu('Widok')
+        for direction, label, shortcut in (
+            ('left', 'Przenieś zakładkę do panelu w lewo', 'Ctrl+Alt+Left'),
+            ('right', 'Przenieś zakładkę do panelu w prawo', 'Ctrl+Alt+Right'),
+            ('up', 'Przenieś zakładkę do panelu wyżej', 'Ctrl+Alt+Up'),
+            ('down', 'Przenieś zakładkę do panelu niżej', 'Ctrl+Alt+Down'),
+        ):
+            move_action = QAction(label, self)
+            move_action.setShortcut(shortcut)
+            move_action.triggered.connect(partial(self.move_current_tab_to_neighbour, direction))
+            view_menu.addAction(move_action)
+        view_menu.addSeparator()
+        virtual_tabs_action = QAction('Wirtualny pasek zakładek', self)
+        virtual_tabs_action.setCheckable(True)
+        virtual_tabs_action.toggled.connect(self.set_tab_virtualization)
+        view_menu.addAction(virtual_tabs_action)
+        search_tab_action = QAction('Szukaj zakładki w panelu...', self)
+        search_tab_action.setShortcut('Ctrl+Shift+E')
+        search_tab_action.triggered.connect(self.show_tab_search_in_focused_panel)
+        view_menu.addAction(search_tab_action)
+        quick_open_action = QAction('Przejdź do zakładki...', self)
+        quick_open_action.setShortcut('Ctrl+P')
+        quick_open_action.triggered.connect(self.show_quick_open)
+        view_menu.addAction(quick_open_action)
+        close_tab_action = QAction('Zamknij zakładkę', self)
+        close_tab_action.setShortcut('Ctrl+W')
+        close_tab_action.triggered.connect(self.close_current_tab)
+        view_menu.addAction(close_tab_action)
+        new_window_action = QAction('Przenieś zakładkę do nowego okna', self)
+        new_window_action.setShortcut('Ctrl+Alt+N')
+        new_window_action.triggered.connect(self.move_current_tab_to_new_window)
+        view_menu.addAction(new_window_action)
+        rename_action = QAction('Zmień nazwę zakładki...', self)
+        rename_action.setShortcut('F2')
+        rename_action.triggered.connect(self.rename_current_tab)
+        view_menu.addAction(rename_action)
+        view_menu.addSeparator()
+        find_in_files_action = QAction('Znajdź w plikach...', self)
+        find_in_files_action.setShortcut('Ctrl+Shift+F')
+        find_in_files_action.triggered.connect(self.show_find_in_files)
+        view_menu.addAction(find_in_files_action)
+        self.record_layout_action = QAction('Nagrywaj operacje układu...', self)
+        self.record_layout_action.setCheckable(True)
+        self.record_layout_action.toggled.connect(self.toggle_layout_recording)
+        view_menu.addAction(self.record_layout_action)
+        view_menu.addSeparator()
+        layout_menu = view_menu.addMenu('Układ paneli')
+        for rows, columns, shortcut in ((1, 2, None), (2, 2, 'Ctrl+Alt+2'), (3, 3, 'Ctrl+Alt+3'), (4, 4, 'Ctrl+Alt+4')):
+            grid_action = QAction(f'Siatka {rows}x{columns}', self)
+            if shortcut:
+                grid_action.setShortcut(shortcut)
+            grid_action.triggered.connect(partial(self.arrange_grid, rows, columns))
+            layout_menu.addAction(grid_action)
+        custom_grid_action = QAction('Siatka...', self)
+        custom_grid_action.setShortcut('Ctrl+Alt+G')
+        custom_grid_action.triggered.connect(self.arrange_grid_dialog)
+        layout_menu.addAction(custom_grid_action)
+        layout_menu.addSeparator()
+        rebalance_action = QAction('Wyrównaj rozmiary paneli', self)
+        rebalance_action.setShortcut('Ctrl+Alt+=')
+        rebalance_action.triggered.connect(self.rebalance_layout)
+        layout_menu.addAction(rebalance_action)
+        distribute_action = QAction('Rozłóż zakładki po panelach', self)
+        distribute_action.setShortcut('Ctrl+Alt+D')
+        distribute_action.triggered.connect(self.distribute_tabs_round_robin)
+        layout_menu.addAction(distribute_action)
+        theme_menu = view_menu.addMenu('Motyw')
+        theme_group = QActionGroup(self)
+        self.theme_actions = {}
+        manager = ThemeManager.instance()
+        for name, theme in manager.themes.items():
+            theme_action = QAction(theme['title'], self, checkable=True)
+            theme_action.setChecked(name == manager.name)
+            theme_action.triggered.connect(partial(self.set_theme, name))
+            theme_group.addAction(theme_action)
+            theme_menu.addAction(theme_action)
+            self.theme_actions[name] = theme_action
+
         # Menu "Narzędzia" będzie aktualizowane dynamicznie
         self.tools_menu = menu_bar.addMenu('Narzędzia')
+        self.tools_menu.aboutToShow.connect(self._rebuild_tools_menu_if_needed)
         self.update_tools_menu()
 
     def update_tools_menu(self):
+        """
+        Oznacza menu 'Narzędzia' wszystkich okien jako nieaktualne. Przebudowa (O(liczba zakładek))
+        następuje dopiero przy otwarciu menu, a nie po każdej zmianie zakładek.
+        """
+        self.registry.mark_menus_dirty()
+        # Zmiana zakładek to też zmiana układu sesji
+        self._mark_session_layout_dirty()
+
+    def _mark_session_layout_dirty(self, *args):
+        if self.registry.journal is not None:
+            self.registry.journal.mark_layout_dirty()
+
+    def _rebuild_tools_menu_if_needed(self):
+        if self._tools_menu_dirty:
+            self._rebuild_tools_menu()
+
+    def _rebuild_tools_menu(self):
         """ Czyści i ponownie tworzy menu 'Narzędzia' na podstawie aktualnych zakładek. """
+        self._tools_menu_dirty = False
         self.tools_menu.clear()
         self.tab_toggle_actions.clear() # Wyczyść stare akcje
 
@@ -173,12 +677,18 @@ class MainWindow(QMainWindow):
             self.tab_toggle_actions[tab_id] = toggle_action
 
 
-    def toggle_or_split_tab(self, tab_id):
-        """ Pokazuje zakładkę (w aktywnym panelu lub nowym podziale) lub ją ukrywa. """
-        content_widget, title = self.all_tabs_data.get(tab_id, (None, None))
-        if not content_widget:
+    def toggle_or_split_tab(self, tab_id, *, target_tab_widget=None):
+        """ Pokazuje zakładkę (w target_tab_widget, aktywnym panelu lub nowym podziale) lub ją ukrywa. """
+        if tab_id not in self.all_tabs_data:
             print(f"Error: Tab with ID {tab_id} not found.")
             return
+        content_widget, title = self.all_tabs_data[tab_id]
+        if content_widget is None:
+            # Widget zwolniony (budżet pamięci) - odtwórz go z opisu
+            content_widget = self._recreate_content_widget(tab_id)
+            if content_widget is None:
+                return
+        self.hidden_tabs.remove(tab_id)
 
         existing_tab_widget = self.find_tab_widget_for_content(content_widget)
         action = self.tab_toggle_actions.get(tab_id) # Pobierz akcję dla aktualizacji stanu
@@ -186,16 +696,16 @@ class MainWindow(QMainWindow):
         if existing_tab_widget:
             # --- UKRYJ ---
             # Jeśli zakładka jest widoczna, ukryj ją (usuń z panelu)
-            tab_index = existing_tab_widget.indexOf(content_widget)
-            if tab_index != -1:
+            # discard_tab działa też dla zakładek z listy przepełnienia (tryb wirtualny)
+            self._record_layout('h', tab_id)
+            if existing_tab_widget.discard_tab(content_widget):
                 print(f"Hiding tab ID {tab_id} ('{title}')")
-                existing_tab_widget.removeTab(tab_index)
-                del self.content_widget_to_tab_widget[content_widget] # Usuń rejestrację
+                self._detach_hidden_tab(tab_id, content_widget)
 
                 # Sprawdź, czy panel stał się pusty i posprzątaj
                 # Użyj QTimer.singleShot, aby sprzątanie odbyło się po zakończeniu bieżącego eventu
-                from PyQt5.QtCore import QTimer
-                QTimer.singleShot(0, partial(self.cleanup_layout_if_needed, existing_tab_widget))
+                # Panel może należeć do innego okna - sprząta okno, które go zawiera
+                QTimer.singleShot(0, partial(existing_tab_widget.window().cleanup_layout_if_needed, existing_tab_widget))
 
                 if action: action.setChecked(False) # Aktualizuj stan menu
             else:
@@ -209,10 +719,11 @@ class MainWindow(QMainWindow):
             # --- POKAŻ / PODZIEL ---
             # Jeśli zakładka jest ukryta, pokaż ją
             # Znajdź aktywny/ostatnio używany panel lub pierwszy dostępny
-            target_widget = self.find_focused_tab_widget()
+            target_widget = target_tab_widget or self.find_focused_tab_widget()
             if not target_widget:
                 target_widget = self.find_first_tab_widget()
 
+            self._record_layout('r', tab_id, target_widget)
             print(f"Showing tab ID {tab_id} ('{title}')")
             if target_widget:
                 # Dodaj do istniejącego panelu
@@ -227,6 +738,7 @@ class MainWindow(QMainWindow):
                 new_tab_widget = DraggableTabWidget()
                 self.setCentralWidget(new_tab_widget)
                 self.connect_tab_widget_signals(new_tab_widget)
+                self._on_layout_changed()
                 new_tab_widget.addTab(content_widget, title)
                 self.content_widget_to_tab_widget[content_widget] = new_tab_widget
                 new_tab_widget.setFocus()
@@ -259,6 +771,76 @@ class MainWindow(QMainWindow):
 
         # Ważne: Połącz wskaźnik upuszczania z tym panelem
         tab_widget.drop_indicator = self.drop_indicator
+        self.panel_index.watch(tab_widget)
+        tab_widget.contentCloseRequested.connect(self.close_tab_for_content)
+        tab_widget.tabDragStarted.connect(self._on_tab_drag_started)
+        tab_widget.tabDragFinished.connect(self._on_tab_drag_finished)
+        # Zmiana bieżącej zakładki zmienia kolejność wczytywania w tle
+        tab_widget.currentChanged.connect(self.registry.task_runner.reprioritize)
+        tab_widget.set_virtual_tab_limit(self.virtual_tab_limit)
+
+    def set_tab_virtualization(self, enabled):
+        """ Włącza/wyłącza wirtualny pasek zakładek we wszystkich panelach. """
+        self.virtual_tab_limit = VIRTUAL_TAB_LIMIT if enabled else None
+        for tab_widget in self.find_all_tab_widgets():
+            tab_widget.set_virtual_tab_limit(self.virtual_tab_limit)
+
+    def show_tab_search_in_focused_panel(self):
+        tab_widget = self.find_focused_tab_widget()
+        if tab_widget:
+            tab_widget.show_tab_search()
+
+    def _on_layout_changed(self):
+        """ Wołane po każdej zmianie drzewa paneli (podział, sprzątanie, nowy panel). """
+        self.panel_index.invalidate()
+        # Przesunięcie uchwytu splittera też zmienia prostokąty paneli
+        central = self.centralWidget()
+        splitters = central.findChildren(QSplitter) if central else []
+        if isinstance(central, QSplitter):
+            splitters.append(central)
+        for splitter in splitters:
+            if not splitter.property("panel_index_watched"):
+                splitter.splitterMoved.connect(self.panel_index.invalidate)
+                splitter.splitterMoved.connect(self._mark_session_layout_dirty)
+                splitter.setProperty("panel_index_watched", True)
+        self._mark_session_layout_dirty()
+
+    def resizeEvent(self, event):
+        self.panel_index.invalidate()
+        super().resizeEvent(event)
+
+    def split_with_tab(self, target_tab_widget, content_widget, title, orientation, insert_before):
+        """ Dzieli panel i umieszcza zakładkę (już zarejestrowaną, poza panelem) w nowym panelu. Zwraca nowy panel lub None. """
+        self._record_layout('s', content_widget.property("tab_id"), target_tab_widget,
+                            o=int(orientation), b=int(bool(insert_before)))
+        new_panel = split_widget(target_tab_widget, content_widget, title, orientation, insert_before)
+        if new_panel:
+            self.content_widget_to_tab_widget[content_widget] = new_panel
+            self.connect_tab_widget_signals(new_panel) # Podłącz sygnały do nowego panelu
+            self._on_layout_changed()
+        return new_panel
+
+    def move_current_tab_to_neighbour(self, direction):
+        """ Przenosi bieżącą zakładkę aktywnego panelu do panelu obok ('left', 'right', 'up', 'down'). """
+        source_tab_widget = self.find_focused_tab_widget()
+        if not source_tab_widget or source_tab_widget.currentWidget() is None:
+            return
+        target_tab_widget = self.panel_index.neighbour(source_tab_widget, direction)
+        if not target_tab_widget:
+            print(f"No panel found in direction '{direction}'.")
+            return
+
+        content_widget = source_tab_widget.currentWidget()
+        title = source_tab_widget.tabText(source_tab_widget.currentIndex())
+        self._record_layout('m', content_widget.property("tab_id"), target_tab_widget)
+        source_tab_widget.removeTab(source_tab_widget.currentIndex())
+        target_tab_widget.addTab(content_widget, title)
+        target_tab_widget.setCurrentWidget(content_widget)
+        self.content_widget_to_tab_widget[content_widget] = target_tab_widget
+        target_tab_widget.setFocus()
+
+        QTimer.singleShot(0, partial(self.cleanup_layout_if_needed, source_tab_widget))
+        self.update_tools_menu()
 
 
     # --- Obsługa Drag and Drop ---
@@ -278,14 +860,8 @@ class MainWindow(QMainWindow):
             event.acceptProposedAction()
             # Wskaźnik jest zarządzany przez DraggableTabWidget, gdy kursor jest nad nim
             # Jeśli kursor jest nad QMainWindow, ale nie nad żadnym panelem, można by coś pokazać
-            widget_at_pos = self.childAt(event.pos())
-            is_over_tab_widget = False
-            temp = widget_at_pos
-            while temp is not None:
-                 if isinstance(temp, DraggableTabWidget):
-                      is_over_tab_widget = True
-                      break
-                 temp = temp.parent()
+            # Indeks paneli odpowiada bez childAt i przechodzenia po rodzicach
+            is_over_tab_widget = self.panel_index.panel_at(event.pos()) is not None
 
             if not is_over_tab_widget:
                  self.drop_indicator.hide() # Ukryj, jeśli nie jesteśmy nad panelem
@@ -307,13 +883,13 @@ class MainWindow(QMainWindow):
         event.ignore() # Ignorujemy drop bezpośrednio na MainWindow
         # Sygnał zwrotny z QDrag (IgnoreAction) powinien spowodować przywrócenie zakładki
 
-        # Jeśli _dragged_content_widget_ref nie jest None, oznacza to, że drag się zakończył
+        # Jeśli w rejestrze jest przeciągana zakładka, oznacza to, że drag się zakończył
         # i nie został obsłużony przez żaden panel. Musimy przywrócić zakładkę.
         self.restore_dragged_tab_if_needed()
 
 
     def handle_drop_event(self, target_tab_widget, event):
-        """ Centralna metoda obsługująca logikę upuszczenia na DraggableTabWidget. """
+        """ Centralna metoda obsługująca logikę upuszczenia na DraggableTabWidget (także zakładki z innego okna). """
         self.drop_indicator.hide()
         if not event.mimeData().hasFormat(TAB_MIME_TYPE):
             event.ignore()
@@ -321,23 +897,16 @@ class MainWindow(QMainWindow):
             return
 
         try:
-            # Odzyskaj ID widgetu z danych MIME
-            widget_id_str = event.mimeData().data(TAB_MIME_TYPE).data().decode('utf-8')
-            widget_id = int(widget_id_str)
-            # Znajdź widget treści na podstawie ID (bardzo ważne!)
-            dragged_content_widget = None
-            for id_val, (content, _) in self.all_tabs_data.items():
-                if id(content) == widget_id: # Porównujemy z ID zapisanym w MIME
-                    dragged_content_widget = content
-                    break
+            # Odzyskaj stabilne ID zakładki z danych MIME i znajdź jej widget w rejestrze - O(1)
+            tab_id = int(event.mimeData().data(TAB_MIME_TYPE).data().decode('utf-8'))
+            dragged_content_widget = self.all_tabs_data.get(tab_id, (None, None))[0]
 
             if not dragged_content_widget:
-                print(f"Error: Could not find content widget for ID {widget_id} during drop.")
+                print(f"Error: Could not find content widget for tab ID {tab_id} during drop.")
                 event.ignore()
                 self.restore_dragged_tab_if_needed()
                 return
 
-            source_tab_widget = self.find_tab_widget_for_content(dragged_content_widget)
             title = event.mimeData().text() # Pobierz tytuł z MIME
 
         except Exception as e:
@@ -347,53 +916,45 @@ class MainWindow(QMainWindow):
             return
 
         # Sprawdź, czy upuszczamy na ten sam panel, z którego przeciągamy
-        # (QDrag już usunął zakładkę, więc source_tab_widget może być None,
-        #  musimy użyć referencji zapisanej na początku przeciągania)
+        # (QDrag już usunął zakładkę, więc używamy referencji zapisanej w rejestrze na początku przeciągania)
 
         # --- Logika Podziału/Dodania ---
         orientation = getattr(target_tab_widget.drop_indicator, 'split_orientation', None)
         split_half = getattr(target_tab_widget.drop_indicator, 'split_half', 0)
 
-        if orientation == Qt.TargetIsCentralWidget or target_tab_widget == self._source_tab_widget_ref:
+        if orientation == TARGET_IS_CENTRAL_WIDGET or target_tab_widget == self.registry.source_tab_widget:
              # Upuszczenie na środek lub na ten sam panel -> Dodaj jako zakładkę
              print(f"Adding tab '{title}' to existing panel {target_tab_widget}")
+             self._record_layout('m', tab_id, target_tab_widget)
              target_tab_widget.addTab(dragged_content_widget, title)
              target_tab_widget.setCurrentWidget(dragged_content_widget)
              self.content_widget_to_tab_widget[dragged_content_widget] = target_tab_widget
         elif orientation in [Qt.Vertical, Qt.Horizontal]:
             # Upuszczenie na krawędź -> Podziel panel
             print(f"Splitting panel {target_tab_widget} {'Vertically' if orientation == Qt.Vertical else 'Horizontally'}")
-            new_panel = split_widget(target_tab_widget, dragged_content_widget, title, orientation, split_half == 0)
+            new_panel = self.split_with_tab(target_tab_widget, dragged_content_widget, title, orientation, split_half == 0)
             if new_panel:
                 print("Split successful.")
-                self.content_widget_to_tab_widget[dragged_content_widget] = new_panel
-                self.connect_tab_widget_signals(new_panel) # Podłącz sygnały do nowego panelu
                 new_panel.setFocus()
                 # Target_tab_widget jest teraz częścią nowego splittera
             else:
                  print("Split failed. Restoring tab to original position.")
                  # Jeśli podział się nie udał, przywróć zakładkę do oryginalnego panelu
                  self.restore_dragged_tab_if_needed(force_restore=True)
+                 event.acceptProposedAction()
+                 return
 
         else:
              print("Unknown drop zone. Adding as tab.")
              # Domyślnie dodaj jako zakładkę
+             self._record_layout('m', tab_id, target_tab_widget)
              target_tab_widget.addTab(dragged_content_widget, title)
              target_tab_widget.setCurrentWidget(dragged_content_widget)
              self.content_widget_to_tab_widget[dragged_content_widget] = target_tab_widget
 
-
-        # Posprzątaj po źródłowym panelu, jeśli stał się pusty
-        if self._source_tab_widget_ref and self._source_tab_widget_ref != target_tab_widget :
-             # Użyj QTimer.singleShot dla bezpieczeństwa
-             from PyQt5.QtCore import QTimer
-             QTimer.singleShot(0, partial(self.cleanup_layout_if_needed, self._source_tab_widget_ref))
-
-
-        # Resetuj stan przeciągania w MainWindow
-        self._dragged_content_widget_ref = None
-        self._source_tab_widget_ref = None
-        self._dragged_tab_title_ref = ""
+        # Sprzątanie po panelu źródłowym odbywa się w finish_drag - dopiero po powrocie z QDrag.exec_,
+        # bo usunięcie panelu w trakcie pętli zdarzeń przeciągania zniszczyłoby obiekt, który ją uruchomił
+        self.registry.drag_dropped = True
 
         event.acceptProposedAction()
         self.update_tools_menu() # Zaktualizuj menu
@@ -401,14 +962,7 @@ class MainWindow(QMainWindow):
     def mousePressEvent(self, event):
         """ Przechwytuje początek przeciągania globalnie. """
         # Sprawdź, czy kliknięcie jest na DraggableTabWidget i czy trafia w zakładkę
-        widget_at_pos = self.childAt(event.pos())
-        target_tab_widget = None
-        temp = widget_at_pos
-        while temp is not None:
-            if isinstance(temp, DraggableTabWidget):
-                target_tab_widget = temp
-                break
-            temp = temp.parent()
+        target_tab_widget = self.panel_index.panel_at(event.pos())
 
         if target_tab_widget:
             # Przekaż event do tab widgetu, aby mógł rozpocząć drag & drop
@@ -416,55 +970,109 @@ class MainWindow(QMainWindow):
             local_pos = target_tab_widget.mapFromGlobal(event.globalPos())
             # Symulujemy mousePress dla target_tab_widget - To może być problematyczne!
             # Lepiej, żeby DraggableTabWidget sam obsługiwał swoje eventy myszy.
-            # Usuwamy tę logikę stąd, DraggableTabWidget.mousePressEvent/mouseMoveEvent zajmie się tym.
+            # Usuwamy tę logikę stąd, DraggableTabWidget.mouseMoveEvent zajmie się tym.
             pass
 
         super().mousePressEvent(event)
 
 
+    def _on_tab_drag_started(self, content_widget, title):
+        self.start_drag(self.sender(), content_widget, title, QCursor.pos())
+
+    def _on_tab_drag_finished(self, accepted):
+        self.finish_drag(self.sender(), accepted)
+
     def start_drag(self, source_tab_widget, content_widget, title, global_pos):
         """ Metoda wywoływana, gdy DraggableTabWidget inicjuje przeciąganie. """
-        # Ta metoda może nie być już potrzebna, jeśli cała logika startu jest w TabWidget
         print(f"MainWindow notified of drag start for '{title}' from {source_tab_widget}")
-        # Zapisz stan na czas przeciągania
-        self._dragged_content_widget_ref = content_widget # Zapisz referencję
-        self._source_tab_widget_ref = source_tab_widget
-        self._dragged_tab_title_ref = title
+        # Zapisz stan na czas przeciągania (we wspólnym rejestrze - drop może trafić do innego okna)
+        self.registry.start_drag(source_tab_widget, content_widget, title)
 
         # Usuń rejestrację widgetu na czas przeciągania
         if content_widget in self.content_widget_to_tab_widget:
              del self.content_widget_to_tab_widget[content_widget]
 
+    def finish_drag(self, source_tab_widget, accepted):
+        """
+        Wołane po powrocie z QDrag.exec_. Jeśli żaden panel nie przyjął zakładki, a kursor jest poza
+        wszystkimi oknami aplikacji - zakładka zostaje wyrwana do nowego okna; w przeciwnym razie wraca na miejsce.
+        """
+        registry = self.registry
+        content_widget = registry.dragged_content_widget
+        if content_widget is not None and not registry.drag_dropped and content_widget not in self.content_widget_to_tab_widget:
+            if not accepted and QApplication.topLevelAt(QCursor.pos()) is None:
+                self.tear_off_tab(content_widget, registry.dragged_tab_title, QCursor.pos())
+            else:
+                self.restore_dragged_tab_if_needed()
+        registry.reset_drag()
+        # Panel źródłowy mógł stać się pusty (także w innym oknie niż to, do którego trafiła zakładka)
+        QTimer.singleShot(0, partial(self.cleanup_layout_if_needed, source_tab_widget))
+        self.update_tools_menu()
+
+    def tear_off_tab(self, content_widget, title, global_pos):
+        """ Przenosi zakładkę (ten sam widget treści) do nowego okna otwartego w miejscu global_pos. """
+        print(f"Tearing off tab '{title}' into a new window")
+        self._record_layout('w', content_widget.property("tab_id"))
+        window = MainWindow(registry=self.registry, populate=False)
+        window.setAttribute(Qt.WA_DeleteOnClose)
+        window.resize(self.width() * 2 // 3, self.height() * 2 // 3)
+        window.move(global_pos - QPoint(40, 10))
+        panel = window.find_first_tab_widget()
+        panel.addTab(content_widget, title)
+        panel.setCurrentWidget(content_widget)
+        self.content_widget_to_tab_widget[content_widget] = panel
+        window.show()
+        panel.setFocus()
+        self.update_tools_menu()
+        return window
+
+    def move_current_tab_to_new_window(self):
+        """ Wyrywa bieżącą zakładkę aktywnego panelu do nowego okna. """
+        source_tab_widget = self.find_focused_tab_widget()
+        if not source_tab_widget or source_tab_widget.currentWidget() is None:
+            return None
+        content_widget = source_tab_widget.currentWidget()
+        title = source_tab_widget.tab_title(content_widget)
+        source_tab_widget.removeTab(source_tab_widget.currentIndex())
+        window = self.tear_off_tab(content_widget, title, self.mapToGlobal(QPoint(60, 60)))
+        QTimer.singleShot(0, partial(source_tab_widget.window().cleanup_layout_if_needed, source_tab_widget))
+        return window
 
     def restore_dragged_tab_if_needed(self, force_restore=False):
         """ Przywraca przeciąganą zakładkę, jeśli drop się nie powiódł. """
+        registry = self.registry
         # Sprawdź, czy stan przeciągania jest aktywny
-        if self._dragged_content_widget_ref is not None and self._source_tab_widget_ref is not None:
+        if registry.dragged_content_widget is not None and registry.source_tab_widget is not None:
+            content_widget = registry.dragged_content_widget
+            source_tab_widget = registry.source_tab_widget
+            title = registry.dragged_tab_title
             # Sprawdź, czy widget nie został już gdzieś dodany
-            already_placed = self._dragged_content_widget_ref in self.content_widget_to_tab_widget
+            already_placed = content_widget in self.content_widget_to_tab_widget
 
             if not already_placed or force_restore:
-                print(f"Restoring tab '{self._dragged_tab_title_ref}' to original panel {self._source_tab_widget_ref}")
+                print(f"Restoring tab '{title}' to original panel {source_tab_widget}")
                 try:
-                    # Sprawdź, czy source_tab_widget wciąż istnieje
-                    all_widgets = self.find_all_tab_widgets()
-                    if self._source_tab_widget_ref in all_widgets:
-                        self._source_tab_widget_ref.addTab(self._dragged_content_widget_ref, self._dragged_tab_title_ref)
+                    # Sprawdź, czy source_tab_widget wciąż istnieje (w dowolnym oknie)
+                    if source_tab_widget in registry.all_tab_widgets():
+                        self._record_layout('m', content_widget.property("tab_id"), source_tab_widget)
+                        source_tab_widget.addTab(content_widget, title)
                         # Przywróć rejestrację
-                        self.content_widget_to_tab_widget[self._dragged_content_widget_ref] = self._source_tab_widget_ref
-                        self._source_tab_widget_ref.setCurrentWidget(self._dragged_content_widget_ref)
+                        self.content_widget_to_tab_widget[content_widget] = source_tab_widget
+                        source_tab_widget.setCurrentWidget(content_widget)
                     else:
                          # Panel źródłowy został usunięty - dodaj do pierwszego lepszego
                          print("Source panel not found, adding to first available panel.")
                          fallback_panel = self.find_first_tab_widget()
+                         self._record_layout('m' if fallback_panel else 'r', content_widget.property("tab_id"), fallback_panel)
                          if not fallback_panel: # Stwórz nowy, jeśli nie ma żadnego
                               fallback_panel = DraggableTabWidget()
                               self.setCentralWidget(fallback_panel)
                               self.connect_tab_widget_signals(fallback_panel)
+                              self._on_layout_changed()
 
-                         fallback_panel.addTab(self._dragged_content_widget_ref, self._dragged_tab_title_ref)
-                         self.content_widget_to_tab_widget[self._dragged_content_widget_ref] = fallback_panel
-                         fallback_panel.setCurrentWidget(self._dragged_content_widget_ref)
+                         fallback_panel.addTab(content_widget, title)
+                         self.content_widget_to_tab_widget[content_widget] = fallback_panel
+                         fallback_panel.setCurrentWidget(content_widget)
 
                 except RuntimeError as e:
                     # Może się zdarzyć, jeśli source_tab_widget został usunięty w międzyczasie
@@ -474,35 +1082,355 @@ class MainWindow(QMainWindow):
                 self.update_tools_menu() # Zaktualizuj menu
 
             # Zawsze resetuj stan przeciągania po próbie przywrócenia
-            self._dragged_content_widget_ref = None
-            self._source_tab_widget_ref = None
-            self._dragged_tab_title_ref = ""
+            registry.reset_drag()
 
 
     def cleanup_layout_if_needed(self, potential_empty_widget):
         """ Sprawdza i czyści layout, jeśli widget stał się pusty lub zbędny. """
+        if self not in self.registry.windows:
+            return # Okno zostało już zamknięte
         print(f"Checking layout for cleanup starting from {potential_empty_widget}...")
         # Wywołaj funkcję czyszczącą z layout_manager
         # Zaczynamy od widgetu, który mógł stać się pusty
+        panels_before = self.find_all_tab_widgets()
         cleanup_empty_splitters(potential_empty_widget)
         # Dodatkowo można wywołać czyszczenie od roota dla pewności
         cleanup_empty_splitters(self.centralWidget())
+        # Usunięte panele powinny zostać zwolnione - śledź je w wykrywaczu wycieków
+        panels_after = self.find_all_tab_widgets()
+        for panel in panels_before:
+            if panel not in panels_after:
+                self.leak_tracker.track(panel, f"removed panel {panel!r}")
+        del panels_before, panels_after
+        self._on_layout_changed()
         print("Layout cleanup finished.")
         self.update_tools_menu() # Menu mogło się zmienić
+        # Okno wyrwanych zakładek, w którym nie została żadna zakładka, jest zamykane
+        if self is not self.registry.windows[0] and not any(panel.total_count() for panel in self.find_all_tab_widgets()):
+            print("Closing empty window.")
+            self.close()
+
+
+    # --- Układy zbiorcze ---
+    def arrange_grid(self, rows, columns):
+        """
+        Układa panele okna w siatkę rows x columns i rozkłada na nie zakładki po kolei (round-robin).
+        Istniejące panele są używane ponownie w kolejności drzewa (brakujące tworzone, nadmiarowe usuwane),
+        a drzewo splitterów jest składane raz - przy wstrzymanych aktualizacjach, więc układ liczony jest raz.
+        """
+        if rows < 1 or columns < 1:
+            return
+        self._record_layout('g', w=self.registry.windows.index(self), r=rows, k=columns)
+        panels = self.find_all_tab_widgets()
+        count = rows * columns
+        cells = panels[:count]
+        for _ in range(count - len(cells)):
+            panel = DraggableTabWidget()
+            self.connect_tab_widget_signals(panel)
+            cells.append(panel)
+        central = self.centralWidget()
+        width, height = central.width(), central.height()
+        self.setUpdatesEnabled(False)
+        try:
+            self._distribute_tabs(panels, cells)
+            old_root = self.takeCentralWidget()
+            root = build_grid(cells, rows, columns, width, height)
+            self.setCentralWidget(root)
+            for panel in panels[count:]:
+                panel.setParent(None)
+                panel.deleteLater()
+                self.leak_tracker.track(panel, f"removed panel {panel!r}")
+            if old_root is not root and old_root not in cells:
+                old_root.deleteLater() # Stare splittery - panele zostały już z nich przeniesione
+            self._on_layout_changed()
+        finally:
+            self.setUpdatesEnabled(True)
+        print(f"Arranged {sum(panel.total_count() for panel in cells)} tabs in a {rows}x{columns} grid")
+        self.update_tools_menu()
 
+    def distribute_tabs_round_robin(self):
+        """ Rozkłada zakładki okna po kolei na wszystkie jego panele (bez zmiany drzewa paneli). """
+        panels = self.find_all_tab_widgets()
+        if len(panels) < 2:
+            return
+        self._record_layout('d', w=self.registry.windows.index(self))
+        self.setUpdatesEnabled(False)
+        try:
+            self._distribute_tabs(panels, panels)
+        finally:
+            self.setUpdatesEnabled(True)
+        self.update_tools_menu()
+
+    def _distribute_tabs(self, sources, targets):
+        """ Przenosi zakładki paneli sources (w kolejności drzewa i pasków) do targets po kolei; tylko te, które zmieniają panel. """
+        tabs = [(content_widget, panel) for panel in sources for content_widget in panel.all_tab_widgets()]
+        for target, bucket in zip(targets, round_robin(tabs, len(targets))):
+            for content_widget, source in bucket:
+                if source is target:
+                    continue
+                title = source.tab_title(content_widget)
+                source.discard_tab(content_widget)
+                target.addTab(content_widget, title)
+                self.content_widget_to_tab_widget[content_widget] = target
+
+    def rebalance_layout(self):
+        """ Wyrównuje rozmiary paneli we wszystkich splitterach okna (jedno przejście). """
+        self.setUpdatesEnabled(False)
+        try:
+            count = rebalance_splitters(self.centralWidget())
+        finally:
+            self.setUpdatesEnabled(True)
+        self._on_layout_changed()
+        print(f"Rebalanced {count} splitters")
+
+    def arrange_grid_dialog(self):
+        text, ok = QInputDialog.getText(self, 'Siatka paneli', 'Wiersze x kolumny (np. 3x4):', text='3x3')
+        match = re.fullmatch(r'\s*(\d+)\s*[xX*]\s*(\d+)\s*', text) if ok else None
+        if match and 0 < int(match.group(1)) * int(match.group(2)) <= 400:
+            self.arrange_grid(int(match.group(1)), int(match.group(2)))
+        elif ok:
+            QMessageBox.warning(self, 'Siatka paneli', f"Niepoprawny rozmiar siatki: '{text}'")
+
+    # --- Motyw ---
+    def set_theme(self, name, checked=True):
+        """ Przełącza motyw wszystkich okien (jedno przejście przez ThemeManager) i zaznacza go w ich menu. """
+        if not ThemeManager.instance().apply(name):
+            return
+        for window in self.registry.windows:
+            window.theme_actions[name].setChecked(True)
+        print(f"Theme '{name}' applied to {len(self.registry.windows)} windows")
+
+    # --- Nagrywanie operacji układu (odtwarzanie: python layout_recorder.py plik) ---
+    def toggle_layout_recording(self, enabled):
+        if not enabled:
+            self.stop_layout_recording()
+            return
+        path, _ = QFileDialog.getSaveFileName(self, 'Nagrywaj operacje układu', 'uklad.jsonl', 'Nagrania układu (*.jsonl)')
+        if not path:
+            self.record_layout_action.setChecked(False)
+            return
+        self.start_layout_recording(path)
+
+    def start_layout_recording(self, path):
+        """ Zaczyna zapisywać operacje układu wszystkich okien do pliku. Zwraca LayoutRecorder lub None (błąd zapisu). """
+        self.stop_layout_recording()
+        try:
+            recorder = LayoutRecorder(self.registry, path)
+        except OSError as e:
+            QMessageBox.warning(self, "Nagrywaj operacje układu", f"Nie można zapisać nagrania do '{path}':\n{e}")
+            self.record_layout_action.setChecked(False)
+            return None
+        self.registry.layout_recorder = recorder
+        print(f"Recording layout operations to {path}")
+        return self.registry.layout_recorder
+
+    def stop_layout_recording(self):
+        recorder = self.registry.layout_recorder
+        if recorder is None:
+            return
+        self.registry.layout_recorder = None
+        recorder.stop()
+        for window in self.registry.windows:
+            window.record_layout_action.setChecked(False)
+
+    def _record_layout(self, kind, tab_id=None, panel=None, **fields):
+        """ Zapisuje operację układu, jeśli trwa nagrywanie - przed zmianą układu (ścieżka panelu docelowego). """
+        if self.registry.layout_recorder is not None:
+            self.registry.layout_recorder.record(kind, tab_id, panel, **fields)
+
+    # --- Sesja (autozapis i odtwarzanie) ---
+    def start_session_journal(self, directory=SESSION_DIR):
+        """ Włącza autozapis sesji (wspólny dla wszystkich okien) i zapisuje migawkę bieżącego stanu. """
+        journal = SessionJournal(self.registry, directory)
+        self.registry.journal = journal
+        for tab_id, (content_widget, _) in self.all_tabs_data.items():
+            if content_widget is not None:
+                journal.watch(tab_id, content_widget)
+        journal.compact()
+        QApplication.instance().aboutToQuit.connect(journal.shutdown)
+        return journal
+
+    def session_layout(self):
+        """
+        Układ okna do zapisu sesji: {'g': [x, y, w, h], 'root': drzewo}, gdzie węzeł to
+        {'p': [ID zakładek], 'c': ID bieżącej} (panel) lub {'o': orientacja, 's': rozmiary, 'k': [węzły]} (splitter).
+        """
+        def node(widget):
+            if isinstance(widget, DraggableTabWidget):
+                current = widget.currentWidget()
+                return {'p': [content.property("tab_id") for content in widget.all_tab_widgets()],
+                        'c': current.property("tab_id") if current is not None else None}
+            if isinstance(widget, QSplitter):
+                return {'o': int(widget.orientation()), 's': widget.sizes(),
+                        'k': [node(widget.widget(i)) for i in range(widget.count())]}
+            return None
+        geometry = self.geometry()
+        return {'g': [geometry.x(), geometry.y(), geometry.width(), geometry.height()], 'root': node(self.centralWidget())}
+
+    def restore_session(self, state):
+        """ Odtwarza zakładki i układ okien z sesji (session_journal.SessionState). """
+        registry = self.registry
+        registry._next_tab_id = max(registry._next_tab_id, state.next_tab_id)
+        for tab_id, tab in state.tabs.items():
+            descriptor = tab['d']
+            title = tab['title']
+            file_path = descriptor.get('file_path')
+            self.tab_descriptors[tab_id] = descriptor
+            if file_path:
+                self.file_path_to_tab_id[file_path] = tab_id
+            self.search_index.add(tab_id, title, file_path)
+            content_widget = None
+            if tab.get('text') is not None:
+                # Niezapisane zmiany - widget z odtworzonym tekstem (nie da się go zwolnić ani wczytać z pliku)
+                content_widget = EditorWidget(tab['text'], file_path)
+                content_widget.document().setModified(True)
+                content_widget.setProperty("tab_id", tab_id)
+                if file_path:
+                    content_widget.setProperty("file_path", file_path)
+            # Pozostałe zakładki - widget zostanie odtworzony z opisu przy pokazaniu
+            self.all_tabs_data[tab_id] = (content_widget, title)
+
+        for number, window_layout in enumerate(state.windows):
+            window = self if number == 0 else MainWindow(registry=registry, populate=False)
+            if number > 0:
+                window.setAttribute(Qt.WA_DeleteOnClose)
+            window.setGeometry(*window_layout['g'])
+            root = window._build_session_node(window_layout['root']) if window_layout.get('root') else None
+            if root is not None:
+                window.setCentralWidget(root)
+                window._on_layout_changed()
+            if number > 0:
+                window.show()
+        self.update_tools_menu()
+
+    def _build_session_node(self, node):
+        """ Tworzy panel lub splitter (rekurencyjnie) z węzła zapisanego przez session_layout(). """
+        if 'k' in node:
+            splitter = QSplitter(Qt.Orientation(node['o']))
+            for child in node['k']:
+                widget = self._build_session_node(child)
+                if widget is not None:
+                    splitter.addWidget(widget)
+            if splitter.count() == 0:
+                splitter.deleteLater()
+                return None
+            splitter.setSizes(node['s'])
+            return splitter
+
+        panel = DraggableTabWidget()
+        self.connect_tab_widget_signals(panel)
+        for tab_id in node['p']:
+            if tab_id not in self.all_tabs_data:
+                continue
+            content_widget, title = self.all_tabs_data[tab_id]
+            if content_widget is None:
+                content_widget = self._recreate_content_widget(tab_id)
+                if content_widget is None:
+                    continue
+            panel.addTab(content_widget, title)
+            self.content_widget_to_tab_widget[content_widget] = panel
+        current = self.all_tabs_data.get(node.get('c'), (None, None))[0]
+        if current is not None and panel.contains_tab(current):
+            panel.setCurrentWidget(current)
+        return panel
 
     # --- Metody Plik (Placeholder) ---
     def open_file(self):
         options = QFileDialog.Options()
-        filename, _ = QFileDialog.getOpenFileName(self, 'Otwórz plik', '', 'Wszystkie pliki (*);;Pliki tekstowe (*.txt)', options=options)
+        filename, _ = QFileDialog.getOpenFileName(self, 'Otwórz plik', '', 'Wszystkie pliki (*);;Pliki tekstowe (*.txt);;'
+                                                  'Obrazy (*.png *.jpg *.jpeg *.bmp *.gif *.tif *.tiff *.webp)', options=options)
         if filename:
             print(f"Wybrano plik do otwarcia: {filename}")
-            # TODO: Otwórz plik w nowej zakładce
-            title = filename.split('/')[-1]
-            # Tutaj powinna być logika wczytania pliku do widgetu edytora
-            self.add_new_tab(title=title, make_current=True)
-            QMessageBox.information(self, "Plik otwarty", f"Otwarto plik:\n{filename}")
-
+            self.open_path(filename)
+
+    def open_path(self, filename):
+        """ Otwiera plik w nowej zakładce (bez dialogu) lub przełącza na zakładkę, jeśli jest już otwarty. """
+        tab_id = self.file_path_to_tab_id.get(filename)
+        if tab_id is not None and tab_id in self.all_tabs_data:
+            self.activate_tab(tab_id)
+            return tab_id
+        # Treść wczytywana w tle (_create_editor_widget); błąd odczytu zamyka zakładkę z ostrzeżeniem.
+        # Obrazy otwierają się w podglądzie (_create_image_widget)
+        title = os.path.basename(filename)
+        kind = 'image' if is_image_file(filename) else 'editor'
+        tab_id, _ = self.add_new_tab(title=title, make_current=True, file_path=filename,
+                                     descriptor={'kind': kind, 'file_path': filename})
+        return tab_id
+
+    # --- Porównywanie plików ---
+    def compare_files_dialog(self):
+        left_path, _ = QFileDialog.getOpenFileName(self, 'Porównaj - plik lewy', '', 'Wszystkie pliki (*)')
+        if not left_path:
+            return
+        right_path, _ = QFileDialog.getOpenFileName(self, 'Porównaj - plik prawy', os.path.dirname(left_path), 'Wszystkie pliki (*)')
+        if right_path:
+            self.open_diff(left_path, right_path)
+
+    def open_diff(self, left_path, right_path):
+        """
+        Otwiera porównanie dwóch plików jako dwie zakładki obok siebie: lewa w aktywnym panelu,
+        prawa w nowym panelu z podziału poziomego. Przewijanie obu stron jest zsynchronizowane.
+        Zwraca (ID lewej, ID prawej zakładki).
+        """
+        model = DiffModel(left_path, right_path)
+        left_pane = DiffPane(model, 0)
+        right_pane = DiffPane(model, 1)
+        left_pane.link(right_pane)
+        names = f"{os.path.basename(left_path)} ↔ {os.path.basename(right_path)}"
+
+        target_tab_widget = self.find_focused_tab_widget()
+        left_id, _ = self.add_new_tab(left_pane, title=f"{names} (lewy)", target_tab_widget=target_tab_widget, make_current=True)
+        target_tab_widget = self.find_tab_widget_for_content(left_pane)
+        right_id, _ = self.add_new_tab(right_pane, title=f"{names} (prawy)", target_tab_widget=target_tab_widget)
+        # Prawą stronę przenosimy do nowego panelu po prawej
+        title = target_tab_widget.tab_title(right_pane)
+        target_tab_widget.discard_tab(right_pane)
+        del self.content_widget_to_tab_widget[right_pane]
+        if not self.split_with_tab(target_tab_widget, right_pane, title, Qt.Horizontal, False):
+            target_tab_widget.addTab(right_pane, title)
+            self.content_widget_to_tab_widget[right_pane] = target_tab_widget
+        target_tab_widget.setCurrentWidget(left_pane)
+        self.update_tools_menu()
+        return left_id, right_id
+
+    # --- Projekt (folder) ---
+    def open_project_dialog(self):
+        root = QFileDialog.getExistingDirectory(self, 'Otwórz folder projektu')
+        if root:
+            self.open_project(root)
+
+    def open_project(self, root):
+        """ Uruchamia indeksowanie projektu w tle; wynik zasila drzewo plików i paletę "przejdź do". """
+        if self._project_thread is not None and self._project_thread.isRunning():
+            self._project_thread.requestInterruption()
+            self._project_thread.wait()
+        # Pliki poprzedniego projektu nie powinny zostać w palecie
+        if self.project_index is not None and os.path.abspath(root) != self.project_index.root:
+            self.search_index.set_paths(None)
+
+        print(f"Indexing project {root} in background...")
+        self.statusBar().showMessage(f"Indeksowanie projektu: {root}...")
+        self._project_thread = ProjectIndexThread(root, self)
+        self._project_thread.progress.connect(
+            lambda count: self.statusBar().showMessage(f"Indeksowanie projektu: {count} katalogów..."))
+        self._project_thread.indexReady.connect(self._on_project_indexed)
+        self._project_thread.start()
+
+    def _on_project_indexed(self, index, scanned, reused):
+        # Wynik wątku zastąpionego przez open_project (sygnał już w kolejce) jest pomijany
+        if self.sender() is not self._project_thread:
+            return
+        self.project_index = index
+        self.search_index.set_paths(self._project_thread.path_index)
+        print(f"Project indexed: {index.file_count()} files ({scanned} directories scanned, {reused} reused from cache).")
+        self.statusBar().showMessage(f"Projekt: {index.file_count()} plików", 5000)
+
+        if self.project_tree_dock is None:
+            self.project_tree_dock = ProjectTreeDock(self)
+            self.project_tree_dock.fileActivated.connect(self.open_path)
+            self.addDockWidget(Qt.LeftDockWidgetArea, self.project_tree_dock)
+        self.project_tree_dock.set_index(index)
+        self.project_tree_dock.show()
 
     def save_file(self):
          # TODO: Zapisz zawartość aktywnej zakładki
@@ -534,9 +1462,8 @@ class MainWindow(QMainWindow):
     #    struktury widgetów, co może zapobiec sytuacji, w której slot próbuje użyć usuniętego obiektu.
     # 4. W `handle_drop_event` i `restore_dragged_tab_if_needed` sprawdzamy, czy panele (widgety)
     #    nadal istnieją przed próbą ich użycia.
-    # 5. Identyfikacja przeciąganego widgetu przez `id()` i przekazywanie go w MIME jest **ryzykowne**. Lepszym
-    #    podejściem byłoby użycie unikalnego ID zarządzanego przez MainWindow lub przekazanie referencji
-    #    w bardziej kontrolowany sposób. Jednak dla uproszczenia zostawiono `id()`. Należy być tego świadomym.
+    # 5. Przeciągany widget jest identyfikowany w MIME przez stabilne ID zakładki nadawane przez TabRegistry
+    #    (a nie przez `id()`, które może zostać użyte ponownie), co działa także między oknami.
 
     # Dodatkowo, upewnij się, że w `layout_manager.py` funkcje `replace_widget_in_parent` i `cleanup_empty_splitters`
     # poprawnie zarządzają cyklem życia widgetów i ich rodzicielstwem (`setParent(None)`).
\ No newline at end of file
@@ -0,0 +1,328 @@
+# minimap.py
+import itertools
+import threading
+import weakref
+from PyQt5.QtWidgets import QWidget, QApplication
+from PyQt5.QtCore import Qt, QObject, QThread, QTimer, QRect, QEvent, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QColor, qRgba
+
+# Szerokość minimapy w pikselach; jeden piksel na znak, dłuższe linie są obcinane
+MINIMAP_WIDTH = 100
+MINIMAP_COLUMNS = MINIMAP_WIDTH
+TAB_WIDTH = 4
+# Wysokość kafla w pikselach. Kafel obejmuje TILE_ROWS wierszy minimapy, czyli TILE_ROWS * linie_na_wiersz linii
+TILE_ROWS = 64
+# Opóźnienie zlecenia ponownego renderowania po edycji (kolejne naciśnięcia klawiszy łączą się w jedno zlecenie)
+RERENDER_DELAY_MS = 80
+# Krycie zaznaczenia widocznego fragmentu
+VIEWPORT_ALPHA = 40
+
+def _ink_table():
+    """ Tablica translate(): bajt znaku -> "ilość tuszu" (0 - puste, 255 - litera/cyfra). """
+    table = bytearray(256)
+    for code in range(33, 256):
+        char = chr(code)
+        table[code] = 255 if char.isalnum() else 150
+    return bytes(table)
+
+INK_TABLE = _ink_table()
+
+def lines_per_row(level):
+    """ Poziom skali: 0 - dwa piksele na linię, każdy następny - dwa razy więcej linii na piksel. """
+    return 2 ** level / 2
+
+def tile_lines(level):
+    return int(TILE_ROWS * lines_per_row(level))
+
+def level_for(line_count, height):
+    """ Najmniejszy poziom, przy którym cały dokument mieści się w height pikselach. """
+    level = 0
+    while line_count / lines_per_row(level) > max(1, height):
+        level += 1
+    return level
+
+def render_tile(lines, level, rgb):
+    """
+    Renderuje kafel (lista linii) do QImage o szerokości MINIMAP_WIDTH i wysokości len(lines) / linie_na_wiersz.
+    Każda linia to wiersz bajtów "tuszu" (jeden na znak, translate() na całym buforze naraz); redukcja do
+    docelowej wysokości to uśrednianie bloków pikseli przez skalowanie QImage (SmoothTransformation, w C).
+    Funkcja nie dotyka widgetów - jest wołana w wątku renderującym.
+    """
+    columns = MINIMAP_COLUMNS
+    rows = [line[:columns].expandtabs(TAB_WIDTH)[:columns].encode('latin-1', 'replace').ljust(columns)
+            for line in lines]
+    if not rows:
+        rows = [b' ' * columns]
+    data = b''.join(rows).translate(INK_TABLE)
+    source = QImage(data, columns, len(rows), columns, QImage.Format_Indexed8)
+    red, green, blue = rgb
+    source.setColorTable([qRgba(red, green, blue, alpha * 3 // 4) for alpha in range(256)])
+    height = max(1, round(len(rows) / lines_per_row(level)))
+    mode = Qt.SmoothTransformation if height < len(rows) else Qt.FastTransformation
+    # scaled() zwraca obraz z własną kopią danych - bufor data może zostać zwolniony
+    return source.scaled(MINIMAP_WIDTH, height, Qt.IgnoreAspectRatio, mode).convertToFormat(QImage.Format_ARGB32_Premultiplied)
+
+
+class MinimapRenderThread(QThread):
+    """
+    Wspólny dla wszystkich minimap wątek renderujący kafle. Zlecenia dla tego samego kafla
+    zastępują się (liczy się najnowsza wersja), wyniki wracają sygnałem tileRendered do wątku GUI.
+    """
+    tileRendered = pyqtSignal(int, int, int, QImage) # ID minimapy, kafel, wersja, obraz
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._condition = threading.Condition()
+        self._pending = {} # key: (ID minimapy, kafel), value: (wersja, linie, poziom, kolor)
+        self._stopping = False
+
+    def request(self, client_id, tile, version, lines, level, rgb):
+        with self._condition:
+            self._pending[(client_id, tile)] = (version, lines, level, rgb)
+            self._condition.notify()
+
+    def forget(self, client_id):
+        """ Usuwa zlecenia minimapy (zamknięta zakładka lub ukryta minimapa). """
+        with self._condition:
+            for key in [key for key in self._pending if key[0] == client_id]:
+                del self._pending[key]
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._pending = {}
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                key = next(iter(self._pending)) # Kolejność zleceń (dict zachowuje kolejność wstawienia)
+                version, lines, level, rgb = self._pending.pop(key)
+            self.tileRendered.emit(key[0], key[1], version, render_tile(lines, level, rgb))
+
+
+class MinimapRenderer(QObject):
+    """ Przekazuje wyrenderowane kafle do minimap (przez słabe referencje - renderer nie trzyma edytorów). """
+    _instance = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._clients = weakref.WeakValueDictionary() # key: ID minimapy, value: Minimap
+        self._next_id = 0
+        self.thread = MinimapRenderThread()
+        self.thread.tileRendered.connect(self._on_tile_rendered)
+        self.thread.start()
+        QApplication.instance().aboutToQuit.connect(self.thread.stop)
+
+    @classmethod
+    def instance(cls):
+        """ Renderer bieżącej QApplication (jej dziecko) - z aplikacją kończy się też wątek renderujący. """
+        if cls._instance is None:
+            app = QApplication.instance()
+            cls._instance = MinimapRenderer(app)
+            app.destroyed.connect(cls._forget_instance)
+        return cls._instance
+
+    @classmethod
+    def _forget_instance(cls):
+        renderer, cls._instance = cls._instance, None
+        if renderer is not None:
+            renderer.thread.stop()
+
+    def register(self, minimap):
+        self._next_id += 1
+        self._clients[self._next_id] = minimap
+        return self._next_id
+
+    def _on_tile_rendered(self, client_id, tile, version, image):
+        minimap = self._clients.get(client_id)
+        if minimap is not None:
+            minimap.tile_ready(tile, version, image)
+
+
+class Minimap(QWidget):
+    """
+    Podgląd całego dokumentu obok edytora, składany z kafli po TILE_ROWS pikseli.
+    Minimapa trzyma własną kopię linii aktualizowaną przy edycji (contentsChange) - zmiana w linii
+    unieważnia tylko kafle z tą linią, a wstawienie/usunięcie linii także kafle poniżej (ich linie się przesunęły).
+    Do czasu nadejścia nowej wersji rysowany jest poprzedni obraz kafla. Skala zmienia się skokowo (potęgi dwójki),
+    więc pełne przerenderowanie następuje dopiero, gdy liczba linii przekroczy kolejny próg.
+    Przewijanie przerysowuje tylko pasek zaznaczenia widocznego fragmentu.
+    """
+    def __init__(self, editor, lines=None):
+        """ lines - gotowa lista linii dokumentu edytora (bez niej minimapa dzieli toPlainText()). """
+        super().__init__(editor)
+        self._editor = editor
+        self._renderer = MinimapRenderer.instance()
+        self._id = self._renderer.register(self)
+        self._document = None
+        self._lines = []
+        self._level = 0
+        self._tiles = {} # key: kafel, value: (wersja, QImage) - ostatni otrzymany obraz
+        self._versions = {} # key: kafel, value: bieżąca wersja
+        # Wersje są unikalne także między przebudowami (zmiana skali) - spóźniony kafel starej skali nie pasuje do żadnej
+        self._version_counter = itertools.count(1)
+        self._dirty = set() # Kafle do (ponownego) zlecenia
+        self._viewport_rect = QRect()
+        self.setFixedWidth(MINIMAP_WIDTH)
+        self.setCursor(Qt.PointingHandCursor)
+
+        self._request_timer = QTimer(self)
+        self._request_timer.setSingleShot(True)
+        self._request_timer.setInterval(RERENDER_DELAY_MS)
+        self._request_timer.timeout.connect(self._request_dirty_tiles)
+
+        editor.verticalScrollBar().valueChanged.connect(self._update_viewport_rect)
+        self.set_document(editor.document(), lines)
+
+    def set_document(self, document, lines=None):
+        """ Podpina minimapę pod (nowy) dokument edytora; lines - gotowa kopia linii (np. z wczytywania w tle). """
+        if self._document is not None:
+            self._document.contentsChange.disconnect(self._on_contents_change)
+        self._document = document
+        self._lines = lines if lines is not None else document.toPlainText().split('\n')
+        document.contentsChange.connect(self._on_contents_change)
+        self._reset_tiles()
+
+    def stop_rendering(self):
+        self._request_timer.stop()
+        self._renderer.thread.forget(self._id)
+
+    def _reset_tiles(self):
+        self._level = level_for(len(self._lines), self.height())
+        self._tiles = {}
+        self._versions = {tile: next(self._version_counter) for tile in range(self._tile_count())}
+        self._dirty = set(self._versions)
+        self._renderer.thread.forget(self._id)
+        self._schedule_requests(0)
+        self.update()
+
+    def _tile_count(self):
+        size = tile_lines(self._level)
+        return (len(self._lines) + size - 1) // size
+
+    def _on_contents_change(self, position, chars_removed, chars_added):
+        document = self._document
+        block_count = document.blockCount()
+        delta = block_count - len(self._lines)
+        first = max(0, document.findBlock(position).blockNumber())
+        last_block = document.findBlock(position + chars_added)
+        last = last_block.blockNumber() if last_block.isValid() else block_count - 1
+
+        new_lines = []
+        block = document.findBlockByNumber(first)
+        for _ in range(last - first + 1):
+            new_lines.append(block.text())
+            block = block.next()
+        removed = (last - first + 1) - delta
+        self._lines[first:first + removed] = new_lines
+
+        if level_for(len(self._lines), self.height()) != self._level:
+            self._reset_tiles()
+            return
+        size = tile_lines(self._level)
+        # Bez zmiany liczby linii zmieniają się tylko kafle z edytowanymi liniami
+        stop = last if delta == 0 else max(len(self._lines), len(self._lines) - delta) - 1
+        for tile in range(first // size, stop // size + 1):
+            self._versions[tile] = next(self._version_counter)
+            self._dirty.add(tile)
+        for tile in [tile for tile in self._tiles if tile >= self._tile_count()]:
+            del self._tiles[tile] # Kafle za końcem skróconego dokumentu
+        self._schedule_requests(RERENDER_DELAY_MS)
+        self._update_viewport_rect()
+
+    def _schedule_requests(self, delay):
+        if self._dirty and not self._request_timer.isActive():
+            self._request_timer.start(delay)
+
+    def _request_dirty_tiles(self):
+        if not self.isVisible():
+            return # Zlecimy przy pokazaniu (showEvent)
+        size = tile_lines(self._level)
+        color = self._editor.palette().text().color()
+        rgb = (color.red(), color.green(), color.blue())
+        count = self._tile_count()
+        for tile in sorted(self._dirty):
+            if tile < count:
+                self._renderer.thread.request(self._id, tile, self._versions[tile],
+                                              self._lines[tile * size:(tile + 1) * size], self._level, rgb)
+        self._dirty = set()
+
+    def tile_ready(self, tile, version, image):
+        if version != self._versions.get(tile) or tile >= self._tile_count():
+            return # Nieaktualna wersja - nowsza jest już zlecona
+        self._tiles[tile] = (version, image)
+        self.update(0, tile * TILE_ROWS, MINIMAP_WIDTH, TILE_ROWS)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._schedule_requests(0)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        # Zlecenia niewidocznej minimapy nie są potrzebne - wrócą do kolejki przy pokazaniu
+        self._renderer.thread.forget(self._id)
+        self._dirty.update(tile for tile in range(self._tile_count())
+                           if self._tiles.get(tile, (None,))[0] != self._versions.get(tile))
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.PaletteChange:
+            # Nowy kolor tekstu (zmiana motywu) - nowe wersje wszystkich kafli, do czasu podmiany rysujemy stare
+            self._versions = {tile: next(self._version_counter) for tile in self._versions}
+            self._dirty = set(self._versions)
+            self._schedule_requests(0)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if level_for(len(self._lines), self.height()) != self._level:
+            self._reset_tiles()
+        self._update_viewport_rect()
+
+    def _line_to_y(self, line):
+        return int(line / lines_per_row(self._level))
+
+    def _update_viewport_rect(self, *args):
+        """ Przesuwa pasek widocznego fragmentu - przerysowany jest tylko obszar starego i nowego paska. """
+        first = self._editor.verticalScrollBar().value()
+        visible = self._editor.viewport().height() // max(1, self._editor.fontMetrics().lineSpacing())
+        top = self._line_to_y(first)
+        rect = QRect(0, top, MINIMAP_WIDTH, max(2, self._line_to_y(first + visible) - top))
+        if rect != self._viewport_rect:
+            # Osobno - prostokąt obejmujący oba paski mógłby sięgać przez całą minimapę
+            self.update(self._viewport_rect)
+            self.update(rect)
+            self._viewport_rect = rect
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        highlight = QColor(self.palette().text().color())
+        highlight.setAlpha(VIEWPORT_ALPHA)
+        for area in event.region().rects():
+            painter.setClipRect(area)
+            painter.fillRect(area, self.palette().base())
+            first = max(0, area.top() // TILE_ROWS)
+            last = min(self._tile_count() - 1, area.bottom() // TILE_ROWS)
+            for tile in range(first, last + 1):
+                if tile in self._tiles:
+                    painter.drawImage(0, tile * TILE_ROWS, self._tiles[tile][1])
+            if self._viewport_rect.intersects(area):
+                painter.fillRect(self._viewport_rect, highlight)
+
+    def mousePressEvent(self, event):
+        self._scroll_to(event.pos().y())
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self._scroll_to(event.pos().y())
+
+    def _scroll_to(self, y):
+        """ Centruje edytor na linii pod kursorem minimapy. """
+        line = int(y * lines_per_row(self._level))
+        scroll = self._editor.verticalScrollBar()
+        scroll.setValue(line - scroll.pageStep() // 2)
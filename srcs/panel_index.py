@@ -0,0 +1,135 @@
+# panel_index.py
+from PyQt5.QtCore import QPoint, QRect, QObject, QEvent
+from tab_widget import drop_zone_for_point
+
+# Rozmiar komórki siatki (w pikselach okna) używanej do szybkiego trafiania
+CELL_SIZE = 64
+
+class PanelHitIndex(QObject):
+    """
+    Indeks prostokątów paneli (DraggableTabWidget) w koordynatach okna.
+    Przebudowywany leniwie - tylko po invalidate() (zmiana rozmiaru okna lub layoutu)
+    albo po zmianie geometrii obserwowanego panelu.
+    Trafienie kursora sprowadza się do odczytu jednej komórki siatki,
+    więc koszt na ruch myszy nie rośnie wraz z liczbą paneli.
+    """
+    def __init__(self, window, cell_size=CELL_SIZE):
+        super().__init__(window)
+        self._window = window
+        self._cell_size = cell_size
+        self._entries = [] # lista (panel, QRect w koordynatach okna)
+        self._grid = {} # key: (cx, cy), value: lista indeksów w self._entries
+        self._dirty = True
+
+    def invalidate(self, *args):
+        """ Oznacza indeks jako nieaktualny (przyjmuje argumenty sygnałów, np. splitterMoved). """
+        self._dirty = True
+        # Nie trzymaj referencji do paneli, które mogły zostać usunięte
+        self._entries = []
+        self._grid = {}
+
+    def watch(self, panel):
+        """ Śledzi zmiany geometrii panelu (np. po dodaniu panelu dokowanego obok obszaru centralnego). """
+        panel.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Resize, QEvent.Move, QEvent.Show, QEvent.Hide):
+            self._dirty = True
+        return False
+
+    def _ensure_built(self):
+        if self._dirty:
+            self.rebuild()
+
+    def rebuild(self):
+        """ Buduje indeks od nowa na podstawie aktualnego drzewa paneli. """
+        self._entries = []
+        self._grid = {}
+        cell = self._cell_size
+        for panel in self._window.find_all_tab_widgets():
+            if not panel.isVisible():
+                continue
+            top_left = panel.mapTo(self._window, QPoint(0, 0))
+            rect = QRect(top_left, panel.size())
+            entry_index = len(self._entries)
+            self._entries.append((panel, rect))
+            # Zarejestruj panel we wszystkich komórkach, które pokrywa
+            for cx in range(rect.left() // cell, rect.right() // cell + 1):
+                for cy in range(rect.top() // cell, rect.bottom() // cell + 1):
+                    self._grid.setdefault((cx, cy), []).append(entry_index)
+        self._dirty = False
+
+    def panels(self):
+        """ Zwraca listę (panel, rect) z indeksu. """
+        self._ensure_built()
+        return list(self._entries)
+
+    def rect_of(self, panel):
+        """ Zwraca prostokąt panelu w koordynatach okna lub None. """
+        self._ensure_built()
+        for candidate, rect in self._entries:
+            if candidate is panel:
+                return rect
+        return None
+
+    def _entry_at(self, pos):
+        self._ensure_built()
+        cell = self._cell_size
+        for entry_index in self._grid.get((pos.x() // cell, pos.y() // cell), ()):
+            panel, rect = self._entries[entry_index]
+            if rect.contains(pos):
+                return panel, rect
+        return None, None
+
+    def panel_at(self, pos):
+        """ Zwraca panel pod punktem pos (koordynaty okna) lub None. """
+        return self._entry_at(pos)[0]
+
+    def hit_test(self, pos):
+        """
+        Odpowiada na pytanie "który panel i która strefa" dla punktu pos (koordynaty okna).
+        Zwraca (panel, orientation, split_half) lub (None, None, 0).
+        """
+        panel, rect = self._entry_at(pos)
+        if panel is None:
+            return None, None, 0
+        local_pos = pos - rect.topLeft()
+        orientation, split_half = drop_zone_for_point(QRect(QPoint(0, 0), rect.size()), local_pos)
+        return panel, orientation, split_half
+
+    def neighbour(self, panel, direction):
+        """
+        Znajduje panel sąsiadujący z danym w kierunku 'left', 'right', 'up' lub 'down'.
+        Wybiera najbliższy panel, który zachodzi na dany w osi prostopadłej
+        (przy remisie - ten o największym pokryciu).
+        """
+        origin = self.rect_of(panel)
+        if origin is None:
+            return None
+
+        best = None
+        best_key = None
+        for candidate, rect in self._entries:
+            if candidate is panel:
+                continue
+            if direction == 'left':
+                distance = origin.left() - rect.right()
+                overlap = min(origin.bottom(), rect.bottom()) - max(origin.top(), rect.top())
+            elif direction == 'right':
+                distance = rect.left() - origin.right()
+                overlap = min(origin.bottom(), rect.bottom()) - max(origin.top(), rect.top())
+            elif direction == 'up':
+                distance = origin.top() - rect.bottom()
+                overlap = min(origin.right(), rect.right()) - max(origin.left(), rect.left())
+            elif direction == 'down':
+                distance = rect.top() - origin.bottom()
+                overlap = min(origin.right(), rect.right()) - max(origin.left(), rect.left())
+            else:
+                return None
+
+            if distance <= 0 or overlap <= 0:
+                continue # Panel nie leży w tym kierunku
+            key = (distance, -overlap)
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
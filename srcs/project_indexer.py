@@ -0,0 +1,154 @@
+# project_indexer.py
+import os
+import json
+import hashlib
+from PyQt5.QtCore import QThread, pyqtSignal
+from search_index import PathIndex
+
+# Katalog na zapisane indeksy projektów
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gui_edytor')
+# Katalogi pomijane podczas indeksowania
+IGNORED_DIRS = {'.git', '.hg', '.svn', '__pycache__', 'node_modules', '.venv', 'venv', 'myenv', '.mypy_cache', '.pytest_cache'}
+# Co ile katalogów raportujemy postęp
+PROGRESS_EVERY = 500
+INDEX_VERSION = 1
+
+class ProjectIndex:
+    """
+    Drzewo plików projektu zbudowane przez os.scandir.
+    Dla każdego katalogu (ścieżka względna, '' = korzeń) pamięta mtime oraz listy plików i podkatalogów.
+    Przy ponownym skanowaniu katalog z niezmienionym mtime nie jest czytany ponownie
+    (mtime katalogu zmienia się przy dodaniu/usunięciu/zmianie nazwy wpisu).
+    """
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.directories = {} # key: ścieżka względna, value: (mtime_ns, [pliki], [podkatalogi])
+
+    @staticmethod
+    def cache_path_for(root):
+        digest = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(CACHE_DIR, f"project_{digest}.json")
+
+    def load(self, cache_path=None):
+        """ Wczytuje zapisany indeks. Zwraca True, jeśli się udało. """
+        cache_path = cache_path or self.cache_path_for(self.root)
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != INDEX_VERSION or data.get('root') != self.root:
+            return False
+        self.directories = {rel: (entry[0], entry[1], entry[2]) for rel, entry in data['directories'].items()}
+        return True
+
+    def save(self, cache_path=None):
+        """ Zapisuje indeks atomowo (plik tymczasowy + zamiana). """
+        cache_path = cache_path or self.cache_path_for(self.root)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = cache_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'root': self.root, 'directories': self.directories},
+                      f, separators=(',', ':'))
+        os.replace(temp_path, cache_path)
+
+    def scan(self, progress=None, should_stop=None):
+        """
+        Skanuje drzewo (iteracyjnie, bez rekurencji), używając zapamiętanych wpisów dla niezmienionych katalogów.
+        Zwraca (przeskanowane, ponownie_użyte) katalogi lub None, jeśli przerwano przez should_stop().
+        """
+        previous = self.directories
+        directories = {}
+        scanned = reused = 0
+        stack = ['']
+        while stack:
+            if should_stop is not None and should_stop():
+                return None
+            rel = stack.pop()
+            path = os.path.join(self.root, rel) if rel else self.root
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue # Katalog zniknął w trakcie skanowania
+
+            cached = previous.get(rel)
+            if cached is not None and cached[0] == mtime:
+                files, subdirs = cached[1], cached[2]
+                reused += 1
+            else:
+                files, subdirs = [], []
+                try:
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    if entry.name not in IGNORED_DIRS:
+                                        subdirs.append(entry.name)
+                                else:
+                                    files.append(entry.name)
+                            except OSError:
+                                continue
+                except OSError:
+                    continue # Brak uprawnień itp.
+                files.sort()
+                subdirs.sort()
+                scanned += 1
+
+            directories[rel] = (mtime, files, subdirs)
+            for name in subdirs:
+                stack.append(f"{rel}/{name}" if rel else name)
+            if progress is not None and (scanned + reused) % PROGRESS_EVERY == 0:
+                progress(scanned + reused)
+
+        self.directories = directories
+        return scanned, reused
+
+    def iter_files(self):
+        """ Zwraca generator względnych ścieżek wszystkich plików. """
+        for rel, (_, files, _) in self.directories.items():
+            for name in files:
+                yield f"{rel}/{name}" if rel else name
+
+    def file_count(self):
+        return sum(len(files) for _, files, _ in self.directories.values())
+
+    def children(self, rel):
+        """ Zwraca (podkatalogi, pliki) katalogu rel lub ([], []), jeśli nieznany. """
+        entry = self.directories.get(rel)
+        if entry is None:
+            return [], []
+        return entry[2], entry[1]
+
+    def absolute_path(self, rel):
+        return os.path.join(self.root, rel)
+
+
+class ProjectIndexThread(QThread):
+    """
+    Indeksuje projekt w tle: wczytuje zapisany indeks, skanuje tylko zmienione katalogi,
+    zapisuje wynik na dysk i buduje zwarty indeks ścieżek (PathIndex) dla palety "przejdź do".
+    Nic nie trafia do współdzielonego indeksu wyszukiwania przed indexReady - przerwane
+    indeksowanie nie zostawia w palecie plików (path_index podmienia wątek GUI).
+    """
+    progress = pyqtSignal(int) # liczba przetworzonych katalogów
+    indexReady = pyqtSignal(object, int, int) # ProjectIndex, przeskanowane, ponownie_użyte
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self._root = root
+        self.path_index = None
+
+    def run(self):
+        index = ProjectIndex(self._root)
+        index.load()
+        result = index.scan(progress=self.progress.emit, should_stop=self.isInterruptionRequested)
+        if result is None:
+            return
+        try:
+            index.save()
+        except OSError as e:
+            print(f"Warning: Could not save project index: {e}")
+        if self.isInterruptionRequested():
+            return
+        self.path_index = PathIndex(index.root, index.iter_files())
+        self.indexReady.emit(index, result[0], result[1])
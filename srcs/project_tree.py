@@ -0,0 +1,53 @@
+# project_tree.py
+from PyQt5.QtWidgets import QDockWidget, QTreeWidget, QTreeWidgetItem
+from PyQt5.QtCore import Qt, pyqtSignal
+
+# Rola danych elementu drzewa: ścieżka względna
+PATH_ROLE = Qt.UserRole
+# Rola danych elementu drzewa: czy to katalog
+IS_DIR_ROLE = Qt.UserRole + 1
+
+class ProjectTreeDock(QDockWidget):
+    """
+    Panel z drzewem plików projektu, zasilany z ProjectIndex (bez dostępu do dysku).
+    Dzieci katalogu są tworzone dopiero przy jego rozwinięciu.
+    """
+    fileActivated = pyqtSignal(str) # ścieżka bezwzględna
+
+    def __init__(self, parent=None):
+        super().__init__('Projekt', parent)
+        self._index = None
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.itemExpanded.connect(self._populate_item)
+        self.tree.itemActivated.connect(self._on_item_activated)
+        self.setWidget(self.tree)
+
+    def set_index(self, index):
+        """ Ustawia (nowy) indeks i odbudowuje najwyższy poziom drzewa. """
+        self._index = index
+        self.tree.clear()
+        self.setWindowTitle(f"Projekt: {index.root}")
+        self._add_children(self.tree.invisibleRootItem(), '')
+
+    def _add_children(self, parent_item, rel):
+        subdirs, files = self._index.children(rel)
+        for name in subdirs:
+            item = QTreeWidgetItem(parent_item, [name])
+            item.setData(0, PATH_ROLE, f"{rel}/{name}" if rel else name)
+            item.setData(0, IS_DIR_ROLE, True)
+            # Dzieci dodamy przy rozwinięciu - na razie tylko wskaźnik rozwijania
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+        for name in files:
+            item = QTreeWidgetItem(parent_item, [name])
+            item.setData(0, PATH_ROLE, f"{rel}/{name}" if rel else name)
+            item.setData(0, IS_DIR_ROLE, False)
+
+    def _populate_item(self, item):
+        if item.childCount() == 0 and item.data(0, IS_DIR_ROLE):
+            self._add_children(item, item.data(0, PATH_ROLE))
+            item.setChildIndicatorPolicy(QTreeWidgetItem.DontShowIndicatorWhenChildless)
+
+    def _on_item_activated(self, item, column):
+        if self._index is not None and not item.data(0, IS_DIR_ROLE):
+            self.fileActivated.emit(self._index.absolute_path(item.data(0, PATH_ROLE)))
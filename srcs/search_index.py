@@ -0,0 +1,286 @@
+# search_index.py
+import os
+import re
+import heapq
+import threading
+from array import array
+from bisect import bisect_right
+from PyQt5.QtCore import QThread, pyqtSignal
+from tab_search import fuzzy_score, MAX_RESULTS
+
+# Długość prefiksów słów indeksowanych dla krótkich zapytań (1-2 znaki)
+PREFIX_LENGTH = 2
+_WORD_SPLIT = re.compile(r'[\s_\-./\\]+')
+
+def trigrams(text):
+    """ Zbiór trigramów (3-znakowych podciągów) tekstu. """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def word_prefixes(text):
+    """ Zbiór prefiksów (1..PREFIX_LENGTH znaków) wszystkich słów tekstu. """
+    prefixes = set()
+    for word in _WORD_SPLIT.split(text):
+        for length in range(1, min(PREFIX_LENGTH, len(word)) + 1):
+            prefixes.add(word[:length])
+    return prefixes
+
+def subsequence_pattern(query):
+    """ Wyrażenie "znaki zapytania po kolei" bez cofania się (m[^a]*a[^i]*i...). """
+    parts = [re.escape(query[0])]
+    for char in query[1:]:
+        parts.append(f"[^{re.escape(char)}]*{re.escape(char)}")
+    return re.compile(''.join(parts))
+
+def line_subsequence_pattern(query):
+    """ Jak subsequence_pattern, ale dopasowanie nie przechodzi przez koniec linii (jedna ścieżka = jedna linia). """
+    parts = [re.escape(query[0])]
+    for char in query[1:]:
+        parts.append(f"[^{re.escape(char)}\\n]*{re.escape(char)}")
+    return re.compile(''.join(parts))
+
+# Najwięcej ścieżek projektu ocenianych na jedno zapytanie (osobno ciągłe i fuzzy)
+MAX_PATH_CANDIDATES = 5000
+
+class PathIndex:
+    """
+    Zwarty, niezmienny indeks ścieżek plików projektu dla palety "przejdź do".
+    Posortowane ścieżki względne są sklejone w jeden tekst (jedna linia = jedna ścieżka) z kopią małymi
+    literami i tablicą początków linii - ok. 2 bajty na znak ścieżki + 8 bajtów na plik, zamiast
+    trigramów i zbiorów postingów dla każdego pliku. Budowany raz po skanowaniu (w wątku indeksującym)
+    i podmieniany w TrigramIndex.set_paths jednym przypisaniem; wyszukiwanie przegląda tekst
+    (str.find, wyrażenie podciągu) bez blokad. Klucze wyników: ('file', ścieżka_bezwzględna).
+    """
+    def __init__(self, root, rel_paths):
+        self.root = root
+        self._text = '\n'.join(sorted(rel_paths))
+        self._lower = self._text.lower()
+        self._starts = array('q', [0] if self._text else []) # Początki linii (ścieżek) w tekście
+        self._starts.extend(match.end() for match in re.finditer('\n', self._text))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def _line(self, position):
+        """ (numer, początek, koniec) linii zawierającej pozycję w tekście. """
+        line = bisect_right(self._starts, position) - 1
+        start = self._starts[line]
+        end = self._starts[line + 1] - 1 if line + 1 < len(self._starts) else len(self._text)
+        return line, start, end
+
+    def key(self, rel):
+        return ('file', os.path.join(self.root, rel))
+
+    def label(self, key):
+        return os.path.relpath(key[1], self.root)
+
+    def scored(self, query, limit=MAX_RESULTS):
+        """ Lista (ocena, -pozycja, -długość, klucz, ścieżka) - oceny jak w TrigramIndex.search; query małymi literami. """
+        lower = self._lower
+        scored = []
+        matched_lines = set()
+        # Dopasowania ciągłe - kolejne wystąpienia w tekście, najwyżej jedno na linię
+        position = lower.find(query)
+        while position != -1 and len(scored) < MAX_PATH_CANDIDATES:
+            line, start, end = self._line(position)
+            matched_lines.add(line)
+            scored.append((1 << 30, start - position, start - end, line))
+            position = lower.find(query, end)
+
+        if len(scored) < limit:
+            # Fuzzy - wyrażenie podciągu w obrębie linii wskazuje kandydatów dla fuzzy_score
+            checked = 0
+            for match in line_subsequence_pattern(query).finditer(lower):
+                line, start, end = self._line(match.start())
+                if line in matched_lines:
+                    continue
+                matched_lines.add(line)
+                score = fuzzy_score(query, lower[start:end])
+                if score is not None:
+                    scored.append((score, 0, 0, line))
+                checked += 1
+                if checked >= MAX_PATH_CANDIDATES:
+                    break
+
+        result = []
+        for *score, line in heapq.nlargest(limit, scored):
+            _, start, end = self._line(self._starts[line])
+            rel = self._text[start:end]
+            result.append((*score, self.key(rel), rel))
+        return result
+
+
+class TrigramIndex:
+    """
+    Indeks wyszukiwania po tytułach i ścieżkach zakładek.
+    Trigramy wyznaczają kandydatów dla dopasowań ciągłych (podciąg), prefiksy słów -
+    dla zapytań krótszych niż trigram, a indeks pojedynczych znaków - kandydatów dla dopasowań "fuzzy".
+    Aktualizowany przyrostowo (add/remove), bezpieczny dla wątku wyszukującego (lock).
+    Pliki projektu nie trafiają do postingów - dołącza je osobny PathIndex (set_paths), którego wyniki
+    są scalane z wynikami zakładek.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._labels = {} # key: klucz (np. tab_id), value: tekst wyświetlany
+        self._texts = {} # key: klucz, value: tekst przeszukiwany (małe litery)
+        self._trigram_postings = {} # key: trigram, value: set kluczy
+        self._char_postings = {} # key: znak, value: set kluczy
+        self._prefix_postings = {} # key: prefiks słowa, value: set kluczy
+        self._paths = None # PathIndex plików projektu (lub None)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __contains__(self, key):
+        return key in self._texts
+
+    def add(self, key, label, *extra_texts):
+        """ Dodaje (lub zastępuje) wpis. Przeszukiwany jest label i dodatkowe teksty (np. ścieżka pliku). """
+        text = " ".join([label] + [t for t in extra_texts if t]).lower()
+        with self.lock:
+            if key in self._texts:
+                self._remove_unlocked(key)
+            self._labels[key] = label
+            self._texts[key] = text
+            for gram in trigrams(text):
+                self._trigram_postings.setdefault(gram, set()).add(key)
+            for char in set(text):
+                self._char_postings.setdefault(char, set()).add(key)
+            for prefix in word_prefixes(text):
+                self._prefix_postings.setdefault(prefix, set()).add(key)
+
+    def remove(self, key):
+        with self.lock:
+            self._remove_unlocked(key)
+
+    def _remove_unlocked(self, key):
+        text = self._texts.pop(key, None)
+        self._labels.pop(key, None)
+        if text is None:
+            return
+        for postings_map, parts in ((self._trigram_postings, trigrams(text)), (self._char_postings, set(text)),
+                                    (self._prefix_postings, word_prefixes(text))):
+            for part in parts:
+                postings = postings_map.get(part)
+                if postings is not None:
+                    postings.discard(key)
+                    if not postings:
+                        del postings_map[part]
+
+    def set_paths(self, paths):
+        """ Podmienia indeks ścieżek projektu (PathIndex lub None) - jedno przypisanie, bez przebudowy postingów. """
+        self._paths = paths
+
+    def label(self, key):
+        label = self._labels.get(key)
+        paths = self._paths
+        if label is None and paths is not None and isinstance(key, tuple) and key[0] == 'file':
+            label = paths.label(key)
+        return label
+
+    def _intersect(self, postings_map, parts):
+        """ Przecięcie list postingów (od najkrótszej). Pusty zbiór, jeśli któregoś elementu brak. """
+        sets = []
+        for part in parts:
+            postings = postings_map.get(part)
+            if not postings:
+                return set()
+            sets.append(postings)
+        sets.sort(key=len)
+        result = set(sets[0])
+        for postings in sets[1:]:
+            result &= postings
+            if not result:
+                break
+        return result
+
+    def search(self, query, limit=MAX_RESULTS):
+        """ Zwraca listę (key, label) najlepiej pasujących do query, posortowaną od najlepszego. """
+        query = query.strip().lower()
+        with self.lock:
+            if not query:
+                return [(key, self._labels[key]) for key in sorted(self._labels)[:limit]]
+
+            scored = []
+            matched_keys = set()
+            texts = self._texts
+            if len(query) <= PREFIX_LENGTH:
+                # Krótkie zapytanie - słowa zaczynające się od niego (indeks prefiksów)
+                for key in self._prefix_postings.get(query, ()):
+                    text = texts[key]
+                    scored.append((2 << 30, -text.find(query), -len(text), key))
+                matched_keys.update(key for *_, key in scored)
+            else:
+                # Kandydaci na dopasowanie ciągłe - wszystkie trigramy zapytania
+                for key in self._intersect(self._trigram_postings, trigrams(query)):
+                    text = texts[key]
+                    position = text.find(query)
+                    if position != -1:
+                        matched_keys.add(key)
+                        # Dopasowanie ciągłe zawsze przed fuzzy; wcześniejsze i krótsze wyżej
+                        scored.append((1 << 30, -position, -len(text), key))
+
+            if len(scored) < limit:
+                # Kandydaci fuzzy - zawierają wszystkie znaki zapytania; wyrażenie regularne
+                # (znaki po kolei) odsiewa niepasujących, zanim policzymy fuzzy_score w Pythonie
+                subsequence = subsequence_pattern(query)
+                for key in self._intersect(self._char_postings, set(query)):
+                    if key in matched_keys or not subsequence.search(texts[key]):
+                        continue
+                    score = fuzzy_score(query, texts[key])
+                    if score is not None:
+                        scored.append((score, 0, 0, key))
+
+            best = [(*score, key, self._labels[key]) for *score, key in heapq.nlargest(limit, scored)]
+
+        # Pliki projektu - poza blokadą (PathIndex jest niezmienny), ranking wspólny z zakładkami
+        paths = self._paths
+        if paths is not None:
+            best.extend(paths.scored(query, limit))
+            best = heapq.nlargest(limit, best, key=lambda entry: entry[:3])
+        return [(key, label) for *_, key, label in best]
+
+
+class QuickOpenSearchThread(QThread):
+    """
+    Wątek rankingu dla palety "przejdź do zakładki".
+    request() zapamiętuje tylko najnowsze zapytanie - pośrednie naciśnięcia klawiszy są pomijane,
+    a wyniki (z numerem generacji) wracają sygnałem resultsReady do wątku GUI.
+    """
+    resultsReady = pyqtSignal(int, list) # generation, [(key, label)]
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self._index = index
+        self._condition = threading.Condition()
+        self._pending = None # (generation, query)
+        self._generation = 0
+        self._stopping = False
+
+    def request(self, query):
+        """ Zleca wyszukiwanie; zwraca numer generacji, którym zostaną oznaczone wyniki. """
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, query)
+            self._condition.notify()
+            return self._generation
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                generation, query = self._pending
+                self._pending = None
+            results = self._index.search(query)
+            with self._condition:
+                stale = self._pending is not None # W międzyczasie przyszło nowsze zapytanie
+            if not stale:
+                self.resultsReady.emit(generation, results)
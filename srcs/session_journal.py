@@ -0,0 +1,360 @@
+# session_journal.py
+import os
+import json
+import threading
+from functools import partial
+from PyQt5.QtCore import QObject, QThread, QTimer
+from PyQt5.QtGui import QTextCursor, QTextDocument
+from project_indexer import CACHE_DIR
+
+# Katalog z migawką i dziennikiem sesji
+SESSION_DIR = os.path.join(CACHE_DIR, 'session')
+SNAPSHOT_NAME = 'snapshot.json'
+# Co ile ms bufor rekordów jest przekazywany do wątku zapisu
+FLUSH_INTERVAL_MS = 1000
+# Po tylu rekordach dziennik jest kompaktowany do migawki
+COMPACT_EVERY_RECORDS = 5000
+SESSION_VERSION = 1
+
+# Rekordy dziennika (jedna linia JSON, klucz 't' = typ):
+#   'o' - otwarcie/odtworzenie zakładki z opisu: id, title, d (descriptor), b (stempel pliku: [mtime_ns, rozmiar])
+#   'e' - edycja dokumentu: id, p (pozycja), r (usunięte znaki), a (wstawiony tekst)
+#   's' - dokument zgodny z plikiem (niezmodyfikowany): id, b
+#   'n' - zmiana tytułu: id, title
+#   'c' - zamknięcie zakładki: id
+#   'l' - układ paneli wszystkich okien: w (lista drzew, patrz MainWindow.session_layout)
+
+def journal_path(directory, generation):
+    return os.path.join(directory, f"journal.{generation}.jsonl")
+
+def file_stamp(file_path):
+    """ [mtime_ns, rozmiar] pliku lub None - pozwala wykryć zmianę pliku między sesjami. """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def read_file_text(file_path):
+    """ Czyta plik tak samo jak EditorWidget.from_file. Zwraca None, jeśli się nie da. """
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class JournalWriterThread(QThread):
+    """
+    Wątek zapisu dziennika: koduje rekordy do JSON, dopisuje je paczkami na koniec pliku
+    i wykonuje fsync - żadna operacja dyskowa nie odbywa się w wątku GUI.
+    Migawka zapisywana jest atomowo i rozpoczyna nową generację dziennika (journal.<n>.jsonl),
+    więc awaria w trakcie kompaktowania nie powoduje podwójnego zastosowania edycji.
+    """
+    def __init__(self, directory, parent=None):
+        super().__init__(parent)
+        self._directory = directory
+        self._condition = threading.Condition()
+        self._queue = [] # lista ('records', [rekord]) / ('snapshot', dict)
+        self._stopping = False
+
+    def submit(self, records):
+        with self._condition:
+            self._queue.append(('records', records))
+            self._condition.notify()
+
+    def submit_snapshot(self, snapshot):
+        with self._condition:
+            self._queue.append(('snapshot', snapshot))
+            self._condition.notify()
+
+    def stop(self):
+        """ Zapisuje wszystko, co zostało w kolejce, i kończy wątek. """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self.wait()
+
+    def _stamp(self, record):
+        # Stempel pliku bazowego liczony tutaj, a nie w wątku GUI (os.stat to też I/O)
+        if record['t'] in ('o', 's'):
+            descriptor = record.get('d') or {}
+            file_path = descriptor.get('file_path') or record.pop('f', None)
+            if file_path:
+                record['b'] = file_stamp(file_path)
+        return record
+
+    def _write_snapshot(self, snapshot, generation):
+        for tab in snapshot['tabs'].values():
+            file_path = (tab.get('d') or {}).get('file_path')
+            if file_path and tab.get('text') is None:
+                tab['b'] = file_stamp(file_path)
+        snapshot['version'] = SESSION_VERSION
+        snapshot['journal'] = generation
+        snapshot_path = os.path.join(self._directory, SNAPSHOT_NAME)
+        temp_path = snapshot_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, snapshot_path)
+
+    def run(self):
+        os.makedirs(self._directory, exist_ok=True)
+        generation = read_snapshot(self._directory).get('journal', 0)
+        journal = open(journal_path(self._directory, generation), 'a', encoding='utf-8')
+        try:
+            while True:
+                with self._condition:
+                    while not self._queue and not self._stopping:
+                        self._condition.wait()
+                    items = self._queue
+                    self._queue = []
+                    stopping = self._stopping
+                for kind, payload in items:
+                    if kind == 'records':
+                        journal.write(''.join(json.dumps(self._stamp(record), separators=(',', ':')) + '\n'
+                                              for record in payload))
+                    else:
+                        # Nowa generacja: migawka wskazuje na pusty dziennik, stary jest usuwany
+                        journal.close()
+                        self._write_snapshot(payload, generation + 1)
+                        old_path = journal_path(self._directory, generation)
+                        generation += 1
+                        journal = open(journal_path(self._directory, generation), 'w', encoding='utf-8')
+                        try:
+                            os.remove(old_path)
+                        except OSError:
+                            pass
+                journal.flush()
+                os.fsync(journal.fileno())
+                if stopping:
+                    return
+        except OSError as e:
+            print(f"Session journal write failed: {e}")
+        finally:
+            journal.close()
+
+
+class SessionJournal(QObject):
+    """
+    Autozapis sesji: zbiera w wątku GUI zwięzłe rekordy zmian (edycje dokumentów, zakładki, układ)
+    i co FLUSH_INTERVAL_MS przekazuje je paczką do JournalWriterThread.
+    Zapis, fsync i kompaktowanie do migawki odbywają się wyłącznie w wątku zapisu.
+    """
+    def __init__(self, registry, directory=SESSION_DIR, parent=None):
+        super().__init__(parent)
+        self._registry = registry
+        self._buffer = []
+        self._layout_dirty = False
+        self._records_since_snapshot = 0
+        self._revisions = {} # key: tab_id, value: ostatnia zapisana rewizja dokumentu
+        self._stopped = False
+        self._writer = JournalWriterThread(directory)
+        self._writer.start()
+        self._timer = QTimer(self)
+        self._timer.setInterval(FLUSH_INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    # --- Rekordy ---
+    def tab_opened(self, tab_id, title, descriptor, content_widget):
+        """ Zakładka otwarta lub jej widget odtworzony z opisu - treść równa plikowi bazowemu. """
+        if self._stopped or descriptor is None:
+            return # Zakładek bez opisu nie da się odtworzyć
+        self._buffer.append({'t': 'o', 'id': tab_id, 'title': title, 'd': descriptor})
+        self.watch(tab_id, content_widget)
+
+    def tab_renamed(self, tab_id, title):
+        if not self._stopped:
+            self._buffer.append({'t': 'n', 'id': tab_id, 'title': title})
+
+    def tab_closed(self, tab_id):
+        if not self._stopped:
+            self._revisions.pop(tab_id, None)
+            self._buffer.append({'t': 'c', 'id': tab_id})
+
+    def mark_layout_dirty(self, *args):
+        """ Układ zostanie zapisany przy najbliższym opróżnieniu bufora (przyjmuje argumenty sygnałów). """
+        self._layout_dirty = True
+
+    def watch(self, tab_id, content_widget):
+        """ Śledzi edycje dokumentu widgetu treści (jeśli go ma). """
+        document = getattr(content_widget, 'document', None)
+        if content_widget is None or document is None:
+            return
+        if getattr(content_widget, 'is_loading', False):
+            return # Treść wczytywana w tle - śledzenie zaczyna się po wczytaniu (MainWindow._on_editor_loaded)
+        document = document()
+        self._revisions[tab_id] = document.revision()
+        document.contentsChange.connect(partial(self._on_contents_change, tab_id))
+        document.modificationChanged.connect(partial(self._on_modification_changed, tab_id))
+
+    def _on_contents_change(self, tab_id, position, chars_removed, chars_added):
+        if self._stopped or tab_id not in self._revisions:
+            return
+        document = self.sender()
+        revision = document.revision()
+        if revision == self._revisions[tab_id]:
+            return # Zmiana samego formatowania (np. podświetlanie) - tekst bez zmian
+        self._revisions[tab_id] = revision
+        added = ''
+        if chars_added:
+            cursor = QTextCursor(document)
+            cursor.setPosition(position)
+            cursor.setPosition(min(position + chars_added, document.characterCount() - 1), QTextCursor.KeepAnchor)
+            added = cursor.selectedText().replace(' ', '\n')
+
+        # Kolejne znaki pisane w jednym miejscu łączymy w jeden rekord
+        last = self._buffer[-1] if self._buffer else None
+        if (not chars_removed and last is not None and last['t'] == 'e' and last['id'] == tab_id
+                and not last['r'] and last['p'] + len(last['a']) == position):
+            last['a'] += added
+            return
+        self._buffer.append({'t': 'e', 'id': tab_id, 'p': position, 'r': chars_removed, 'a': added})
+
+    def _on_modification_changed(self, tab_id, modified):
+        if not modified and not self._stopped and tab_id in self._revisions:
+            content_widget = self._registry.all_tabs_data.get(tab_id, (None, None))[0]
+            file_path = getattr(content_widget, 'file_path', None)
+            self._buffer.append({'t': 's', 'id': tab_id, 'f': file_path})
+
+    # --- Zapis ---
+    def flush(self):
+        """ Przekazuje zebrane rekordy do wątku zapisu; co COMPACT_EVERY_RECORDS zleca kompaktowanie. """
+        if self._stopped:
+            return
+        if self._layout_dirty:
+            self._layout_dirty = False
+            self._buffer.append({'t': 'l', 'w': [window.session_layout() for window in self._registry.windows]})
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        self._writer.submit(records)
+        self._records_since_snapshot += len(records)
+        if self._records_since_snapshot >= COMPACT_EVERY_RECORDS:
+            self.compact()
+
+    def capture_snapshot(self):
+        """ Stan sesji do migawki: zakładki (tekst tylko zmodyfikowanych dokumentów) i układ okien. """
+        registry = self._registry
+        tabs = {}
+        for tab_id, (content_widget, title) in registry.all_tabs_data.items():
+            descriptor = registry.tab_descriptors.get(tab_id)
+            if descriptor is None:
+                continue
+            tab = {'title': title, 'd': descriptor}
+            document = getattr(content_widget, 'document', None) if content_widget is not None else None
+            if document is not None and document().isModified():
+                tab['text'] = document().toPlainText()
+            tabs[str(tab_id)] = tab
+        return {'tabs': tabs, 'windows': [window.session_layout() for window in registry.windows],
+                'next_tab_id': registry._next_tab_id}
+
+    def compact(self):
+        """ Zleca zapis migawki bieżącego stanu; wcześniejsze rekordy stają się zbędne. """
+        if self._stopped:
+            return
+        self._buffer = []
+        self._layout_dirty = False
+        self._writer.submit_snapshot(self.capture_snapshot())
+        self._records_since_snapshot = 0
+
+    def shutdown(self):
+        """ Zapisuje końcową migawkę i czeka na zakończenie wątku zapisu. """
+        if self._stopped:
+            return
+        self._timer.stop()
+        self.compact()
+        self._stopped = True
+        self._writer.stop()
+
+
+class SessionState:
+    """ Sesja odczytana z migawki i dziennika: zakładki (z tekstem zmodyfikowanych dokumentów) i układ okien. """
+    def __init__(self):
+        self.tabs = {} # key: tab_id, value: {'title', 'd', 'text' (lub None), 'b'}
+        self.windows = []
+        self.next_tab_id = 0
+        self._edits = {} # key: tab_id, value: lista (p, r, a) do zastosowania na tekście bazowym
+
+    def apply(self, record):
+        kind = record['t']
+        tab_id = record.get('id')
+        if kind == 'o':
+            self.tabs[tab_id] = {'title': record['title'], 'd': record['d'], 'text': None, 'b': record.get('b')}
+            self._edits.pop(tab_id, None)
+            self.next_tab_id = max(self.next_tab_id, tab_id + 1)
+        elif kind == 'e' and tab_id in self.tabs:
+            self._edits.setdefault(tab_id, []).append((record['p'], record['r'], record['a']))
+        elif kind == 's' and tab_id in self.tabs:
+            self.tabs[tab_id].update(text=None, b=record.get('b'))
+            self._edits.pop(tab_id, None)
+        elif kind == 'n' and tab_id in self.tabs:
+            self.tabs[tab_id]['title'] = record['title']
+        elif kind == 'c':
+            self.tabs.pop(tab_id, None)
+            self._edits.pop(tab_id, None)
+        elif kind == 'l':
+            self.windows = record['w']
+
+    def materialize_edits(self):
+        """ Nakłada zebrane edycje na tekst bazowy (migawka lub plik) przez kursor QTextDocument - bez kopiowania całego tekstu na edycję. """
+        for tab_id, edits in self._edits.items():
+            tab = self.tabs[tab_id]
+            base = tab.get('text')
+            if base is None:
+                file_path = (tab['d'] or {}).get('file_path')
+                if not file_path or file_stamp(file_path) != tab.get('b'):
+                    print(f"Session: file of tab ID {tab_id} changed since the journal was written, skipping its edits.")
+                    continue
+                base = read_file_text(file_path)
+                if base is None:
+                    continue
+            document = QTextDocument()
+            document.setPlainText(base)
+            cursor = QTextCursor(document)
+            for position, removed, added in edits:
+                cursor.setPosition(position)
+                if removed:
+                    cursor.setPosition(min(position + removed, document.characterCount() - 1), QTextCursor.KeepAnchor)
+                if added:
+                    cursor.insertText(added) # Zastępuje zaznaczenie
+                else:
+                    cursor.removeSelectedText()
+            tab['text'] = document.toPlainText()
+        self._edits = {}
+
+def read_snapshot(directory):
+    try:
+        with open(os.path.join(directory, SNAPSHOT_NAME), 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return snapshot if snapshot.get('version') == SESSION_VERSION else {}
+
+def load_session(directory=SESSION_DIR):
+    """ Odtwarza stan sesji z migawki i dziennika jej generacji. Zwraca SessionState lub None, jeśli brak sesji. """
+    snapshot = read_snapshot(directory)
+    state = SessionState()
+    for key, tab in snapshot.get('tabs', {}).items():
+        state.tabs[int(key)] = {'title': tab['title'], 'd': tab.get('d'), 'text': tab.get('text'), 'b': tab.get('b')}
+    state.windows = snapshot.get('windows', [])
+    state.next_tab_id = snapshot.get('next_tab_id', 0)
+
+    found = bool(snapshot)
+    try:
+        with open(journal_path(directory, snapshot.get('journal', 0)), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break # Niedokończony ostatni zapis (awaria w trakcie) - reszta jest niewiarygodna
+                state.apply(record)
+                found = True
+    except OSError:
+        pass
+    if not found:
+        return None
+    state.materialize_edits()
+    return state
@@ -0,0 +1,79 @@
+# tab_lifecycle.py
+import gc
+import weakref
+from collections import OrderedDict
+from PyQt5.QtCore import QCoreApplication, QEvent
+
+# Łączny budżet pamięci (szacunkowy) dla widgetów ukrytych zakładek
+HIDDEN_TABS_MEMORY_BUDGET = 64 * 1024 * 1024
+# Szacunkowy koszt widgetu bez własnej metody memory_estimate()
+DEFAULT_WIDGET_COST = 64 * 1024
+
+def estimate_widget_memory(widget):
+    """ Szacuje pamięć zajmowaną przez widget treści (widgety mogą podać własne memory_estimate()). """
+    estimate = getattr(widget, 'memory_estimate', None)
+    if estimate is not None:
+        return estimate()
+    return DEFAULT_WIDGET_COST
+
+
+class HiddenTabCache:
+    """
+    Ukryte zakładki, których widgety można zwolnić, w kolejności LRU (najdawniej ukryta pierwsza).
+    Pilnuje, by suma szacowanych kosztów nie przekraczała budżetu.
+    """
+    def __init__(self, budget=HIDDEN_TABS_MEMORY_BUDGET):
+        self.budget = budget
+        self.total = 0
+        self._costs = OrderedDict() # key: tab_id, value: szacowany koszt
+
+    def __contains__(self, tab_id):
+        return tab_id in self._costs
+
+    def __len__(self):
+        return len(self._costs)
+
+    def add(self, tab_id, cost):
+        self.remove(tab_id)
+        self._costs[tab_id] = cost
+        self.total += cost
+
+    def remove(self, tab_id):
+        cost = self._costs.pop(tab_id, None)
+        if cost is not None:
+            self.total -= cost
+
+    def evict_over_budget(self):
+        """ Zwraca listę tab_id (od najdawniej ukrytych) do zwolnienia, aby zmieścić się w budżecie. """
+        evicted = []
+        while self.total > self.budget and self._costs:
+            tab_id, cost = self._costs.popitem(last=False)
+            self.total -= cost
+            evicted.append(tab_id)
+        return evicted
+
+
+class LeakTracker:
+    """
+    Wykrywacz wycieków oparty na weakref: śledzi obiekty, które powinny zostać zwolnione
+    (zamknięte zakładki, usunięte panele) i raportuje te, które wciąż żyją.
+    """
+    def __init__(self):
+        self._refs = [] # lista (weakref, opis)
+
+    def track(self, obj, description):
+        try:
+            self._refs.append((weakref.ref(obj), description))
+        except TypeError:
+            pass # Obiekt nie obsługuje weakref
+
+    def collect(self):
+        """ Wykonuje odroczone usunięcia Qt (deleteLater) i odśmiecanie Pythona. """
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        gc.collect()
+
+    def leaks(self):
+        """ Zwraca opisy obiektów, które nadal żyją; zwolnione przestają być śledzone. """
+        self.collect()
+        self._refs = [(ref, description) for ref, description in self._refs if ref() is not None]
+        return [description for _, description in self._refs]
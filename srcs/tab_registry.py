@@ -0,0 +1,96 @@
+# tab_registry.py
+from PyQt5.QtWidgets import QApplication
+from search_index import TrigramIndex
+from tab_lifecycle import HiddenTabCache, LeakTracker
+from task_runner import TaskRunner, PRIORITY_FOCUSED, PRIORITY_VISIBLE, PRIORITY_BACKGROUND, PRIORITY_HIDDEN
+from find_results import FindInFilesThread
+
+class TabRegistry:
+    """
+    Wspólny stan zakładek wszystkich okien aplikacji.
+    Każde MainWindow odwołuje się do tych samych słowników, więc zakładka przeniesiona
+    do innego okna zachowuje swoje ID i ten sam widget treści (bez kopiowania dokumentu).
+    """
+    def __init__(self):
+        # key: unique_id, value: (content_widget, title)
+        self.all_tabs_data = {}
+        # key: unique_id, value: dict, np. {'kind': 'editor', 'file_path': ...}
+        self.tab_descriptors = {}
+        # Mapuje widget treści na panel (w dowolnym oknie), w którym się aktualnie znajduje
+        self.content_widget_to_tab_widget = {}
+        # Mapuje ścieżkę otwartego pliku na ID zakładki
+        self.file_path_to_tab_id = {}
+        self.hidden_tabs = HiddenTabCache()
+        self.leak_tracker = LeakTracker()
+        # Indeks tytułów/ścieżek dla palety "przejdź do zakładki" (wspólny dla okien)
+        self.search_index = TrigramIndex()
+        # Otwarte okna (trzymamy referencje, by okna wyrwanych zakładek nie zostały zwolnione)
+        self.windows = []
+        self._next_tab_id = 0
+        # Autozapis sesji (session_journal.SessionJournal) lub None, jeśli wyłączony
+        self.journal = None
+        # Nagrywanie operacji układu (layout_recorder.LayoutRecorder) lub None
+        self.layout_recorder = None
+        # Pula zadań w tle dla dostawców treści zakładek (wspólna - ogranicza współbieżność całej aplikacji)
+        self.task_runner = TaskRunner(self.task_priority)
+        QApplication.instance().focusChanged.connect(self.task_runner.reprioritize)
+        QApplication.instance().aboutToQuit.connect(self.task_runner.stop)
+        # Wyszukiwanie "znajdź w plikach" (wątek uruchamiany i pula procesów tworzona przy pierwszym użyciu)
+        self.find_thread = FindInFilesThread()
+        QApplication.instance().aboutToQuit.connect(self.find_thread.stop)
+
+        # Stan bieżącego przeciągania - drop może nastąpić w innym oknie niż start
+        self.dragged_content_widget = None
+        self.dragged_tab_title = ""
+        self.source_tab_widget = None
+        self.drag_dropped = False
+
+    def next_tab_id(self):
+        """ Generuje unikalne (w obrębie aplikacji) ID zakładki. """
+        id_val = self._next_tab_id
+        self._next_tab_id += 1
+        return id_val
+
+    def register_window(self, window):
+        self.windows.append(window)
+
+    def unregister_window(self, window):
+        if window in self.windows:
+            self.windows.remove(window)
+
+    def all_tab_widgets(self):
+        """ Zwraca panele ze wszystkich okien. """
+        panels = []
+        for window in self.windows:
+            panels.extend(window.find_all_tab_widgets())
+        return panels
+
+    def task_priority(self, tab_id):
+        """ Priorytet zadań zakładki: bieżąca w aktywnym panelu, bieżąca w innym panelu, w tle, ukryta. """
+        content_widget = self.all_tabs_data.get(tab_id, (None, None))[0]
+        tab_widget = self.content_widget_to_tab_widget.get(content_widget) if content_widget is not None else None
+        if tab_widget is None:
+            return PRIORITY_HIDDEN
+        if tab_widget.currentWidget() is not content_widget:
+            return PRIORITY_BACKGROUND
+        window = tab_widget.window()
+        if window in self.windows and window.find_focused_tab_widget() is tab_widget:
+            return PRIORITY_FOCUSED
+        return PRIORITY_VISIBLE
+
+    def mark_menus_dirty(self):
+        """ Menu 'Narzędzia' każdego okna zostanie przebudowane przy najbliższym otwarciu. """
+        for window in self.windows:
+            window._tools_menu_dirty = True
+
+    def start_drag(self, source_tab_widget, content_widget, title):
+        self.dragged_content_widget = content_widget
+        self.source_tab_widget = source_tab_widget
+        self.dragged_tab_title = title
+        self.drag_dropped = False
+
+    def reset_drag(self):
+        self.dragged_content_widget = None
+        self.source_tab_widget = None
+        self.dragged_tab_title = ""
+        self.drag_dropped = False
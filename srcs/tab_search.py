@@ -0,0 +1,110 @@
+# tab_search.py
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+from PyQt5.QtCore import Qt, pyqtSignal
+
+# Maksymalna liczba wyników pokazywanych w popupie
+MAX_RESULTS = 50
+
+def fuzzy_score(query, text):
+    """
+    Ocenia dopasowanie "fuzzy" (query jako podciąg znaków text, bez względu na wielkość liter).
+    Zwraca None, jeśli brak dopasowania. Większy wynik = lepsze dopasowanie
+    (premia za kolejne znaki i trafienia na początku słów).
+    """
+    if not query:
+        return 0
+    query = query.lower()
+    lowered = text.lower()
+    score = 0
+    position = 0
+    previous_match = -2
+    for char in query:
+        found = lowered.find(char, position)
+        if found == -1:
+            return None
+        if found == previous_match + 1:
+            score += 5 # Znaki obok siebie
+        if found == 0 or lowered[found - 1] in ' _-./\\':
+            score += 3 # Początek słowa
+        score += 1
+        previous_match = found
+        position = found + 1
+    # Krótsze teksty wygrywają przy tym samym dopasowaniu
+    return score * 100 - len(text)
+
+def fuzzy_filter(query, candidates, limit=MAX_RESULTS):
+    """ Filtruje i sortuje listę (key, label) według fuzzy_score. Zwraca co najwyżej limit elementów. """
+    scored = []
+    for key, label in candidates:
+        score = fuzzy_score(query, label)
+        if score is not None:
+            scored.append((score, key, label))
+    scored.sort(key=lambda item: -item[0])
+    return [(key, label) for _, key, label in scored[:limit]]
+
+
+class TabSearchPopup(QDialog):
+    """
+    Prosty popup "przejdź do zakładki": pole tekstowe + lista wyników.
+    search_fn(query) zwraca listę (key, label); wybrany key jest emitowany sygnałem itemChosen.
+    Bez search_fn popup tylko emituje queryChanged, a wyniki podaje się asynchronicznie przez set_results().
+    """
+    itemChosen = pyqtSignal(object)
+    queryChanged = pyqtSignal(str)
+
+    def __init__(self, search_fn, parent=None, placeholder="Szukaj zakładki..."):
+        super().__init__(parent, Qt.Popup)
+        self._search_fn = search_fn
+        self.resize(480, 320)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(4, 4, 4, 4)
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText(placeholder)
+        self.results_list = QListWidget()
+        layout.addWidget(self.query_edit)
+        layout.addWidget(self.results_list)
+        self.setLayout(layout)
+
+        self.query_edit.textChanged.connect(self.refresh_results)
+        self.query_edit.returnPressed.connect(self.accept_current)
+        self.results_list.itemActivated.connect(self.accept_item)
+
+    def refresh_results(self, query):
+        self.queryChanged.emit(query)
+        if self._search_fn is not None:
+            self.set_results(self._search_fn(query))
+
+    def set_results(self, results):
+        """ Wypełnia listę wyników (key, label). """
+        self.results_list.clear()
+        for key, label in results:
+            item = QListWidgetItem(label)
+            item.setData(Qt.UserRole, key)
+            self.results_list.addItem(item)
+        if self.results_list.count() > 0:
+            self.results_list.setCurrentRow(0)
+
+    def keyPressEvent(self, event):
+        # Strzałki w polu tekstowym przesuwają zaznaczenie na liście
+        if event.key() in (Qt.Key_Down, Qt.Key_Up) and self.results_list.count() > 0:
+            step = 1 if event.key() == Qt.Key_Down else -1
+            row = (self.results_list.currentRow() + step) % self.results_list.count()
+            self.results_list.setCurrentRow(row)
+            return
+        super().keyPressEvent(event)
+
+    def accept_current(self):
+        item = self.results_list.currentItem()
+        if item is not None:
+            self.accept_item(item)
+
+    def accept_item(self, item):
+        self.itemChosen.emit(item.data(Qt.UserRole))
+        self.accept()
+
+    def popup_at(self, global_pos):
+        self.refresh_results(self.query_edit.text())
+        self.move(global_pos)
+        self.show()
+        self.query_edit.setFocus()
@@ -1,40 +1,265 @@
 # tab_widget.py
-from PyQt5.QtWidgets import QTabWidget, QApplication, QWidget
+from collections import OrderedDict
+from functools import partial
+from PyQt5.QtWidgets import QTabWidget, QApplication, QWidget, QToolButton, QMenu
 from PyQt5.QtCore import Qt, QMimeData, QPoint, QRect, pyqtSignal
 from PyQt5.QtGui import QDrag, QPixmap, QPainter, QCursor
+from tab_search import TabSearchPopup, fuzzy_filter
+from theme import ThemeManager
 
 # Unikalny typ MIME dla naszych zakładek
 TAB_MIME_TYPE = "application/x-myapp-tab"
 
+# Domyślna liczba zakładek materializowanych w QTabBar w trybie wirtualnym
+VIRTUAL_TAB_LIMIT = 50
+# Ile pozycji z listy przepełnienia pokazujemy bezpośrednio w menu
+OVERFLOW_MENU_LIMIT = 30
+# Własna stała strefy "środek panelu" (Qt nie ma takiej wartości; różna od Qt.Horizontal/Qt.Vertical)
+TARGET_IS_CENTRAL_WIDGET = 0
+
 class DropIndicator(QWidget):
-    """ Prosty widget pokazujący, gdzie nastąpi upuszczenie. """
+    """ Prosty widget pokazujący, gdzie nastąpi upuszczenie. Kolory z bieżącego motywu (theme.py), bez arkusza stylów. """
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setGeometry(0, 0, 0, 0)
         self.setAttribute(Qt.WA_TransparentForMouseEvents) # Ignoruj zdarzenia myszy
-        self.setStyleSheet("background-color: rgba(0, 120, 215, 0.5); border: 1px solid rgb(0, 120, 215);")
         self.hide()
 
+    def paintEvent(self, event):
+        theme = ThemeManager.instance()
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), theme.color('drop_indicator'))
+        painter.setPen(theme.color('drop_indicator_border'))
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+def drop_zone_for_point(rect, pos):
+    """
+    Określa strefę upuszczenia dla punktu pos w prostokącie panelu rect.
+    Zwraca (orientation, split_half): TARGET_IS_CENTRAL_WIDGET dla środka,
+    Qt.Vertical/Qt.Horizontal z połową 0 (góra/lewo) lub 1 (dół/prawo) dla krawędzi.
+    """
+    margin = int(rect.height() * 0.25) # 25% margines na krawędzie
+    width_margin = int(rect.width() * 0.25)
+
+    # Prosta logika: środek vs krawędzie
+    if QRect(rect.topLeft() + QPoint(width_margin, margin), rect.bottomRight() - QPoint(width_margin, margin)).contains(pos):
+        return TARGET_IS_CENTRAL_WIDGET, 0 # Środek - wstaw jako nową zakładkę
+    if pos.y() < margin: # Górna krawędź
+        return Qt.Vertical, 0
+    if pos.y() > rect.height() - margin: # Dolna krawędź
+        return Qt.Vertical, 1
+    if pos.x() < width_margin: # Lewa krawędź
+        return Qt.Horizontal, 0
+    if pos.x() > rect.width() - width_margin: # Prawa krawędź
+        return Qt.Horizontal, 1
+    # Domyślnie środek, jeśli gdzieś pomiędzy
+    return TARGET_IS_CENTRAL_WIDGET, 0
+
 class DraggableTabWidget(QTabWidget):
     # Sygnał emitowany, gdy zakładka jest przeciągana poza widget
     tabDraggedOut = pyqtSignal(int, QPoint) # index, globalPos
     # Sygnał emitowany, gdy zakładka jest upuszczana na ten widget (z innego)
     tabDroppedIn = pyqtSignal(QWidget, str, QPoint) # content_widget, title, globalPos
+    # Sygnał emitowany po kliknięciu przycisku zamknięcia zakładki
+    contentCloseRequested = pyqtSignal(QWidget) # content_widget
+    # Początek i koniec przeciągania - MainWindow przechowuje stan i sprząta po zakończeniu
+    tabDragStarted = pyqtSignal(QWidget, str) # content_widget, title
+    tabDragFinished = pyqtSignal(bool) # czy drop został przyjęty
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMovable(True)
         self.setAcceptDrops(True)
+        self.setTabsClosable(True)
+        self.tabCloseRequested.connect(self._on_tab_close_requested)
         self._drag_start_position = QPoint()
         self._dragged_tab_index = -1
         self._dragged_content_widget = None
         self._dragged_tab_title = ""
-        self.drop_indicator = DropIndicator(self.window()) # Wskaźnik na głównym oknie
+        self.drop_indicator = None # Wskaźnik okna (jeden na okno) - ustawia MainWindow.connect_tab_widget_signals
+
+        # --- Wirtualizacja paska zakładek ---
+        # Wszystkie zakładki panelu (także niezmaterializowane) - członkostwo i tytuł w O(1)
+        self._tab_titles = {} # key: content_widget, value: title
+        # Zakładki poza QTabBar (lista przepełnienia), w kolejności dodania
+        self._overflow = OrderedDict() # key: content_widget, value: title
+        # Kolejność aktywacji zmaterializowanych zakładek (ostatnio używana na końcu)
+        self._activation_order = OrderedDict()
+        self.virtual_tab_limit = None # None = wirtualizacja wyłączona
+
+        self._overflow_button = QToolButton(self)
+        self._overflow_button.setPopupMode(QToolButton.InstantPopup)
+        self._overflow_button.setAutoRaise(True)
+        self._overflow_menu = QMenu(self._overflow_button)
+        self._overflow_menu.aboutToShow.connect(self._rebuild_overflow_menu)
+        self._overflow_button.setMenu(self._overflow_menu)
+        self.setCornerWidget(self._overflow_button, Qt.TopRightCorner)
+        self._overflow_button.hide()
+        self.currentChanged.connect(self._on_current_changed)
 
         # Poprawka: Potrzebujemy dostępu do paska zakładek (TabBar)
         # Niestety, bezpośredni dostęp do TabBar i jego sygnałów może być kruchy.
         # Użyjemy event filter lub obejścia przez eventy myszy.
 
+    # --- Wirtualizacja: nadpisane API QTabWidget ---
+
+    def addTab(self, widget, title):
+        """ Dodaje zakładkę; w trybie wirtualnym ponad limit trafia ona na listę przepełnienia. """
+        self._tab_titles[widget] = title
+        if self.virtual_tab_limit is not None and super().count() >= self.virtual_tab_limit:
+            widget.setParent(None) # Niezmaterializowana - bez rodzica, trzymana tylko w słowniku
+            self._overflow[widget] = title
+            self._update_overflow_button()
+            return -1
+        return super().addTab(widget, title)
+
+    def removeTab(self, index):
+        """ Usuwa zakładkę z paska i (w trybie wirtualnym) uzupełnia pasek z listy przepełnienia. """
+        widget = self.widget(index)
+        super().removeTab(index)
+        if widget is not None:
+            self._tab_titles.pop(widget, None)
+            self._activation_order.pop(widget, None)
+        self._promote_from_overflow()
+
+    def indexOf(self, widget):
+        """ Indeks zakładki w QTabBar; sprawdzenie członkostwa w O(1) przed skanowaniem paska. """
+        if widget not in self._tab_titles or widget in self._overflow:
+            return -1
+        return super().indexOf(widget)
+
+    def setCurrentWidget(self, widget):
+        if widget in self._overflow:
+            self._materialize(widget)
+        super().setCurrentWidget(widget)
+
+    def contains_tab(self, widget):
+        """ Czy panel zawiera zakładkę (zmaterializowaną lub z listy przepełnienia). O(1). """
+        return widget in self._tab_titles
+
+    def tab_title(self, widget):
+        """ Tytuł zakładki w tym panelu lub None. O(1). """
+        return self._tab_titles.get(widget)
+
+    def set_tab_title(self, widget, title):
+        """ Zmienia tytuł zakładki (także niezmaterializowanej). Zwraca True, jeśli była w panelu. """
+        if widget not in self._tab_titles:
+            return False
+        self._tab_titles[widget] = title
+        if widget in self._overflow:
+            self._overflow[widget] = title
+        else:
+            self.setTabText(super().indexOf(widget), title)
+        return True
+
+    def all_tab_widgets(self):
+        """ Widgety treści wszystkich zakładek panelu w kolejności paska, a po nich niezmaterializowane. """
+        return [self.widget(i) for i in range(self.count())] + list(self._overflow)
+
+    def total_count(self):
+        """ Liczba wszystkich zakładek panelu, łącznie z niezmaterializowanymi. """
+        return len(self._tab_titles)
+
+    def discard_tab(self, widget):
+        """ Usuwa zakładkę z panelu niezależnie od tego, czy jest zmaterializowana. Zwraca True, jeśli była w panelu. """
+        if widget in self._overflow:
+            del self._overflow[widget]
+            del self._tab_titles[widget]
+            self._update_overflow_button()
+            return True
+        index = self.indexOf(widget)
+        if index == -1:
+            return False
+        self.removeTab(index)
+        return True
+
+    def set_virtual_tab_limit(self, limit):
+        """ Włącza (limit = liczba zakładek w QTabBar) lub wyłącza (None) tryb wirtualny. """
+        self.virtual_tab_limit = limit
+        if limit is None:
+            while self._overflow:
+                widget, title = self._overflow.popitem(last=False)
+                super().addTab(widget, title)
+        else:
+            while super().count() > limit:
+                self._evict_one()
+        self._update_overflow_button()
+
+    def _materialize(self, widget):
+        """ Przenosi zakładkę z listy przepełnienia do QTabBar, w razie potrzeby zwalniając miejsce. """
+        title = self._overflow.pop(widget)
+        if self.virtual_tab_limit is not None and super().count() >= self.virtual_tab_limit:
+            self._evict_one()
+        super().addTab(widget, title)
+        self._update_overflow_button()
+
+    def _evict_one(self):
+        """ Przenosi najdawniej używaną (nie bieżącą) zakładkę z QTabBar na listę przepełnienia. """
+        current = self.currentWidget()
+        victim = None
+        for candidate in self._activation_order:
+            if candidate is not current and super().indexOf(candidate) != -1:
+                victim = candidate
+                break
+        if victim is None: # Nigdy nie aktywowane - weź ostatnią zakładkę z paska
+            for index in range(super().count() - 1, -1, -1):
+                if self.widget(index) is not current:
+                    victim = self.widget(index)
+                    break
+        if victim is None:
+            return
+        super().removeTab(super().indexOf(victim))
+        self._activation_order.pop(victim, None)
+        victim.setParent(None)
+        self._overflow[victim] = self._tab_titles[victim]
+
+    def _promote_from_overflow(self):
+        """ Uzupełnia QTabBar pierwszą zakładką z listy przepełnienia (panel nie może wyglądać na pusty). """
+        if self._overflow and (self.virtual_tab_limit is None or super().count() < self.virtual_tab_limit):
+            widget, title = self._overflow.popitem(last=False)
+            super().addTab(widget, title)
+        self._update_overflow_button()
+
+    def _on_tab_close_requested(self, index):
+        widget = self.widget(index)
+        if widget is not None:
+            self.contentCloseRequested.emit(widget) # Decyzję o zamknięciu podejmuje MainWindow
+
+    def _on_current_changed(self, index):
+        widget = self.widget(index)
+        if widget is not None:
+            self._activation_order.pop(widget, None)
+            self._activation_order[widget] = True
+
+    def _update_overflow_button(self):
+        self._overflow_button.setText(f"» {len(self._overflow)}")
+        self._overflow_button.setVisible(bool(self._overflow))
+
+    def _rebuild_overflow_menu(self):
+        """ Menu przepełnienia: pierwsze OVERFLOW_MENU_LIMIT pozycji i wyszukiwarka dla reszty. """
+        self._overflow_menu.clear()
+        search_action = self._overflow_menu.addAction("Szukaj zakładki...")
+        search_action.triggered.connect(self.show_tab_search)
+        self._overflow_menu.addSeparator()
+        for shown, (widget, title) in enumerate(self._overflow.items()):
+            if shown >= OVERFLOW_MENU_LIMIT:
+                self._overflow_menu.addAction(f"... i {len(self._overflow) - shown} więcej").setEnabled(False)
+                break
+            action = self._overflow_menu.addAction(title)
+            action.triggered.connect(partial(self.setCurrentWidget, widget))
+
+    def show_tab_search(self):
+        """ Otwiera popup fuzzy-search po wszystkich zakładkach panelu. """
+        candidates = list(self._tab_titles.items())
+        popup = TabSearchPopup(lambda query: fuzzy_filter(query, candidates), self)
+        popup.itemChosen.connect(self._activate_from_search)
+        popup.popup_at(self.mapToGlobal(self.tabBar().geometry().bottomLeft()))
+
+    def _activate_from_search(self, widget):
+        if widget in self._tab_titles:
+            self.setCurrentWidget(widget)
+            widget.setFocus()
+
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
             tab_index = self.tabBar().tabAt(event.pos())
@@ -71,12 +296,16 @@ class DraggableTabWidget(QTabWidget):
             super().mouseMoveEvent(event)
             return
 
+        tab_id = self._dragged_content_widget.property("tab_id")
+        if tab_id is None:
+            self._reset_drag_state()
+            super().mouseMoveEvent(event)
+            return
+
         mime_data = QMimeData()
-        # Przechowujemy wskaźnik (jako int) na widget treści - ryzykowne, ale proste
-        # Lepsze byłoby ID lub inny unikalny identyfikator.
-        # Na potrzeby przykładu użyjemy id(), ale UWAGA: nie gwarantuje unikalności po usunięciu/stworzeniu widgetu!
-        # Alternatywnie, MainWindow mógłby zarządzać unikalnymi ID.
-        mime_data.setData(TAB_MIME_TYPE, str(id(self._dragged_content_widget)).encode('utf-8'))
+        # Stabilne ID zakładki (nadawane przez rejestr) - ważne we wszystkich oknach aplikacji,
+        # w przeciwieństwie do id() widgetu, które może zostać użyte ponownie po jego usunięciu
+        mime_data.setData(TAB_MIME_TYPE, str(tab_id).encode('utf-8'))
         mime_data.setText(self._dragged_tab_title) # Dodajemy też tytuł
 
         drag = QDrag(self)
@@ -96,21 +325,17 @@ class DraggableTabWidget(QTabWidget):
 
         # Wyemituj sygnał, że przeciąganie się zaczęło (MainWindow musi wiedzieć)
         self.tabDraggedOut.emit(original_index, QCursor.pos()) # Przekaż globalną pozycję
+        self.tabDragStarted.emit(self._dragged_content_widget, self._dragged_tab_title)
 
         # Rozpocznij operację przeciągania
         drop_action = drag.exec_(Qt.MoveAction | Qt.CopyAction) # Zezwól na przenoszenie
 
         # --- Po zakończeniu przeciągania ---
-        if drop_action == Qt.IgnoreAction:
-            # Upuszczono w miejscu niedozwolonym LUB anulowano - przywróć zakładkę
-            # MainWindow powinien to obsłużyć, bo zakładka mogła być już gdzieś dodana
-            # print(f"Drag ignored, tab {self._dragged_tab_title} should be restored if not handled elsewhere.")
-            # Jeśli MainWindow nie obsłużył, można spróbować przywrócić tutaj:
-            # self.insertTab(original_index, self._dragged_content_widget, self._dragged_tab_title)
-            pass # MainWindow powinien obsłużyć przywrócenie
-
         self._reset_drag_state()
         self.hide_drop_indicator()
+        # IgnoreAction: upuszczono w miejscu niedozwolonym, poza oknami (wyrwanie do nowego okna)
+        # LUB anulowano - decyzję (przywrócenie / nowe okno) podejmuje MainWindow
+        self.tabDragFinished.emit(drop_action != Qt.IgnoreAction)
 
 
     def _reset_drag_state(self):
@@ -142,19 +367,18 @@ class DraggableTabWidget(QTabWidget):
     def dropEvent(self, event):
         self.hide_drop_indicator()
         if event.mimeData().hasFormat(TAB_MIME_TYPE):
-            # Identyfikator widgetu z danych MIME (bardzo uproszczone!)
-            # W rzeczywistej aplikacji potrzebny byłby solidniejszy mechanizm identyfikacji.
+            # ID zakładki z danych MIME
             try:
-                widget_id = int(event.mimeData().data(TAB_MIME_TYPE).data().decode('utf-8'))
+                tab_id = int(event.mimeData().data(TAB_MIME_TYPE).data().decode('utf-8'))
             except (ValueError, TypeError):
-                 print("Error: Invalid data in MIME for tab widget ID.")
+                 print("Error: Invalid data in MIME for tab ID.")
                  event.ignore()
                  return
 
             # MainWindow powinien znaleźć widget po ID i przekazać go
             # Tutaj emitujemy sygnał, że coś zostało upuszczone
             # MainWindow złapie ten sygnał i zdecyduje, co zrobić
-            # self.tabDroppedIn.emit(widget_id, event.mimeData().text(), event.pos(), self.mapToGlobal(event.pos()))
+            # self.tabDroppedIn.emit(tab_id, event.mimeData().text(), event.pos(), self.mapToGlobal(event.pos()))
 
             # UPROSZCZONA WERSJA (bezpośrednie dodanie - niezalecane w złożonej architekturze):
             # Znajdź widget (wymaga dostępu do globalnego stanu lub przekazania)
@@ -167,7 +391,7 @@ class DraggableTabWidget(QTabWidget):
             # MainWindow powinien teraz obsłużyć logikę dodania/podziału
             # Potrzebujemy sposobu, aby MainWindow wiedział, który widget upuszczono
             # Można przekazać pozycję globalną i widget docelowy
-            self.parent().handle_drop_event(self, event) # Przekazujemy event do rodzica (zakładając, że to MainWindow lub manager)
+            self.window().handle_drop_event(self, event) # Przekazujemy event do okna (rodzicem może być też QSplitter)
 
             event.acceptProposedAction()
         else:
@@ -176,39 +400,28 @@ class DraggableTabWidget(QTabWidget):
 
     def show_drop_indicator(self, pos):
         """ Pokazuje wskaźnik upuszczenia w odpowiednim miejscu. """
-        # TODO: Bardziej zaawansowana logika dzielenia (krawędzie vs środek)
         rect = self.rect()
-        margin = int(rect.height() * 0.25) # 25% margines na krawędzie
-        width_margin = int(rect.width() * 0.25)
-
-        drop_zone = QRect()
-        self.drop_indicator.split_orientation = None # Reset
-
-        # Prosta logika: środek vs krawędzie
-        if QRect(rect.topLeft() + QPoint(width_margin, margin), rect.bottomRight() - QPoint(width_margin, margin)).contains(pos):
-            # Środek - wstaw jako nową zakładkę
-            drop_zone = self.tabBar().geometry() # Celuj w pasek zakładek
-            self.drop_indicator.split_orientation = Qt.TargetIsCentralWidget # Własna stała
-        elif pos.y() < margin: # Górna krawędź
+        # Panel i strefę podaje indeks paneli okna jednym odczytem (PanelHitIndex.hit_test);
+        # lokalne liczenie strefy tylko, gdy indeks nie wskazuje tego panelu (np. okno bez indeksu)
+        window = self.window()
+        panel_index = getattr(window, 'panel_index', None)
+        panel, orientation, split_half = (panel_index.hit_test(self.mapTo(window, pos))
+                                          if panel_index is not None else (None, None, 0))
+        if panel is not self:
+            orientation, split_half = drop_zone_for_point(rect, pos)
+        self.drop_indicator.split_orientation = orientation
+        self.drop_indicator.split_half = split_half
+
+        if orientation == Qt.Vertical and split_half == 0: # Górna połowa
             drop_zone = QRect(rect.topLeft(), QPoint(rect.right(), rect.top() + rect.height() // 2))
-            self.drop_indicator.split_orientation = Qt.Vertical
-            self.drop_indicator.split_half = 0 # Górna połowa
-        elif pos.y() > rect.height() - margin: # Dolna krawędź
+        elif orientation == Qt.Vertical: # Dolna połowa
             drop_zone = QRect(QPoint(rect.left(), rect.top() + rect.height() // 2), rect.bottomRight())
-            self.drop_indicator.split_orientation = Qt.Vertical
-            self.drop_indicator.split_half = 1 # Dolna połowa
-        elif pos.x() < width_margin: # Lewa krawędź
-             drop_zone = QRect(rect.topLeft(), QPoint(rect.left() + rect.width() // 2, rect.bottom()))
-             self.drop_indicator.split_orientation = Qt.Horizontal
-             self.drop_indicator.split_half = 0 # Lewa połowa
-        elif pos.x() > rect.width() - width_margin: # Prawa krawędź
-             drop_zone = QRect(QPoint(rect.left() + rect.width() // 2, rect.top()), rect.bottomRight())
-             self.drop_indicator.split_orientation = Qt.Horizontal
-             self.drop_indicator.split_half = 1 # Prawa połowa
+        elif orientation == Qt.Horizontal and split_half == 0: # Lewa połowa
+            drop_zone = QRect(rect.topLeft(), QPoint(rect.left() + rect.width() // 2, rect.bottom()))
+        elif orientation == Qt.Horizontal: # Prawa połowa
+            drop_zone = QRect(QPoint(rect.left() + rect.width() // 2, rect.top()), rect.bottomRight())
         else:
-             # Domyślnie środek, jeśli gdzieś pomiędzy
-             drop_zone = self.tabBar().geometry()
-             self.drop_indicator.split_orientation = Qt.TargetIsCentralWidget
+            drop_zone = self.tabBar().geometry() # Celuj w pasek zakładek
 
         # Mapuj lokalny prostokąt na globalne koordynaty okna
         global_top_left = self.mapTo(self.window(), drop_zone.topLeft())
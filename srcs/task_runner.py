@@ -0,0 +1,237 @@
+# task_runner.py
+import os
+import heapq
+import itertools
+import time
+import threading
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+# Priorytety zadań (mniejszy = wykonywany wcześniej)
+PRIORITY_FOCUSED = 0    # bieżąca zakładka aktywnego panelu
+PRIORITY_VISIBLE = 1    # bieżąca zakładka innego panelu
+PRIORITY_BACKGROUND = 2 # zakładka w panelu, ale nie na wierzchu
+PRIORITY_HIDDEN = 3     # zakładka ukryta lub zadanie bez właściciela
+# Maksymalna liczba zadań wykonywanych jednocześnie (wątków roboczych)
+MAX_CONCURRENT_TASKS = max(2, min(8, os.cpu_count() or 2))
+# Ile ms w jednym obiegu pętli zdarzeń można poświęcić na przekazywanie wyników (on_done) w wątku GUI
+DELIVERY_BUDGET_MS = 10
+
+
+class TaskHandle:
+    """
+    Zlecone zadanie. Funkcja zadania dostaje should_stop (jak QThread.isInterruptionRequested)
+    i powinna go sprawdzać między krokami dłuższej pracy.
+    """
+    def __init__(self, function, owner, priority, sequence, on_done, on_error):
+        self.function = function
+        self.owner = owner # np. ID zakładki - cancel_owner() anuluje wszystkie jej zadania
+        self.priority = priority
+        self.sequence = sequence # kolejność zlecenia - rozstrzyga przy równym priorytecie
+        self.on_done = on_done
+        self.on_error = on_error
+        self._cancelled = False
+
+    def cancel(self):
+        """ Zadanie z kolejki nie zostanie uruchomione, a wynik już trwającego - dostarczony. """
+        self._cancelled = True
+        self.release_callbacks()
+
+    def release_callbacks(self):
+        # Wywołania zwrotne trzymają zwykle widget treści - nie mogą go przetrzymać po zamknięciu zakładki
+        self.on_done = None
+        self.on_error = None
+
+    def is_cancelled(self):
+        return self._cancelled
+
+
+class TaskWorkerThread(QThread):
+    """ Wątek puli TaskRunner - pobiera zadania z kolejki priorytetowej aż do stop(). """
+    taskDone = pyqtSignal(object, object) # TaskHandle, wynik
+    taskFailed = pyqtSignal(object, str) # TaskHandle, komunikat błędu
+
+    def __init__(self, runner, parent=None):
+        super().__init__(parent)
+        self._runner = runner
+
+    def run(self):
+        while True:
+            handle = self._runner._next_task()
+            if handle is None:
+                return
+            try:
+                result = handle.function(handle.is_cancelled)
+            except Exception as e:
+                self.taskFailed.emit(handle, str(e))
+            else:
+                self.taskDone.emit(handle, result)
+
+
+class TaskRunner(QObject):
+    """
+    Pula wątków dla dostawców treści zakładek (wczytywanie plików itp.) z ograniczoną współbieżnością.
+    Zadania czekają w kolejce priorytetowej; priorytet liczy funkcja priority_of(owner) w wątku GUI
+    przy zleceniu i ponownie po reprioritize() (zmiana focusu, bieżącej zakładki).
+    Wyniki (on_done/on_error) są wywoływane w wątku GUI - też według priorytetu i w porcjach
+    ograniczonych czasem (DELIVERY_BUDGET_MS), a dla anulowanych zadań - pomijane.
+    """
+    def __init__(self, priority_of=None, max_workers=MAX_CONCURRENT_TASKS, parent=None):
+        super().__init__(parent)
+        self._priority_of = priority_of
+        self._max_workers = max_workers
+        self._condition = threading.Condition()
+        self._queue = [] # kopiec (priorytet, kolejność zlecenia, TaskHandle)
+        self._sequence = itertools.count()
+        self._workers = [] # wątki tworzone leniwie, do max_workers
+        self._idle_workers = 0
+        self._stopping = False
+        # Zadania zlecone, a jeszcze niezakończone (tylko wątek GUI); key: owner, value: set(TaskHandle)
+        self._active = {}
+        self._completed = [] # (TaskHandle, wynik, komunikat błędu lub None) czekające na przekazanie
+
+        self._deliver_timer = QTimer(self)
+        self._deliver_timer.setInterval(0)
+        self._deliver_timer.timeout.connect(self._deliver_results)
+
+        self._reprioritize_timer = QTimer(self)
+        self._reprioritize_timer.setSingleShot(True)
+        self._reprioritize_timer.setInterval(0)
+        self._reprioritize_timer.timeout.connect(self._reprioritize_now)
+
+    def submit(self, function, on_done=None, on_error=None, owner=None, priority=None):
+        """
+        Zleca function(should_stop) do wykonania w puli. on_done(wynik) / on_error(komunikat) są wołane
+        w wątku GUI. priority=None - priorytet z priority_of(owner). Zwraca TaskHandle.
+        """
+        if priority is None:
+            priority = self._priority_of(owner) if self._priority_of is not None and owner is not None else PRIORITY_HIDDEN
+        handle = TaskHandle(function, owner, priority, next(self._sequence), on_done, on_error)
+        self._active.setdefault(owner, set()).add(handle)
+        with self._condition:
+            if self._stopping:
+                handle.cancel()
+                return handle
+            heapq.heappush(self._queue, (priority, handle.sequence, handle))
+            if len(self._queue) > self._idle_workers and len(self._workers) < self._max_workers:
+                self._start_worker()
+            self._condition.notify()
+        return handle
+
+    def _start_worker(self):
+        worker = TaskWorkerThread(self, self)
+        worker.taskDone.connect(self._on_task_done)
+        worker.taskFailed.connect(self._on_task_failed)
+        self._workers.append(worker)
+        worker.start()
+
+    def _next_task(self):
+        """ Wołane przez wątki robocze: najpilniejsze nieanulowane zadanie lub None przy zatrzymaniu. """
+        with self._condition:
+            while True:
+                while self._queue:
+                    _, _, handle = heapq.heappop(self._queue)
+                    if not handle.is_cancelled():
+                        return handle
+                if self._stopping:
+                    return None
+                self._idle_workers += 1
+                self._condition.wait()
+                self._idle_workers -= 1
+
+    def cancel(self, handle):
+        """ Anuluje jedno zadanie - w odróżnieniu od TaskHandle.cancel() usuwa je też z kolejki i pending_count(). """
+        handle.cancel()
+        self._forget(handle)
+        with self._condition:
+            self._queue = [entry for entry in self._queue if entry[2] is not handle]
+            heapq.heapify(self._queue)
+
+    def cancel_owner(self, owner):
+        """ Anuluje zadania właściciela (zakładka ukryta lub zamknięta). Zwraca True, jeśli jakieś trwały. """
+        handles = self._active.pop(owner, ())
+        if not handles:
+            return False
+        for handle in handles:
+            handle.cancel()
+        with self._condition:
+            self._queue = [entry for entry in self._queue if not entry[2].is_cancelled()]
+            heapq.heapify(self._queue)
+        return True
+
+    def reprioritize(self, *args):
+        """ Przelicza priorytety zadań w kolejce przy najbliższym obiegu pętli zdarzeń (przyjmuje argumenty sygnałów). """
+        if self._priority_of is not None and not self._stopping:
+            self._reprioritize_timer.start()
+
+    def _reprioritize_now(self):
+        with self._condition:
+            owners = {entry[2].owner for entry in self._queue}
+        owners.update(entry[0].owner for entry in self._completed)
+        # priority_of sięga do widgetów - liczymy poza blokadą, w wątku GUI
+        priorities = {owner: self._priority_of(owner) for owner in owners if owner is not None}
+        for handle, _, _ in self._completed:
+            handle.priority = priorities.get(handle.owner, handle.priority)
+        with self._condition:
+            queue = []
+            for _, sequence, handle in self._queue:
+                handle.priority = priorities.get(handle.owner, handle.priority)
+                queue.append((handle.priority, sequence, handle))
+            heapq.heapify(queue)
+            self._queue = queue
+
+    def pending_count(self):
+        """ Liczba zadań zleconych, a jeszcze niezakończonych (w kolejce i w trakcie). """
+        return sum(len(handles) for handles in self._active.values())
+
+    def _forget(self, handle):
+        handles = self._active.get(handle.owner)
+        if handles is not None:
+            handles.discard(handle)
+            if not handles:
+                del self._active[handle.owner]
+
+    def _on_task_done(self, handle, result):
+        self._completed.append((handle, result, None))
+        self._deliver_timer.start()
+
+    def _on_task_failed(self, handle, message):
+        self._completed.append((handle, None, message))
+        self._deliver_timer.start()
+
+    def _deliver_results(self):
+        """ Przekazuje wyniki od najpilniejszych, dopóki nie minie DELIVERY_BUDGET_MS (co najmniej jeden). """
+        self._completed.sort(key=lambda entry: (entry[0].priority, entry[0].sequence), reverse=True)
+        deadline = time.perf_counter() + DELIVERY_BUDGET_MS / 1000
+        while self._completed:
+            handle, result, message = self._completed.pop()
+            self._forget(handle)
+            on_done, on_error = handle.on_done, handle.on_error
+            handle.release_callbacks()
+            if not handle.is_cancelled():
+                if message is None:
+                    if on_done is not None:
+                        on_done(result)
+                else:
+                    print(f"Warning: Background task for {handle.owner!r} failed: {message}")
+                    if on_error is not None:
+                        on_error(message)
+            if time.perf_counter() >= deadline:
+                break
+        if not self._completed:
+            self._deliver_timer.stop()
+
+    def stop(self):
+        """ Anuluje wszystkie zadania i czeka na zakończenie wątków (trwające zadania kończą bieżący krok). """
+        with self._condition:
+            self._stopping = True
+            self._queue = []
+            self._condition.notify_all()
+        for handles in self._active.values():
+            for handle in handles:
+                handle.cancel()
+        self._active = {}
+        self._completed = []
+        self._reprioritize_timer.stop()
+        self._deliver_timer.stop()
+        for worker in self._workers:
+            worker.wait()
@@ -0,0 +1,146 @@
+# text_search.py
+"""
+Wyszukiwanie tekstu w buforach i plikach.
+Pliki są mapowane do pamięci (mmap) i przeszukiwane skompilowanym wyrażeniem regularnym na bajtach,
+bez dekodowania całej treści - dekodowane są tylko linie z dopasowaniami. Zapytania dosłowne
+omijają re: szukamy przez find() (kilka razy szybsze), a bez rozróżniania wielkości liter - przez find()
+w kopii fragmentu po lower(). Dla bajtów lower() zmienia tylko ASCII i nie zmienia długości, więc pozycje
+odpowiadają oryginałowi, a wynik jest taki sam jak z re.IGNORECASE na bajtach. Na bajtach wielkość liter
+zrównywana jest tylko dla ASCII - zapytanie bez rozróżniania wielkości liter z innymi literami (np. "ą")
+przeszukuje pliki po zdekodowaniu, tak jak bufory zakładek (file_query).
+Moduł nie zależy od Qt - funkcje search_files_job i init_search_process są uruchamiane w procesach puli.
+"""
+import os
+import re
+import mmap
+
+# Limit dopasowań z jednego pliku/bufora
+MAX_MATCHES_PER_SOURCE = 1000
+# Długość podglądu linii z dopasowaniem (w znakach)
+PREVIEW_CHARS = 200
+# Plik z bajtem NUL w tylu pierwszych bajtach uznajemy za binarny i pomijamy
+BINARY_SNIFF_BYTES = 8192
+# Wyszukiwanie dosłowne bez rozróżniania wielkości liter przegląda plik w oknach tej wielkości (kopia + lower())
+LOWER_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Numer bieżącego wyszukiwania wspólny z procesami puli (multiprocessing.Value) - zadania
+# starszych wyszukiwań kończą się od razu, więc przerwanie nie czeka na przetworzenie kolejki
+_current_generation = None
+
+def compile_query(query, regex=False, case_sensitive=False):
+    """
+    Zwraca (wzorzec str, flagi, tekst dosłowny lub None) dla zapytania; rzuca re.error dla błędnego wyrażenia.
+    Ten sam wzorzec jest kompilowany jako str (bufory) i - przez file_query - dla plików; dla bajtów
+    klasy znaków (\\w, \\b) obejmują tylko ASCII.
+    """
+    pattern = query if regex else re.escape(query)
+    flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+    re.compile(pattern, flags) # Walidacja w wątku GUI - błąd trafia do użytkownika, a nie do puli
+    return pattern, flags, None if regex else query
+
+def file_query(pattern, flags, literal):
+    """
+    (skompilowany wzorzec, tekst dosłowny bytes lub None) do przeszukiwania plików (search_file).
+    Zwykle wzorzec na bajtach UTF-8; bez rozróżniania wielkości liter i z literami spoza ASCII, które ją mają,
+    wzorzec str - pliki są wtedy dekodowane, by "ą" znajdowało "Ą" tak samo jak w buforach.
+    """
+    if flags & re.IGNORECASE and any(ord(char) > 127 and char.lower() != char.upper() for char in pattern):
+        return re.compile(pattern, flags), None
+    return re.compile(pattern.encode('utf-8'), flags), literal.encode('utf-8') if literal is not None else None
+
+def literal_spans(data, literal, ignore_case):
+    """ Generator (początek, koniec) wystąpień literal (bytes) w data (bytes/mmap), bez nakładania się - jak re.finditer. """
+    size = len(literal)
+    if not ignore_case:
+        position = data.find(literal)
+        while position != -1:
+            yield position, position + size
+            position = data.find(literal, position + size)
+        return
+    literal = literal.lower()
+    resume = 0 # Koniec ostatniego wystąpienia - następne nie może zaczynać się wcześniej
+    for chunk_start in range(0, len(data), LOWER_CHUNK_BYTES):
+        # Okno zachodzi na następne o size - 1 bajtów, by znaleźć wystąpienia na granicy okien
+        window = data[chunk_start:chunk_start + LOWER_CHUNK_BYTES + size - 1].lower()
+        position = window.find(literal, max(0, resume - chunk_start))
+        while position != -1 and position < LOWER_CHUNK_BYTES:
+            resume = chunk_start + position + size
+            yield chunk_start + position, resume
+            position = window.find(literal, position + size)
+
+def scan_matches(data, pattern, limit=MAX_MATCHES_PER_SOURCE):
+    """
+    Dopasowania pattern w data (str, bytes lub mmap): lista (numer linii od 0, kolumna, długość, podgląd linii).
+    Kolumna i długość są w znakach.
+    """
+    return collect_matches(data, (match.span() for match in pattern.finditer(data)), limit)
+
+def collect_matches(data, spans, limit=MAX_MATCHES_PER_SOURCE):
+    """ Zamienia pozycje (początek, koniec) w data na wyniki jak scan_matches. Linie liczymy przyrostowo między dopasowaniami. """
+    is_text = isinstance(data, str)
+    newline = '\n' if is_text else b'\n'
+    results = []
+    line = 0
+    counted_to = 0 # Offset, do którego policzono znaki nowej linii
+    for start, end in spans:
+        if start == end:
+            continue # Puste dopasowania (np. samo ^) nie są wynikami
+        line += data[counted_to:start].count(newline)
+        counted_to = start
+        line_start = data.rfind(newline, 0, start) + 1
+        line_end = data.find(newline, start)
+        if line_end == -1:
+            line_end = len(data)
+        if is_text:
+            column, length = start - line_start, end - start
+            preview = data[line_start:line_end]
+        else:
+            column = len(data[line_start:start].decode('utf-8', 'replace'))
+            length = len(data[start:end].decode('utf-8', 'replace'))
+            preview = data[line_start:line_end].decode('utf-8', 'replace')
+        results.append((line, column, length, preview[:PREVIEW_CHARS].rstrip('\r')))
+        if len(results) >= limit:
+            break
+    return results
+
+def search_file(path, pattern, literal=None, limit=MAX_MATCHES_PER_SOURCE):
+    """
+    Przeszukuje plik (mmap) wzorcem na bajtach albo, jeśli podano literal (bytes), wyszukiwaniem dosłownym
+    z flagą IGNORECASE wzorca. Wzorzec str (z file_query) przeszukuje treść zdekodowaną jako UTF-8.
+    Zwraca (dopasowania, przeszukane bajty); pliki binarne i nieczytelne - ([], 0).
+    """
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return [], 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data.find(b'\0', 0, BINARY_SNIFF_BYTES) != -1:
+                    return [], 0
+                if isinstance(pattern.pattern, str):
+                    return scan_matches(data[:].decode('utf-8', 'replace'), pattern, limit), size
+                if literal is not None:
+                    spans = literal_spans(data, literal, pattern.flags & re.IGNORECASE)
+                    return collect_matches(data, spans, limit), size
+                return scan_matches(data, pattern, limit), size
+    except (OSError, ValueError):
+        return [], 0
+
+def init_search_process(generation):
+    """ Inicjalizator procesu puli: zapamiętuje wspólny numer bieżącego wyszukiwania. """
+    global _current_generation
+    _current_generation = generation
+
+def search_files_job(job):
+    """
+    Zadanie puli: job = (generacja, ścieżki, wzorzec, flagi, tekst dosłowny).
+    Zwraca listę (ścieżka, dopasowania, bajty); numer generacji sprawdzany jest przed każdym plikiem.
+    """
+    generation, paths, pattern, flags, literal = job
+    compiled, literal = file_query(pattern, flags, literal)
+    results = []
+    for path in paths:
+        if _current_generation is not None and _current_generation.value != generation:
+            break # Wyszukiwanie przerwane lub zastąpione nowym
+        results.append((path, *search_file(path, compiled, literal)))
+    return results
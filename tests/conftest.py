@@ -0,0 +1,16 @@
+# conftest.py
+""" Wspólne przygotowanie testów: moduły z srcs/ na ścieżce importu i QApplication bez ekranu (offscreen). """
+import os
+import sys
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'srcs'))
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    app = QApplication.instance() or QApplication([])
+    yield app
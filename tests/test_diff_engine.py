@@ -0,0 +1,78 @@
+# test_diff_engine.py
+""" Poprawność diff_lines na losowych sekwencjach (ziarno stałe): opkody odtwarzają prawą stronę, a Myers daje LCS. """
+import random
+
+import pytest
+
+from diff_engine import diff_lines, ANCHOR_MIN_LINES
+
+
+def lcs_length(a, b):
+    """ Długość najdłuższego wspólnego podciągu (programowanie dynamiczne, O(n*m)). """
+    previous = [0] * (len(b) + 1)
+    for line in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if line == other else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def apply_opcodes(a, b, opcodes):
+    """ Składa prawą stronę z opkodów; sprawdza ciągłość zakresów i zgodność bloków 'equal'. """
+    result = []
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        assert tag in ('equal', 'replace', 'delete', 'insert')
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            assert (tag == 'insert') == (i1 == i2) and (tag == 'delete') == (j1 == j2)
+            result.extend(b[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    return result
+
+
+def random_edit(rng, lines, alphabet):
+    """ Kopia lines z losowymi wstawieniami, usunięciami i zmianami. """
+    edited = list(lines)
+    for _ in range(rng.randrange(0, max(1, len(lines) // 3) + 1)):
+        position = rng.randrange(len(edited) + 1)
+        operation = rng.random()
+        if operation < 0.4 or not edited:
+            edited.insert(position, rng.choice(alphabet))
+        elif operation < 0.7:
+            del edited[min(position, len(edited) - 1)]
+        else:
+            edited[min(position, len(edited) - 1)] = rng.choice(alphabet)
+    return edited
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_small_diffs_are_minimal(seed):
+    # Poniżej ANCHOR_MIN_LINES porównuje sam Myers - liczba wspólnych linii musi być równa LCS
+    rng = random.Random(seed)
+    alphabet = [f"linia {number}" for number in range(6)]
+    for _ in range(200):
+        a = [rng.choice(alphabet) for _ in range(rng.randrange(0, ANCHOR_MIN_LINES // 2))]
+        b = random_edit(rng, a, alphabet) if rng.random() < 0.7 else [rng.choice(alphabet) for _ in range(rng.randrange(0, 30))]
+        b = b[:ANCHOR_MIN_LINES - len(a) - 1]
+        opcodes = diff_lines(a, b)
+        assert apply_opcodes(a, b, opcodes) == b
+        matched = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == 'equal')
+        assert matched == lcs_length(a, b)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_large_diffs_rebuild_right_side(seed):
+    # Duże sekwencje dzielą kotwice (linie unikalne) - opkody nadal muszą odtwarzać prawą stronę
+    rng = random.Random(seed)
+    alphabet = [f"wspólna {number}" for number in range(20)] + [f"unikalna {number}" for number in range(2000)]
+    a = [rng.choice(alphabet) for _ in range(1500)]
+    for _ in range(20):
+        b = random_edit(rng, a, alphabet)
+        assert apply_opcodes(a, b, diff_lines(a, b)) == b
+    assert diff_lines(a, a) == [('equal', 0, len(a), 0, len(a))]
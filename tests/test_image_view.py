@@ -0,0 +1,86 @@
+# test_image_view.py
+"""
+Piramida kafli obrazu: wspólna dla widoków pliku i zachowana po zamknięciu ostatniego (w budżecie dysku),
+niedokończona - usuwana razem z ostatnim widokiem; kroki budowy idą przez TaskRunner z właścicielem zakładki.
+"""
+import pytest
+from PyQt5.QtGui import QImage, QColor
+
+import image_view
+from image_view import ImageView
+from main_window import MainWindow
+from task_runner import TaskRunner
+
+
+@pytest.fixture
+def runner(qapp):
+    runner = TaskRunner()
+    yield runner
+    runner.stop()
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    """ PNG dekodowany w całości: piramida w jednym kroku podglądu i jednym kroku pełnej rozdzielczości. """
+    path = tmp_path / "obraz.png"
+    image = QImage(1200, 1000, QImage.Format_RGB32)
+    image.fill(QColor(30, 120, 200))
+    assert image.save(str(path))
+    return str(path)
+
+
+def open_view(qapp, path, runner):
+    view = ImageView(path, runner)
+    view.resize(400, 300)
+    view.show()
+    while not view._pyramid.built or not view._cache or view._wanted or runner.pending_count():
+        qapp.processEvents()
+    return view
+
+
+def test_views_of_one_file_share_pyramid(qapp, image_path, runner):
+    first = open_view(qapp, image_path, runner)
+    second = open_view(qapp, image_path, runner)
+    pyramid = first._pyramid
+    assert second._pyramid is pyramid
+    assert second._image_size == (1200, 1000) and second._cache
+    first.stop_worker()
+    second.stop_worker()
+    assert pyramid.views == set() and not pyramid._closed
+
+    # Odtworzona zakładka dostaje zbudowaną piramidę - bez ponownej budowy
+    restored = ImageView(image_path, runner)
+    assert restored._pyramid is pyramid and restored._image_size == (1200, 1000)
+    restored.stop_worker()
+
+
+def test_unused_pyramids_are_closed(qapp, image_path, runner, monkeypatch):
+    view = ImageView(image_path, runner)
+    view.show()
+    view._request_visible_tiles() # Zleca pierwszy krok budowy
+    pyramid = view._pyramid
+    view.stop_worker()
+    assert pyramid._closed and pyramid not in image_view._pyramids.values()
+    while runner.pending_count():
+        qapp.processEvents()
+    assert pyramid._store is None and not pyramid.built
+
+    monkeypatch.setattr(image_view, 'PYRAMID_DISK_BUDGET', 0)
+    view = open_view(qapp, image_path, runner)
+    pyramid = view._pyramid
+    view.stop_worker()
+    assert pyramid._closed and pyramid._store is None
+
+
+def test_pyramid_is_built_with_tab_priority(qapp, image_path):
+    window = MainWindow(populate=False)
+    window.show()
+    tab_id = window.open_path(image_path)
+    view = window.all_tabs_data[tab_id][0]
+    assert isinstance(view, ImageView)
+    qapp.processEvents()
+    assert view._pyramid._handle.owner == tab_id
+    while not view._pyramid.built:
+        qapp.processEvents()
+    window.close()
+    qapp.processEvents()
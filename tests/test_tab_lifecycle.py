@@ -0,0 +1,90 @@
+# test_tab_lifecycle.py
+"""
+Wykrywanie wycieków: zamknięte zakładki, zwolnione widgety ukrytych zakładek i panele usunięte
+przez cleanup_empty_splitters muszą zostać zwolnione (weakref martwy po DeferredDelete i gc.collect()).
+"""
+import pytest
+from PyQt5.QtCore import Qt
+
+from main_window import MainWindow
+from tab_lifecycle import LeakTracker
+
+TABS = 6
+
+
+@pytest.fixture
+def window(qapp):
+    window = MainWindow(populate=False)
+    window.show()
+    qapp.processEvents()
+    yield window
+    window.close()
+    qapp.processEvents()
+
+
+@pytest.fixture
+def tab_ids(qapp, window, tmp_path):
+    """ Zakładki edytora z plikami z dysku (treść wczytana w tle przed testem). """
+    ids = []
+    for number in range(TABS):
+        path = tmp_path / f"plik_{number}.py"
+        path.write_text("def f(x):\n    return x * 2\n" * 100)
+        ids.append(window.open_path(str(path)))
+    while window.registry.task_runner.pending_count():
+        qapp.processEvents()
+    qapp.processEvents()
+    return ids
+
+
+def assert_all_freed(qapp, window, tracker):
+    """ Obsługuje zdarzenia (w tym odroczone porządki układu) i sprawdza oba wykrywacze - okna i testu. """
+    qapp.processEvents()
+    assert tracker.leaks() == []
+    assert window.leak_tracker.leaks() == []
+
+
+def test_closed_tabs_are_freed(qapp, window, tab_ids):
+    tracker = LeakTracker()
+    for tab_id in tab_ids:
+        content_widget, title = window.all_tabs_data[tab_id]
+        tracker.track(content_widget, f"tab {tab_id} ('{title}')")
+        assert window.close_tab(tab_id)
+        del content_widget
+    assert not window.all_tabs_data
+    assert_all_freed(qapp, window, tracker)
+
+
+def test_evicted_hidden_tabs_are_freed(qapp, window, tab_ids):
+    window.hidden_tabs.budget = 0 # Każda ukryta zakładka ponad budżet - widget zwalniany od razu
+    tracker = LeakTracker()
+    for tab_id in tab_ids:
+        content_widget, title = window.all_tabs_data[tab_id]
+        tracker.track(content_widget, f"tab {tab_id} ('{title}')")
+        del content_widget
+        window.toggle_or_split_tab(tab_id) # Ukrycie widocznej zakładki
+    assert all(window.all_tabs_data[tab_id][0] is None for tab_id in tab_ids)
+    assert_all_freed(qapp, window, tracker)
+
+    # Zwolniona zakładka daje się odtworzyć z opisu
+    window.toggle_or_split_tab(tab_ids[0])
+    assert window.all_tabs_data[tab_ids[0]][0] is not None
+
+
+def test_removed_panels_are_freed(qapp, window, tab_ids):
+    root_panel = window.find_all_tab_widgets()[0]
+    tracker = LeakTracker()
+    for tab_id in tab_ids[1:]:
+        content_widget, title = window.all_tabs_data[tab_id]
+        root_panel.removeTab(root_panel.indexOf(content_widget))
+        panel = window.split_with_tab(root_panel, content_widget, title, Qt.Horizontal, False)
+        assert panel is not None
+        tracker.track(panel, f"panel of tab {tab_id}")
+        del content_widget, panel
+    qapp.processEvents()
+    assert len(window.find_all_tab_widgets()) == TABS
+
+    # Zamknięcie zakładek opróżnia panele - cleanup_layout_if_needed (cleanup_empty_splitters) je usuwa
+    for tab_id in tab_ids[1:]:
+        window.close_tab(tab_id)
+    assert_all_freed(qapp, window, tracker)
+    assert window.find_all_tab_widgets() == [root_panel]
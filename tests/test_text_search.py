@@ -0,0 +1,50 @@
+# test_text_search.py
+""" Wyszukiwanie w plikach (bajty, mmap) musi dawać te same wyniki co w buforach zakładek (str). """
+import random
+import re
+
+import pytest
+
+import text_search
+from text_search import compile_query, file_query, search_file, scan_matches, collect_matches
+
+TEXT = "pierwsza linia\nZAŻÓŁĆ GĘŚLĄ JAŹŃ\nżółć ą Ą\nzwykłe ASCII: Abc abc ABC\n"
+
+
+@pytest.mark.parametrize('query, regex, case_sensitive', [
+    ("gęślą", False, False),
+    ("Ą", False, False),
+    ("ą", False, True),
+    ("abc", False, False),
+    ("abc", False, True),
+    (r"ż\w+", True, False),
+    (r"J[aA]ŹŃ", True, False),
+])
+def test_file_matches_equal_buffer_matches(tmp_path, query, regex, case_sensitive):
+    path = tmp_path / "plik.txt"
+    path.write_text(TEXT, encoding='utf-8')
+    pattern, flags, literal = compile_query(query, regex, case_sensitive)
+    matches, _ = search_file(str(path), *file_query(pattern, flags, literal))
+    assert matches == scan_matches(TEXT, re.compile(pattern, flags))
+    assert matches
+
+
+@pytest.mark.parametrize('ignore_case', [False, True])
+def test_literal_spans_match_finditer_across_chunks(monkeypatch, ignore_case):
+    # Małe okna - wystąpienia często leżą na granicy okien przy lower()
+    monkeypatch.setattr(text_search, 'LOWER_CHUNK_BYTES', 7)
+    rng = random.Random(0)
+    for _ in range(300):
+        data = ''.join(rng.choice('aAbB\n') for _ in range(rng.randrange(0, 80))).encode('ascii')
+        literal = ''.join(rng.choice('aAbB') for _ in range(rng.randrange(1, 5))).encode('ascii')
+        expected = [match.span() for match in
+                    re.finditer(re.escape(literal), data, re.IGNORECASE if ignore_case else 0)]
+        assert list(text_search.literal_spans(data, literal, ignore_case)) == expected
+
+
+def test_collect_matches_equal_scan_matches(monkeypatch):
+    monkeypatch.setattr(text_search, 'LOWER_CHUNK_BYTES', 5)
+    data = "abc\nxABcab\n\nżółć abc\nABCABC".encode('utf-8')
+    literal = b"abc"
+    spans = text_search.literal_spans(data, literal, True)
+    assert collect_matches(data, spans) == scan_matches(data, re.compile(re.escape(literal), re.IGNORECASE))